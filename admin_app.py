@@ -2,12 +2,16 @@ import streamlit as st
 import requests
 import pandas as pd
 import time
+import json
 import yaml
 import os
+from datetime import datetime
 
 st.set_page_config(page_title="Production Balancer Admin", layout="wide")
 
 API_URL = "http://localhost:8000"
+# Live Updates 스트림의 keepalive 주기 (초) - 이벤트가 없을 때 버튼 클릭이 반영되기까지의 최대 지연
+STREAM_HEARTBEAT_SEC = 2
 
 st.title("⚙️ Production Balancer Admin Panel")
 
@@ -54,19 +58,117 @@ if st.button("🚀 Trigger Manual Job Now"):
     except:
         st.error("Is API server running?")
 
-# 큐 리스트 조회 (API에 구현 필요)
+# 큐 현황 (수동 실행은 스케줄 배치보다 먼저 시작, 대기 중 배치는 모드별 1개로 병합)
+try:
+    queue_info = requests.get(f"{API_URL}/config", timeout=3).json().get("queue")
+except:
+    queue_info = None
+if queue_info:
+    waits = queue_info["wait_time"]
+    q_cols = st.columns(4)
+    q_cols[0].metric("Queued (manual / scheduled)",
+                     f"{queue_info['depth_by_priority'].get('manual', 0)} / "
+                     f"{queue_info['depth_by_priority'].get('scheduled', 0)}")
+    q_cols[1].metric("Running", f"{queue_info['running']} / {queue_info['limits']['max_workers']}")
+    for col, priority in zip(q_cols[2:], ("manual", "scheduled")):
+        avg = waits[priority]["recent_avg_sec"]
+        col.metric(f"Avg wait ({priority})", f"{avg:.1f}s" if avg is not None else "-")
+    coalesced = queue_info["counters"].get("coalesced", 0)
+    if coalesced:
+        st.caption(f"{coalesced} queued scheduled batches were replaced by newer runs.")
+
+# 큐 리스트 조회 (최신 10건만 요청 - 이력 크기와 무관하게 가벼운 조회)
 st.subheader("Active Jobs (Last 10)")
+f_col1, f_col2 = st.columns(2)
+with f_col1:
+    status_filter = st.selectbox("Status", ["ALL", "PENDING", "RUNNING", "COMPLETED", "FAILED", "CANCELLED"])
+with f_col2:
+    mode_filter = st.selectbox("Mode", ["ALL", "production", "development", "local_test"])
+params = {"limit": 10}
+if status_filter != "ALL":
+    params["status"] = status_filter
+if mode_filter != "ALL":
+    params["mode"] = mode_filter
+job_cols = ['status', 'phase', 'objective', 'gap', 'capacity_warning', 'mode', 'submit_time', 'start_time', 'end_time']
+jobs_view = {}  # {job_id: 요약 정보} (최신순)
 try:
-    res = requests.get(f"{API_URL}/jobs")
+    res = requests.get(f"{API_URL}/jobs", params=params)
     if res.status_code == 200:
-        jobs_data = res.json()
-        if jobs_data:
-            df = pd.DataFrame.from_dict(jobs_data, orient='index')
-            st.table(df[['status', 'mode', 'submit_time', 'start_time', 'end_time']].sort_values('submit_time', ascending=False))
-        else:
-            st.info("No jobs found.")
+        jobs_view = {j['job_id']: j for j in res.json()["jobs"]}
+    api_up = True
 except:
+    api_up = False
     st.info("Start the API server to see live logs.")
 
+table_slot = st.empty()
+log_slot = st.empty()
+
+def render_jobs():
+    visible = [
+        j for j in jobs_view.values()
+        if (status_filter == "ALL" or j.get('status') == status_filter)
+        and (mode_filter == "ALL" or j.get('mode') == mode_filter)
+    ][:10]
+    if visible:
+        df = pd.DataFrame(visible).set_index('job_id')
+        table_slot.table(df[[c for c in job_cols if c in df.columns]])
+    else:
+        table_slot.info("No jobs found.")
+
+def apply_event(event):
+    """SSE 이벤트를 작업 목록에 반영 (새 작업은 맨 앞에 추가)"""
+    job = jobs_view.get(event['job_id'])
+    if job is None:
+        if event['type'] != 'status':
+            return
+        job = {'job_id': event['job_id'], 'submit_time': event['time']}
+        items = [(event['job_id'], job)] + list(jobs_view.items())
+        jobs_view.clear()
+        jobs_view.update(items)
+    if event['type'] == 'status':
+        job.update({k: event[k] for k in ('status', 'mode', 'error', 'capacity_warning') if event.get(k) is not None})
+        if event['status'] == 'RUNNING':
+            job['start_time'] = event['time']
+        elif event['status'] in ('COMPLETED', 'FAILED', 'CANCELLED'):
+            job['end_time'] = event['time']
+            job['phase'] = None
+    elif event['type'] == 'phase':
+        job['phase'] = event['phase']
+    elif event['type'] == 'incumbent':
+        job['objective'] = event.get('objective')
+        job['gap'] = event.get('gap')
+
 if st.button("Refresh List"):
     st.rerun()
+
+if api_up:
+    render_jobs()
+    # 폴링 대신 SSE 구독: 작업 상태/단계/incumbent 변경 시에만 화면 갱신 (스트림이 끊길 때까지 유지)
+    # Streamlit은 st.* 호출 시점에만 버튼 클릭 등의 재실행 요청을 처리하므로,
+    # 이벤트가 없어도 STREAM_HEARTBEAT_SEC마다 오는 keepalive에서 heartbeat 표시를 갱신해 스크립트가 멈춰 있지 않게 함
+    if st.toggle("📡 Live Updates (stream)", value=True):
+        event_log = []
+        heartbeat_slot = st.empty()
+        try:
+            with requests.get(f"{API_URL}/jobs/events", params={"keepalive": STREAM_HEARTBEAT_SEC},
+                              stream=True, timeout=(3, 60)) as stream:
+                data_lines = []
+                for line in stream.iter_lines(decode_unicode=True):
+                    if line is None:
+                        continue
+                    if line.startswith(':'):
+                        heartbeat_slot.caption(f"Live · last heartbeat {datetime.now():%H:%M:%S}")
+                        continue
+                    if line.startswith('data:'):
+                        data_lines.append(line[5:].strip())
+                        continue
+                    if line == '' and data_lines:
+                        event = json.loads("\n".join(data_lines))
+                        data_lines = []
+                        apply_event(event)
+                        render_jobs()
+                        detail = event.get('status') or event.get('phase') or f"obj={event.get('objective')}"
+                        event_log.insert(0, f"{event['time'][11:19]}  {event['job_id'][:8]}  {event['type']}: {detail}")
+                        log_slot.code("\n".join(event_log[:15]))
+        except requests.exceptions.RequestException:
+            st.warning("Event stream disconnected. Refresh to reconnect.")
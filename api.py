@@ -1,31 +1,66 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Body, Query, Header, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from core.job_manager import JobManager
+from core.job_queue import QueueFull
+from core.metrics import format_prometheus
+from core.result_cache import get_result_cache
 import logging
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SSE 연결 유지용 주석 전송 주기 (초)
+SSE_KEEPALIVE_SEC = 15
+
 app = FastAPI(title="Production Balancer API (Async Queue)", description="Queue-based Production Allocation System")
 job_manager = JobManager()
 
 @app.post("/run-optimization")
-async def run_optimization():
+async def run_optimization(force_refresh: bool = False):
     """
     작업을 큐에 등록하고 job_id를 반환합니다.
+    force_refresh=true이면 기준 정보 스냅샷 캐시를 무시하고 DB에서 다시 조회합니다.
     """
     try:
-        job_id = job_manager.submit_job()
+        job_id = job_manager.submit_job(force_refresh=force_refresh)
         logger.info(f"Job submitted: {job_id}")
         return {
             "status": "ACCEPTED",
             "job_id": job_id,
             "message": "Optimization task has been queued."
         }
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to submit job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/run-scenarios")
+async def run_scenarios(scenarios: List[dict] = Body(...)):
+    """
+    시나리오 비교 작업을 큐에 등록합니다. 입력은 한 번만 조회하고 시나리오들은 병렬로 풀이합니다.
+    예) [{"name": "demand+10%", "DEMAND_SCALE": 1.1},
+         {"name": "Unit_3 down", "DOWN_UNITS": ["Unit_3"]},
+         {"name": "A-OP10 +1 tool", "TOOLS_DELTA": {"Product_A|OP10": 1}}]
+    """
+    try:
+        job_id = job_manager.submit_scenarios(scenarios)
+        logger.info(f"Scenario job submitted: {job_id} ({len(scenarios)} scenarios)")
+        return {
+            "status": "ACCEPTED",
+            "job_id": job_id,
+            "message": f"{len(scenarios)} scenarios have been queued."
+        }
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to submit scenarios: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/job-status/{job_id}")
 async def get_status(job_id: str):
     """
@@ -37,19 +72,83 @@ async def get_status(job_id: str):
     
     return status_info
 
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """대기 중이거나 (프로세스 모드에서) 실행 중인 작업을 취소합니다."""
+    if not job_manager.get_job_status(job_id):
+        raise HTTPException(status_code=404, detail="Job ID not found")
+    if not job_manager.cancel_job(job_id):
+        raise HTTPException(status_code=409, detail="Job cannot be cancelled in its current state")
+    return {"status": "CANCEL_REQUESTED", "job_id": job_id}
+
+@app.get("/jobs/events")
+async def stream_job_events(request: Request, job_id: Optional[str] = None,
+                            keepalive: float = Query(SSE_KEEPALIVE_SEC, ge=1, le=60),
+                            last_event_id: Optional[int] = Header(None)):
+    """
+    작업 진행 이벤트를 Server-Sent Events로 전달합니다. (폴링 대체)
+    event: status (PENDING/RUNNING/COMPLETED/FAILED/CANCELLED) / phase (fetch/build/solve/results/upload)
+           / incumbent (풀이 중 개선된 목적값과 하한 - CBC, heuristic 백엔드)
+    job_id를 지정하면 해당 작업 이벤트만, 재연결 시 Last-Event-ID 헤더 이후 이벤트부터 재전송합니다.
+    keepalive: 이벤트가 없을 때 연결 유지 주석을 보내는 주기 (초)
+    """
+    queue, backlog = job_manager.events.subscribe(last_event_id)
+
+    async def event_stream():
+        try:
+            for event in backlog:
+                if job_id is None or event['job_id'] == job_id:
+                    yield _sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    # 프록시/클라이언트 연결 유지용 주석 라인
+                    yield ": keepalive\n\n"
+                    continue
+                if job_id is None or event['job_id'] == job_id:
+                    yield _sse(event)
+        finally:
+            job_manager.events.unsubscribe(queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
 @app.get("/jobs")
-async def get_all_jobs():
-    """모든 작업의 상태 리스트를 반환합니다."""
-    return job_manager.jobs
+async def get_jobs(status: Optional[str] = None, mode: Optional[str] = None,
+                   limit: int = Query(50, ge=1, le=500), cursor: Optional[int] = None, detail: bool = False):
+    """
+    작업 목록을 최신순으로 반환합니다. (status / mode 필터, limit 단위 페이지)
+    다음 페이지는 응답의 next_cursor를 cursor로 넘겨 조회합니다. (마지막 페이지면 null)
+    detail=true이면 요약 필드 대신 결과/메트릭을 포함한 전체 작업 정보를 반환합니다.
+    """
+    jobs, next_cursor = job_manager.jobs.list(status=status, mode=mode, limit=limit, cursor=cursor, detail=detail)
+    return {"jobs": jobs, "next_cursor": next_cursor}
 
 @app.get("/config")
 async def get_queue_config():
-    """현재 큐 및 워커 설정 정보를 확인합니다."""
+    """현재 큐 및 워커 설정 정보와 큐 현황(우선순위/모드별 대기 수, 대기 시간)을 확인합니다."""
+    cache = get_result_cache()
     return {
         "max_workers": job_manager.max_workers,
-        "timeout_sec": job_manager.timeout
+        "execution_mode": job_manager.execution_mode,
+        "timeout_sec": job_manager.timeout,
+        "backend": job_manager.backend,
+        "solver_options": job_manager.solver_options,
+        "decompose": job_manager.decompose,
+        "result_cache": cache.counters() if cache else None,
+        "queue": job_manager.queue_stats()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """작업 단계별 소요 시간, 모델 크기, 솔버 갭, 최대 메모리, 결과 캐시 적중 횟수를 Prometheus 텍스트 형식으로 반환합니다."""
+    cache = get_result_cache()
+    return format_prometheus(job_manager.metrics.snapshot(), cache.counters() if cache else None)
+
 @app.get("/health")
 async def health_check():
     return {"status": "UP"}
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from datetime import datetime
-from core.optimizer import solve_production_allocation
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
+from core.result_cache import cached_solve
+from core.optimizer import DEFAULT_SOLVER_OPTIONS
 import config.data_config as data_config
 import yaml
 import os
@@ -12,10 +15,76 @@ st.set_page_config(page_title="Production Schedule Dashboard", layout="wide")
 # YAML 설정 로드
 config_path = os.path.join(os.path.dirname(__file__), 'config', 'config.yaml')
 db_defaults = {"user": "ADMIN", "password": "", "dsn": "localhost:1521/xe"}
+dash_conf = {"input_cache_ttl_sec": 300, "gantt_detail_max_rows": 5000, "gantt_bucket_min": 60}
+solver_options = {}  # 배치 작업과 같은 시간 제한/갭 (Full MILP가 제한 없이 오래 풀리지 않도록)
 if os.path.exists(config_path):
     with open(config_path, 'r', encoding='utf-8') as f:
         full_config = yaml.safe_load(f)
         db_defaults.update(full_config.get('database', {}))
+        dash_conf.update(full_config.get('dashboard') or {})
+        opt_conf = full_config.get('optimization') or {}
+        solver_options = {k: opt_conf.get(k) for k in DEFAULT_SOLVER_OPTIONS}
+
+# Streamlit은 위젯 조작마다 스크립트 전체를 다시 실행하므로
+# DB 연결 풀은 세션 간 공유 (cache_resource), 입력 데이터는 TTL 동안 재사용 (cache_data)
+@st.cache_resource
+def get_oracle_manager():
+    from database.manager import OracleManager
+    return OracleManager()
+
+@st.cache_data(ttl=dash_conf['input_cache_ttl_sec'], show_spinner="Loading inputs from Oracle...")
+def load_db_inputs():
+    return get_oracle_manager().fetch_inputs()
+
+def unit_utilization(df, start, end, bucket_min):
+    """
+    요약 보기: 장비 x 시간 구간별 가동률 (생산 시간 / 구간 길이)
+    반환: DataFrame (index: 장비, columns: 구간 시작 시각)
+    """
+    edges = pd.date_range(start, end, freq=f"{bucket_min}min")
+    if len(edges) < 2 or edges[-1] < end:
+        edges = edges.append(pd.DatetimeIndex([edges[-1] + pd.Timedelta(minutes=bucket_min)]))
+    prod = df[df['Type'] == 'Production']
+    s = prod['Start_Time'].to_numpy()[:, None]
+    e = prod['End_Time'].to_numpy()[:, None]
+    lo = edges[:-1].to_numpy()[None, :]
+    hi = edges[1:].to_numpy()[None, :]
+    # 작업 x 구간 겹치는 시간 (분)
+    overlap = (np.minimum(e, hi) - np.maximum(s, lo)) / np.timedelta64(1, 'm')
+    overlap = np.clip(overlap, 0, None)
+    util = pd.DataFrame(overlap, index=prod['Unit'].to_numpy(), columns=edges[:-1]).groupby(level=0, sort=False).sum()
+    return util / bucket_min
+
+def detail_gantt(df):
+    """
+    상세 보기: 작업 막대를 제품별 WebGL 선분(Scattergl)으로 그림
+    (px.timeline은 막대마다 SVG 요소를 만들어 수천 건 이상에서 브라우저가 멈춤)
+    """
+    n_units = df['Unit'].nunique()
+    width = max(2, min(20, 400 // max(n_units, 1)))
+    fig = go.Figure()
+    for product, part in df.groupby('Product', sort=False):
+        n = len(part)
+        x = np.empty(3 * n, dtype=object)
+        x[0::3] = part['Start_Time'].to_numpy()
+        x[1::3] = part['End_Time'].to_numpy()
+        x[2::3] = None
+        y = np.empty(3 * n, dtype=object)
+        y[0::3] = part['Unit'].to_numpy()
+        y[1::3] = y[0::3]
+        y[2::3] = None
+        hover = (part['Unit'] + " | " + part['Product'] + " (" + part['Operation'] + ")"
+                 + "<br>Qty: " + part['Quantity'].round(1).astype(str)
+                 + " / " + part['Time_Spent_Min'].round(1).astype(str) + " min").to_numpy()
+        text = np.empty(3 * n, dtype=object)
+        text[0::3] = hover
+        text[1::3] = hover
+        text[2::3] = None
+        fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name=product, line=dict(width=width),
+                                   hovertext=text, hoverinfo='text', connectgaps=False))
+    fig.update_yaxes(autorange="reversed", type='category')  # 유닛 순서 유지
+    fig.update_layout(height=min(2000, max(400, 22 * n_units)), title="Equipment Schedule (Detail)")
+    return fig
 
 st.title("🏭 Production Allocation & Scheduling Dashboard")
 st.markdown("""
@@ -30,6 +99,8 @@ with st.sidebar:
     
     if use_db_data:
         st.warning("Make sure your SQL queries in `database/manager.py` are correct!")
+        if st.button("🔄 Reload DB Data"):
+            load_db_inputs.clear()
     
     st.header("📋 Input Preview")
     if not use_db_data:
@@ -50,13 +121,10 @@ with st.sidebar:
         active_eqp_wip = data_config.EQP_WIP
         active_tools = data_config.TOOLS
     else:
-        # DB에서 데이터 가져오기 시도
-        from database.manager import OracleManager
-        # 현재 선택된 모드 혹은 config의 모드 사용
-        mgr = OracleManager()
-        d, e, p, w, ew, t = mgr.fetch_inputs()
+        # DB에서 데이터 가져오기 시도 (TTL 동안은 캐시된 입력 사용)
+        d, e, p, w, ew, t = load_db_inputs()
         if d:
-            st.success("Successfully loaded data from Oracle!")
+            st.success(f"Successfully loaded data from Oracle! (cached up to {dash_conf['input_cache_ttl_sec']}s)")
             st.subheader("Demands (Oracle)")
             st.json(d)
             st.subheader("WIP (Oracle)")
@@ -64,84 +132,148 @@ with st.sidebar:
             active_demand, active_eqp, active_proc, active_wip, active_eqp_wip, active_tools = d, e, p, w, ew, t
             active_avail = data_config.AVAILABLE_TIME
         else:
+            # 실패 결과는 캐시하지 않음 (다음 실행 시 재조회)
+            load_db_inputs.clear()
             st.error("Failed to load Oracle data. Using sample data instead.")
             active_demand, active_eqp, active_proc = data_config.DEMAND, data_config.EQUIPMENT_MODELS, data_config.PROCESS_CONFIG
             active_wip, active_eqp_wip, active_tools = data_config.WIP, data_config.EQP_WIP, data_config.TOOLS
             active_avail = data_config.AVAILABLE_TIME
 
-# 2. 최적화 실행
+    st.header("⚙️ Engine")
+    # Full MILP: 확정 계획용 정밀 풀이 (기본) / Quick: LP 완화 + 반올림 근사 (What-if 용, 500대 기준 풀이 1~2초)
+    engine = st.radio("Optimization Engine", ["Full MILP", "Quick (Heuristic)"], index=0)
+
+# 2. 최적화 실행 (결과는 session_state에 보관하여 이후 위젯 조작에도 유지)
 if st.button("🚀 Run Optimizer"):
+    solve_stats = {}
+    backend = 'heuristic' if engine.startswith("Quick") else 'pulp'
     with st.spinner("Calculating optimal schedule..."):
-        df_results, bottleneck_time, df_unmet = solve_production_allocation(
-            active_demand, active_eqp, active_proc, active_avail, 
-            wip=active_wip, eqp_wip=active_eqp_wip, tools=active_tools
+        # 같은 입력으로 다시 실행하면 저장된 결과 재사용 (동시 클릭 시 한 번만 풀이)
+        df_results, bottleneck_time, df_unmet = cached_solve(
+            demands=active_demand, eqp_models=active_eqp, proc_config=active_proc, avail_time=active_avail,
+            wip=active_wip, eqp_wip=active_eqp_wip, tools=active_tools,
+            stats=solve_stats, backend=backend, solver_options=solver_options
         )
+    st.session_state['result'] = {
+        'df_results': df_results, 'bottleneck_time': bottleneck_time, 'df_unmet': df_unmet,
+        'stats': solve_stats, 'backend': backend, 'avail_time': active_avail, 'solved_at': datetime.now(),
+    }
+
+result = st.session_state.get('result')
+if result is None:
+    st.info("위의 버튼을 눌러 최적화를 시작하세요.")
+elif result['df_results'] is None:
+    st.error("Optimization Failed. Please check the constraints.")
+else:
+    df_results, bottleneck_time, df_unmet = result['df_results'], result['bottleneck_time'], result['df_unmet']
+    solve_stats, backend = result['stats'], result['backend']
+    cache_state = solve_stats.get('cache', {}).get('state')
+    st.success("Optimization Successfully Completed!" + (" (cached result)" if cache_state in ('hit', 'shared') else ""))
+    st.caption(f"Solved at {result['solved_at']:%Y-%m-%d %H:%M:%S}")
+    
+    # 메트릭 표시
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Bottleneck Workload", f"{bottleneck_time:.1f} min")
+    col2.metric("24h Utilization", f"{(bottleneck_time/result['avail_time'])*100:.1f}%")
+    col3.metric("Total Tasks", len(df_results))
+    gap = solve_stats.get('solver', {}).get('gap')
+    col4.metric("Gap vs Bound", f"{gap * 100:.1f}%" if gap is not None else "-")
+    if backend == 'heuristic':
+        st.caption("Quick engine result (LP relaxation + rounding). Run the Full MILP for the committed plan.")
+    seq_info = solve_stats.get('sequencing', {})
+    if seq_info.get('overrun_units'):
+        st.warning(f"{seq_info['overrun_units']} units exceed the available time once setups are included "
+                   f"(up to {seq_info['max_overrun_min']:.0f} min). Their last tasks run past the planning window.")
     
-    if df_results is not None:
-        st.success("Optimization Successfully Completed!")
+    # 3. 간트 차트 (Gantt Chart) - 확대 수준에 따라 요약/상세 전환
+    st.header("📅 Production Timeline (Gantt Chart)")
+    
+    if df_results.empty:
+        st.info("No tasks scheduled.")
+    else:
+        plan_start = df_results['Start_Time'].min().to_pydatetime()
+        plan_end = df_results['End_Time'].max().to_pydatetime()
+        all_units = list(dict.fromkeys(df_results['Unit']))
         
-        # 메트릭 표시
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Bottleneck Workload", f"{bottleneck_time:.1f} min")
-        col2.metric("24h Utilization", f"{(bottleneck_time/data_config.AVAILABLE_TIME)*100:.1f}%")
-        col3.metric("Total Tasks", len(df_results))
+        c1, c2, c3 = st.columns([3, 3, 1])
+        if plan_end > plan_start:
+            window = c1.slider("Time Window", min_value=plan_start, max_value=plan_end,
+                               value=(plan_start, plan_end), step=timedelta(minutes=10), format="MM-DD HH:mm")
+        else:
+            window = (plan_start, plan_end)
+        sel_units = c2.multiselect("Units (empty = all)", all_units)
+        view = c3.radio("View", ["Auto", "Summary", "Detail"], index=0)
         
-        # 3. 간트 차트 (Gantt Chart)
-        st.header("📅 Production Timeline (Gantt Chart)")
+        lo, hi = pd.Timestamp(window[0]), pd.Timestamp(window[1])
+        df_view = df_results[(df_results['End_Time'] > lo) & (df_results['Start_Time'] < hi)]
+        if sel_units:
+            df_view = df_view[df_view['Unit'].isin(sel_units)]
+        max_rows = dash_conf['gantt_detail_max_rows']
+        # Auto: 선택 구간/장비의 막대 수가 한도 이하일 때만 상세 보기
+        if view == "Auto":
+            view = "Detail" if len(df_view) <= max_rows else "Summary"
         
-        # Plotly용 데이터 정리
-        df_gantt = df_results.copy()
-        df_gantt['Label'] = df_gantt['Product'] + " (" + df_gantt['Operation'] + ")"
+        if df_view.empty:
+            st.info("No tasks in the selected window.")
+        elif view == "Summary":
+            bucket_min = dash_conf['gantt_bucket_min']
+            util = unit_utilization(df_view, lo, hi, bucket_min)
+            fig = go.Figure(go.Heatmap(
+                z=util.to_numpy(), x=util.columns, y=util.index, zmin=0, zmax=1, colorscale='Blues',
+                colorbar=dict(title="Utilization"),
+                hovertemplate="%{y}<br>%{x}<br>Utilization: %{z:.0%}<extra></extra>"
+            ))
+            fig.update_yaxes(autorange="reversed", type='category')
+            fig.update_layout(height=min(2000, max(400, 12 * len(util))),
+                              title=f"Unit Utilization per {bucket_min} min ({len(df_view):,} tasks)")
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"Narrow the time window or select units (≤ {max_rows:,} tasks) to see individual tasks.")
+        else:
+            if len(df_view) > max_rows:
+                st.warning(f"Showing the first {max_rows:,} of {len(df_view):,} tasks. Narrow the window or unit selection.")
+                df_view = df_view.head(max_rows)
+            fig = detail_gantt(df_view)
+            fig.update_xaxes(range=[lo, hi])
+            st.plotly_chart(fig, use_container_width=True)
+    
+    # 4. 미충족 수요 (Unmet Demand)
+    if not df_unmet.empty:
+        st.warning("⚠️ Unmet Demand Detected")
+        st.table(df_unmet)
+    else:
+        st.info("✅ All demands are fully met.")
         
-        fig = px.timeline(
-            df_gantt, 
-            x_start="Start_Time", 
-            x_end="End_Time", 
-            y="Unit", 
-            color="Product",
-            hover_data=["Operation", "Quantity", "Time_Spent_Min"],
-            text="Label",
-            title="Equipment Schedule Gantt Chart (Unit: Minutes)"
-        )
-        fig.update_yaxes(autorange="reversed") # 유닛 순서 유지
-        fig.update_layout(showlegend=True)
-        st.plotly_chart(fig, use_container_width=True)
+    # 5. 상세 데이터 테이블
+    with st.expander("🔍 View Raw Allocation Data"):
+        st.dataframe(df_results, use_container_width=True)
         
-        # 4. 미충족 수요 (Unmet Demand)
-        if not df_unmet.empty:
-            st.warning("⚠️ Unmet Demand Detected")
-            st.table(df_unmet)
-        else:
-            st.info("✅ All demands are fully met.")
-            
-        # 5. 상세 데이터 테이블
-        with st.expander("🔍 View Raw Allocation Data"):
-            st.dataframe(df_results, use_container_width=True)
-            
-        # 6. 유닛별 요약
-        st.header("📊 Unit Workload Summary")
-        unit_summary = df_results.groupby('Unit')['Time_Spent_Min'].sum().reset_index()
-        fig_bar = px.bar(unit_summary, x='Unit', y='Time_Spent_Min', title="Workload per Unit (Minutes)")
-        st.plotly_chart(fig_bar, use_container_width=True)
-
-        # 7. Oracle DB 적재 섹션
-        st.divider()
-        st.header("🗄️ Save Results to Oracle DB")
-        with st.expander("Oracle Connection Settings"):
-            db_user = st.text_input("User", value=db_defaults['user'])
-            db_pwd = st.text_input("Password", type="password", value=db_defaults['password'])
-            db_dsn = st.text_input("DSN", value=db_defaults['dsn'])
+    # 6. 유닛별 요약
+    st.header("📊 Unit Workload Summary")
+    unit_summary = df_results.groupby('Unit')['Time_Spent_Min'].sum().reset_index()
+    fig_bar = px.bar(unit_summary, x='Unit', y='Time_Spent_Min', title="Workload per Unit (Minutes)")
+    st.plotly_chart(fig_bar, use_container_width=True)
 
-        if st.button("💾 Upload to Oracle"):
-            from database.manager import OracleManager
-            mgr = OracleManager(db_user, db_pwd, db_dsn)
-            # Production 타입만 적재 (Changeover 제외)
-            prod_only_df = df_results[df_results['Type'] == 'Production']
-            mgr.upload_results(prod_only_df)
-            st.success(f"Successfully uploaded {len(prod_only_df)} production records.")
+    # 7. Oracle DB 적재 섹션
+    st.divider()
+    st.header("🗄️ Save Results to Oracle DB")
+    with st.expander("Oracle Connection Settings"):
+        db_user = st.text_input("User", value=db_defaults['user'])
+        db_pwd = st.text_input("Password", type="password", value=db_defaults['password'])
+        db_dsn = st.text_input("DSN", value=db_defaults['dsn'])
 
-    else:
-        st.error("Optimization Failed. Please check the constraints.")
-
-else:
-    st.info("위의 버튼을 눌러 최적화를 시작하세요.")
+    # Quick 엔진 결과는 What-if 확인용이므로 적재하지 않음 (Full MILP로 다시 풀어야 적재 가능)
+    if backend == 'heuristic':
+        st.info("Quick engine results are for what-if analysis only. Run the Full MILP to upload a plan.")
+    if st.button("💾 Upload to Oracle", disabled=backend == 'heuristic'):
+        from database.manager import OracleManager
+        mgr = OracleManager(db_user, db_pwd, db_dsn)
+        # Production 타입만 적재 (Changeover 제외)
+        prod_only_df = df_results[df_results['Type'] == 'Production']
+        upload_stats = mgr.upload_results(prod_only_df)
+        if upload_stats is None:
+            st.info("Upload skipped (local test mode or empty plan).")
+        elif 'error' in upload_stats:
+            st.error(f"Upload failed: {upload_stats['error']}")
+        else:
+            st.success(f"Successfully uploaded {len(prod_only_df)} production records "
+                       f"(RULE_TIMEKEY {upload_stats['rule_timekey']}).")
@@ -0,0 +1,112 @@
+import math
+import random
+
+def generate_instance(n_products=10, n_operations=3, n_models=4, n_units=20,
+                      models_per_oper=2, tool_tightness=0.8, utilization=0.7,
+                      eqp_wip_ratio=0.3, avail_time=1440, seed=0):
+    """
+    config/data_config.py와 동일한 dict 구조의 합성 문제 인스턴스 생성 (seed 고정 시 재현 가능)
+
+    - n_products / n_operations / n_models / n_units: 문제 크기
+    - models_per_oper: 공정별 가공 가능한 모델 수 (라인 구성)
+    - tool_tightness: 필요 툴-시간 / 가용 툴-시간 비율 (1.0에 가까울수록 툴 제약이 빡빡함)
+    - utilization: 전체 수요가 요구하는 장비 시간 / 전체 장비 가용 시간 목표치
+    - eqp_wip_ratio: 현재 작업 중인 장비 비율 (EQP_WIP)
+    반환: DEMAND, OPERATIONS, EQUIPMENT_MODELS, PROCESS_CONFIG, AVAILABLE_TIME,
+          WIP, EQP_WIP, TOOLS, CHANGEOVER_CONFIG 키를 가진 dict
+    """
+    rng = random.Random(seed)
+    products = [f"Product_{i:04d}" for i in range(n_products)]
+    operations = [f"OP{(i + 1) * 10}" for i in range(n_operations)]
+    models = [f"Model_{i:03d}" for i in range(n_models)]
+
+    # 장비를 모델에 배분 (모든 모델은 최소 1대)
+    equipment_models = {m: [] for m in models}
+    for i in range(n_units):
+        m = models[i] if i < n_models else rng.choice(models)
+        equipment_models[m].append(f"Unit_{i:05d}")
+
+    # 공정별 가공 가능 모델 (모든 모델을 공정에 순환 배정 후, 공정별 최소 models_per_oper 개가 되도록 추가)
+    oper_models = {o: [] for o in operations}
+    for i, m in enumerate(models):
+        oper_models[operations[i % n_operations]].append(m)
+    for o in operations:
+        while len(oper_models[o]) < min(models_per_oper, n_models):
+            m = rng.choice(models)
+            if m not in oper_models[o]:
+                oper_models[o].append(m)
+
+    # 사이클타임 (분/개): (제품, 공정) 기준값 x 모델별 성능 계수 - 같은 모델의 장비는 동일
+    model_speed = {m: rng.uniform(0.8, 1.2) for m in models}
+    process_config = {}
+    for p in products:
+        for o in operations:
+            base = rng.uniform(0.5, 3.0)
+            for m in oper_models[o]:
+                process_config[(p, o, m)] = round(base * model_speed[m], 3)
+
+    # 수요: 전체 장비 시간의 utilization 만큼을 요구하도록 스케일 조정
+    weights = {p: rng.uniform(0.5, 1.5) for p in products}
+    minutes_per_unit = {
+        p: sum(min(process_config[(p, o, m)] for m in oper_models[o]) for o in operations)
+        for p in products
+    }
+    capacity = n_units * avail_time
+    scale = utilization * capacity / max(1e-9, sum(weights[p] * minutes_per_unit[p] for p in products))
+    demand = {p: max(1, int(weights[p] * scale)) for p in products}
+
+    # 재공: 첫 공정은 수요 대비 여유 있게, 중간 공정은 소량
+    wip = {}
+    for p in products:
+        for j, o in enumerate(operations):
+            if j == 0:
+                wip[(p, o)] = int(demand[p] * rng.uniform(1.0, 1.3))
+            else:
+                wip[(p, o)] = int(demand[p] * rng.uniform(0.0, 0.1))
+
+    # 툴: 필요 툴-시간 / (tightness * 가용 시간) 만큼 보유
+    tools = {}
+    for p in products:
+        for o in operations:
+            needed = demand[p] * min(process_config[(p, o, m)] for m in oper_models[o])
+            tools[(p, o)] = max(1, math.ceil(needed / (tool_tightness * avail_time)))
+
+    # 장비별 현재 작업 (가공 가능한 (제품, 공정) 중 하나)
+    unit_model = {u: m for m, u_list in equipment_models.items() for u in u_list}
+    model_tasks = {}
+    for (p, o, m) in process_config:
+        model_tasks.setdefault(m, []).append((p, o))
+    eqp_wip = {}
+    for u, m in unit_model.items():
+        if m in model_tasks and rng.random() < eqp_wip_ratio:
+            p, o = rng.choice(model_tasks[m])
+            eqp_wip[u] = {'Product': p, 'Operation': o, 'End_Time_Offset': rng.randint(0, 240)}
+
+    # 전환 시간 (일부 제품 쌍은 예외 전환 시간)
+    exceptions = {}
+    for _ in range(min(len(products) * 2, 200)):
+        p_old, p_new = rng.sample(products, 2) if len(products) > 1 else (products[0], products[0])
+        exceptions[(p_old, p_new, rng.choice(operations))] = rng.choice([10, 15, 60])
+    changeover_config = {'PRODUCT_SWITCH': 30, 'OPER_SWITCH': 20, 'EXCEPTIONS': exceptions}
+
+    return {
+        'DEMAND': demand,
+        'OPERATIONS': operations,
+        'EQUIPMENT_MODELS': equipment_models,
+        'PROCESS_CONFIG': process_config,
+        'AVAILABLE_TIME': avail_time,
+        'WIP': wip,
+        'EQP_WIP': eqp_wip,
+        'TOOLS': tools,
+        'CHANGEOVER_CONFIG': changeover_config,
+    }
+
+def ladder_params(n_units):
+    """장비 대수 기준 크기 사다리의 인스턴스 파라미터 (제품/모델 수를 함께 증가)"""
+    return {
+        'n_units': n_units,
+        'n_products': max(2, n_units // 5),
+        'n_operations': 3 if n_units < 100 else 4,
+        'n_models': max(2, n_units // 10),
+        'models_per_oper': max(2, n_units // 50),
+    }
@@ -0,0 +1,172 @@
+"""
+solve_production_allocation 규모별 성능 벤치마크
+
+사용 예:
+    python -m benchmark.run_benchmark --sizes 10 50 100 --backend pulp --time-limit 60 --output bench.json
+    python -m benchmark.run_benchmark --compare bench_old.json bench_new.json
+
+각 크기는 새 프로세스에서 실행하여 최대 메모리(peak RSS)를 독립적으로 측정
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark.instance_generator import generate_instance, ladder_params
+from core.metrics import peak_rss_mb
+from core.process_runner import run_in_process
+
+DEFAULT_SIZES = [10, 50, 100, 250, 500, 1000]
+
+def run_case(n_units, seed, solve_settings, instance_overrides=None):
+    """단일 크기 벤치마크 (별도 프로세스에서 실행)"""
+    from core.optimizer import solve_production_allocation
+
+    params = ladder_params(n_units)
+    params.update(instance_overrides or {})
+    t0 = perf_counter()
+    inst = generate_instance(seed=seed, **params)
+    gen_sec = perf_counter() - t0
+
+    stats = {}
+    t0 = perf_counter()
+    df_res, b_time, df_unmet = solve_production_allocation(
+        demands=inst['DEMAND'],
+        eqp_models=inst['EQUIPMENT_MODELS'],
+        proc_config=inst['PROCESS_CONFIG'],
+        avail_time=inst['AVAILABLE_TIME'],
+        opers_list=inst['OPERATIONS'],
+        wip=inst['WIP'],
+        eqp_wip=inst['EQP_WIP'],
+        tools=inst['TOOLS'],
+        changeover_config=inst['CHANGEOVER_CONFIG'],
+        stats=stats,
+        **solve_settings
+    )
+    total_sec = perf_counter() - t0
+
+    timings = stats.get('timings', {})
+    solver = stats.get('solver', {})
+    peak_rss, solver_rss = peak_rss_mb()
+    return {
+        'n_units': n_units,
+        'params': params,
+        'seed': seed,
+        'n_combinations': stats.get('n_combinations'),
+        'model': stats.get('model'),
+        'generate_sec': gen_sec,
+        'build_sec': sum(v for k, v in timings.items() if k in ('index', 'variables', 'constraints')),
+        'solve_sec': timings.get('solve'),
+        'postprocess_sec': timings.get('results'),
+        'total_sec': total_sec,
+        'peak_rss_mb': peak_rss,
+        'solver_peak_rss_mb': solver_rss,
+        'status': solver.get('status'),
+        'objective': solver.get('objective'),
+        'gap': solver.get('gap'),
+        'bottleneck': float(b_time),
+        'unmet_qty': float(df_unmet['Unmet_Qty'].sum()) if df_unmet is not None and not df_unmet.empty else 0.0,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def run_ladder(sizes, seed=0, solve_settings=None, timeout=None, instance_overrides=None):
+    results = []
+    for n_units in sizes:
+        print(f"[Bench] n_units={n_units} ...", flush=True)
+        try:
+            row = run_in_process(run_case, (n_units, seed, solve_settings or {}, instance_overrides), timeout=timeout)
+        except Exception as e:
+            row = {'n_units': n_units, 'status': 'ERROR', 'error': str(e)}
+        results.append(row)
+        if row.get('status') != 'ERROR':
+            print(f"[Bench]   combos={row['n_combinations']} build={row['build_sec']:.2f}s "
+                  f"solve={row['solve_sec'] or 0:.2f}s post={row['postprocess_sec'] or 0:.2f}s "
+                  f"rss={row['peak_rss_mb'] or 0:.0f}MB status={row['status']} obj={row['objective']}", flush=True)
+        else:
+            print(f"[Bench]   failed: {row['error']}", flush=True)
+    return results
+
+def compare(old_path, new_path):
+    """두 벤치마크 JSON의 크기별 소요 시간/메모리/목적값 비교 출력"""
+    with open(old_path, encoding='utf-8') as f:
+        old = {r['n_units']: r for r in json.load(f)['results']}
+    with open(new_path, encoding='utf-8') as f:
+        new = {r['n_units']: r for r in json.load(f)['results']}
+    keys = ['build_sec', 'solve_sec', 'postprocess_sec', 'peak_rss_mb', 'objective']
+    print(f"{'n_units':>8} " + " ".join(f"{k:>24}" for k in keys))
+    for n in sorted(set(old) & set(new)):
+        cells = []
+        for k in keys:
+            a, b = old[n].get(k), new[n].get(k)
+            if a is None or b is None:
+                cells.append(f"{'n/a':>24}")
+            else:
+                ratio = f"x{b / a:.2f}" if a else ""
+                cells.append(f"{a:>9.3g} -> {b:<9.3g}{ratio:>4}")
+        print(f"{n:>8} " + " ".join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description="Production allocation optimizer benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="unit counts of the size ladder")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', default='pulp', choices=['pulp', 'highs', 'heuristic'])
+    parser.add_argument('--time-limit', type=float, default=None, help="solver time limit per case (sec)")
+    parser.add_argument('--mip-gap', type=float, default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--decompose', action='store_true')
+    parser.add_argument('--sequencing', default='heuristic', choices=['heuristic', 'sorted'])
+    parser.add_argument('--no-presolve', action='store_true', help="disable presolve / big-M tightening")
+    parser.add_argument('--aggregate-units', action='store_true', help="pool interchangeable idle units")
+    parser.add_argument('--setup-capacity', action='store_true', help="reserve setup time in the unit capacity rows")
+    parser.add_argument('--tool-tightness', type=float, default=None)
+    parser.add_argument('--timeout', type=float, default=None, help="wall-clock limit per case (sec)")
+    parser.add_argument('--output', default=None, help="JSON output path")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two benchmark JSON files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    solve_settings = {
+        'backend': args.backend,
+        'solver_options': {'time_limit_sec': args.time_limit, 'mip_gap': args.mip_gap, 'threads': args.threads},
+        'decompose': args.decompose,
+        'sequencing': args.sequencing,
+        'presolve': not args.no_presolve,
+        'aggregate_units': args.aggregate_units,
+        'setup_capacity': args.setup_capacity,
+    }
+    overrides = {}
+    if args.tool_tightness is not None:
+        overrides['tool_tightness'] = args.tool_tightness
+
+    results = run_ladder(args.sizes, args.seed, solve_settings, args.timeout, overrides)
+    report = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'settings': solve_settings,
+        'instance_overrides': overrides,
+        'results': results,
+    }
+    output = args.output or f"bench_{report['commit'] or 'local'}_{datetime.now():%Y%m%d%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"[Bench] written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+import os
+
+# 저장소 루트 (config.yaml의 상대 경로 기준)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def resolve_path(path):
+    """
+    config.yaml의 상대 경로(캐시/작업 이력/가짜 DB 파일)를 저장소 루트 기준 절대 경로로 변환
+    API / 스케줄러 / 대시보드 / 작업 워커 프로세스가 실행 위치와 무관하게 같은 파일을 공유하도록 함
+    """
+    if not path:
+        return path
+    return path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
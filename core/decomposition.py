@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter
+import pandas as pd
+from core.optimizer import solve_production_allocation
+
+# 하위 문제 결과 병합 시 솔버 상태 우선순위 (가장 나쁜 상태를 대표값으로 사용)
+STATUS_RANK = {'OPTIMAL': 0, 'FEASIBLE': 1}
+
+def find_components(demands, eqp_models, proc_config):
+    """
+    제품-모델(-장비) 연결 그래프의 연결 요소 탐색 (Union-Find)
+    - PROCESS_CONFIG의 (제품, 공정, 모델) 항목은 제품과 모델을 연결
+    - 여러 모델에 속한 장비는 해당 모델들을 연결
+    반환: [(제품 set, 모델 set)] - 장비를 공유하지 않는 독립 하위 문제 목록
+    """
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[ra] = rb
+
+    for m, u_list in eqp_models.items():
+        find(('M', m))
+        for u in u_list:
+            union(('U', u), ('M', m))
+    for p in demands:
+        find(('P', p))
+    for (p, o, m) in proc_config:
+        if m in eqp_models:
+            union(('P', p), ('M', m))
+
+    groups = {}
+    for node in list(parent):
+        kind, name = node
+        if kind == 'U':
+            continue
+        prods, models = groups.setdefault(find(node), (set(), set()))
+        (prods if kind == 'P' else models).add(name)
+    # 제품이 없는 모델 묶음(할당 가능한 작업 없음)은 제외
+    return [(prods, models) for prods, models in groups.values() if prods]
+
+def _sub_instance(prods, models, demands, eqp_models, proc_config, wip, eqp_wip, tools):
+    """연결 요소에 해당하는 입력만 추출"""
+    sub_models = {m: eqp_models[m] for m in eqp_models if m in models}
+    sub_units = {u for u_list in sub_models.values() for u in u_list}
+    return {
+        'demands': {p: d for p, d in demands.items() if p in prods},
+        'eqp_models': sub_models,
+        'proc_config': {k: t for k, t in proc_config.items() if k[0] in prods and k[2] in models},
+        'wip': {k: v for k, v in wip.items() if k[0] in prods},
+        'eqp_wip': {u: v for u, v in eqp_wip.items() if u in sub_units},
+        'tools': {k: v for k, v in tools.items() if k[0] in prods},
+    }
+
+def solve_decomposed(demands, eqp_models, proc_config, avail_time, opers_list, wip, eqp_wip, tools,
+                     stats=None, max_workers=None, plan_start=None, **solve_kwargs):
+    """
+    독립 연결 요소별로 MILP를 나누어 병렬로 풀고 결과를 병합
+    연결 요소 간에는 공유 장비/툴/공정 흐름이 없으므로 목적값은 단일 모델과 동일
+    (CBC는 별도 프로세스로 실행되므로 스레드 풀로도 병렬 풀이가 가능)
+    """
+    t0 = perf_counter()
+    # 하위 문제마다 현재 시각을 따로 잡지 않도록 타임라인 기준 시각을 한 번만 정함
+    plan_start = plan_start or datetime.now()
+    components = find_components(demands, eqp_models, proc_config)
+    subs = [_sub_instance(prods, models, demands, eqp_models, proc_config, wip, eqp_wip, tools)
+            for prods, models in components]
+    subs = [sub for sub in subs if sub['demands']]
+    print(f"[Debug] Decomposition: {len(subs)} independent components")
+
+    def solve_one(sub):
+        sub_stats = {}
+        result = solve_production_allocation(
+            avail_time=avail_time, opers_list=opers_list, stats=sub_stats, plan_start=plan_start,
+            **sub, **solve_kwargs
+        )
+        return result, sub_stats
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        outputs = list(pool.map(solve_one, subs))
+
+    res_frames, unmet_frames = [], []
+    max_workload = 0
+    failed = False
+    for (df_res, b_time, df_unmet), _ in outputs:
+        if df_res is None:
+            failed = True
+            continue
+        res_frames.append(df_res)
+        unmet_frames.append(df_unmet)
+        max_workload = max(max_workload, b_time)
+
+    if stats is not None:
+        stats.update(_merge_stats([s for _, s in outputs], perf_counter() - t0))
+
+    # 하나라도 해가 없으면 전체 계획도 실패로 처리 (단일 모델과 동일한 의미)
+    if failed:
+        return None, 0, pd.DataFrame()
+    df_res = pd.concat([df for df in res_frames if not df.empty], ignore_index=True) \
+        if any(not df.empty for df in res_frames) else pd.DataFrame()
+    df_unmet = pd.concat([df for df in unmet_frames if not df.empty], ignore_index=True) \
+        if any(not df.empty for df in unmet_frames) else pd.DataFrame()
+    return df_res, max_workload, df_unmet
+
+def _merge_stats(sub_stats, elapsed):
+    """
+    하위 문제 stats 병합 (단계별 시간/모델 크기/presolve·대칭 축소량/전환 시간·초과 장비 수는 합계,
+    상태는 가장 나쁜 값, 갭·최대 초과 시간은 최대값)
+    """
+    timings = {}
+    for s in sub_stats:
+        for k, v in s.get('timings', {}).items():
+            timings[k] = timings.get(k, 0) + v
+    solvers = [s.get('solver', {}) for s in sub_stats]
+    statuses = [sv.get('status') for sv in solvers if sv.get('status')]
+    gaps = [sv['gap'] for sv in solvers if sv.get('gap') is not None]
+    objectives = [sv.get('objective') for sv in solvers]
+    merged_solver = {
+        'backend': solvers[0].get('backend') if solvers else None,
+        'status': max(statuses, key=lambda st: STATUS_RANK.get(st, 2)) if statuses else None,
+        'gap': max(gaps) if gaps else None,
+        'objective': sum(objectives) if objectives and None not in objectives else None,
+    }
+    model = {}
+    for s in sub_stats:
+        for k, v in s.get('model', {}).items():
+            model[k] = model.get(k, 0) + v
+    reductions = {'presolve': {}, 'symmetry': {}}
+    for s in sub_stats:
+        for name, merged in reductions.items():
+            for k, v in s.get(name, {}).items():
+                if v is not None:
+                    merged[k] = merged.get(k, 0) + v
+    sequencing = {}
+    for s in sub_stats:
+        for k, v in s.get('sequencing', {}).items():
+            if k == 'method':
+                sequencing[k] = v
+            elif k == 'max_overrun_min':
+                sequencing[k] = max(sequencing.get(k, 0.0), v)
+            else:
+                sequencing[k] = sequencing.get(k, 0) + v
+    return {
+        'timings': timings,
+        'n_combinations': sum(s.get('n_combinations', 0) for s in sub_stats),
+        'solver': merged_solver,
+        'model': model,
+        'presolve': reductions['presolve'],
+        'symmetry': reductions['symmetry'],
+        'sequencing': sequencing,
+        'components': len(sub_stats),
+        'wall_time': elapsed,
+    }
@@ -0,0 +1,197 @@
+"""
+빠른 근사 엔진 (LP 완화 + 반올림 + 탐욕 보정)
+
+대시보드 What-if 용도로 MILP 대신 사용 (backend='heuristic')
+1. Assign을 [0, 1] 연속 변수로 완화한 LP를 HiGHS로 풀이 (Qty/Unmet은 원 모델과 동일)
+2. 반올림: 생산량이 있는 조합은 Assign = 1
+3. 탐욕 보정: (제품, 공정)별로 할당 수를 줄이도록 작은 할당을 같은 작업을 하는 다른 장비의 여유 시간으로 이동
+   (툴-시간 / 장비 가용 시간 한도 내에서만 이동, (제품, 공정)별 총량은 그대로이므로 흐름/수요 제약 유지)
+4. 수치 오차로 인한 흐름/툴/장비 시간 위반은 해당 조합 수량을 비율로 줄여 보정
+LP 목적값은 원 MILP의 하한이므로 (근사해 목적값 - LP 목적값) / 근사해 목적값을 갭으로 보고
+(시간 제한으로 LP가 최적까지 풀리지 않은 경우 하한/갭은 None)
+"""
+import numpy as np
+from time import perf_counter
+from scipy.optimize import linprog
+from core.optimizer import P_UNMET, P_QTY, BIG_M, _notify
+from core.matrix_backend import build_matrix_model
+
+# 이 값 이하의 수량은 0으로 간주 (LP 해의 수치 오차)
+QTY_EPS = 1e-6
+
+def _repair(qty, groups, cycle, combo_unit, unit_cap, tool_cap, demands, opers_list, wip):
+    """
+    수치 오차로 인한 위반을 비율 축소로 보정 (흐름 -> 툴 -> 장비 시간 순)
+    groups: {(p, o): 조합 인덱스 배열}
+    """
+    for p in demands:
+        prev_total = None
+        for i, o in enumerate(opers_list):
+            idx = groups.get((p, o))
+            if idx is None:
+                prev_total = 0.0
+                continue
+            total = qty[idx].sum()
+            limit = wip.get((p, o), 0) + (prev_total if i > 0 else 0)
+            if total > limit + QTY_EPS:
+                qty[idx] *= max(limit, 0) / total
+            prev_total = qty[idx].sum()
+
+    for po, idx in groups.items():
+        used = (qty[idx] * cycle[idx]).sum()
+        if used > tool_cap[po] + QTY_EPS:
+            qty[idx] *= tool_cap[po] / used
+
+    load = np.bincount(combo_unit, weights=qty * cycle, minlength=len(unit_cap))
+    over = load > np.maximum(unit_cap, 0) + QTY_EPS
+    if over.any():
+        ratio = np.ones_like(load)
+        ratio[over] = np.maximum(unit_cap[over], 0) / load[over]
+        qty *= ratio[combo_unit]
+
+def _consolidate(qty, groups, cycle, combo_unit, unit_cap, tool_cap, assign_cost):
+    """
+    (제품, 공정)별로 할당 비용이 큰(연속성 페널티 포함) 작은 할당부터
+    같은 작업을 이미 하는 다른 장비로 전량 이동 가능하면 이동 (일부만 가능하면 이동하지 않음)
+    반환: 제거한 할당 수
+    """
+    load = np.bincount(combo_unit, weights=qty * cycle, minlength=len(unit_cap))
+    removed = 0
+    for po, idx in groups.items():
+        active = idx[qty[idx] > QTY_EPS]
+        if len(active) < 2:
+            continue
+        tool_used = (qty[active] * cycle[active]).sum()
+        donors = sorted(active, key=lambda d: (-assign_cost[d], qty[d] * cycle[d]))
+        for d in donors:
+            if qty[d] <= QTY_EPS:
+                continue
+            receivers = [r for r in active if r != d and qty[r] > QTY_EPS]
+            receivers.sort(key=lambda r: -(unit_cap[combo_unit[r]] - load[combo_unit[r]]))
+            remaining = qty[d]
+            tool_slack = tool_cap[po] - tool_used
+            moves = []
+            for r in receivers:
+                slack = unit_cap[combo_unit[r]] - load[combo_unit[r]]
+                amount = min(remaining, max(slack, 0) / cycle[r])
+                extra = cycle[r] - cycle[d]
+                if extra > 0:
+                    amount = min(amount, max(tool_slack, 0) / extra)
+                if amount <= QTY_EPS:
+                    continue
+                moves.append((r, amount))
+                remaining -= amount
+                tool_slack -= amount * extra
+                if remaining <= QTY_EPS:
+                    break
+            if remaining > QTY_EPS:
+                continue
+            for r, amount in moves:
+                qty[r] += amount
+                load[combo_unit[r]] += amount * cycle[r]
+            load[combo_unit[d]] -= qty[d] * cycle[d]
+            tool_used = tool_cap[po] - tool_slack
+            qty[d] = 0.0
+            removed += 1
+    return removed
+
+def solve_heuristic(index, demands, opers_list, avail_time, wip, eqp_wip, tools, run):
+    """
+    LP 완화 + 반올림/탐욕 보정으로 근사해 계산
+    반환: ({(p,o,u): 수량}, {(p,o): 미충족량}) 또는 LP가 풀리지 않으면 None
+    """
+    timings = run['timings']
+    t1 = perf_counter()
+    c, _, A, b, unmet_keys = build_matrix_model(index, demands, opers_list, avail_time, wip, eqp_wip, tools)
+    combos = index['combos']
+    n = len(combos)
+    assign_cost = c[n:2 * n]
+
+    # LP 완화에서는 최적해가 항상 Assign = Qty / M 이므로 Assign 열과 연결 제약(앞 n행)을 제거하고
+    # 할당 비용을 Qty 계수(c_assign / M)로 옮긴 동일한 LP를 풀이 (행/열 수 절반 이하)
+    # presolve 시 M은 조합별 수량 상한 (작을수록 할당 비용이 LP에 더 반영되어 하한이 좋아짐)
+    qty_ub = index.get('qty_ub', {})
+    big_m = np.fromiter((qty_ub.get(k, BIG_M) for k in combos), dtype=np.float64, count=n)
+    keep = np.r_[0:n, 2 * n:c.shape[0]]
+    c_lp = np.r_[c[:n] + assign_cost / big_m, c[2 * n:]]
+    A_lp = A[n:][:, keep].tocsr()
+    b_lp = b[n:]
+    bounds = np.zeros((len(keep), 2))
+    bounds[:, 1] = np.inf
+    bounds[:n, 1] = big_m
+    t2 = perf_counter()
+    timings['constraints'] = t2 - t1
+    run['model'] = {
+        'variables': int(c_lp.shape[0]),
+        'binaries': 0,
+        'constraints': int(A_lp.shape[0]),
+        'nonzeros': int(A_lp.nnz),
+    }
+
+    options = run['options']
+    lp_options = {'disp': False}
+    if options['time_limit_sec'] is not None:
+        lp_options['time_limit'] = options['time_limit_sec']
+    _notify(run, 'phase', phase='solve')
+    res = linprog(c_lp, A_ub=A_lp, b_ub=b_lp, bounds=bounds, method='highs-ds', options=lp_options)
+    t3 = perf_counter()
+    print(f"[Debug] LP Relaxation Status: {res.message}")
+    if res.x is None:
+        timings['solve'] = t3 - t2
+        run['solver'].update({'status': 'INFEASIBLE' if res.status == 2 else 'NOT SOLVED',
+                              'gap': None, 'objective': None, 'bound': None})
+        return None
+
+    # 조합별 배열 (장비 번호, 사이클타임) 및 (제품, 공정)별 조합 인덱스
+    unit_ids = {u: i for i, u in enumerate(index['units'])}
+    combo_unit = np.fromiter((unit_ids[u] for _, _, u in combos), dtype=np.int64, count=n)
+    cycle = np.fromiter((index['cycle'][k] for k in combos), dtype=np.float64, count=n)
+    groups = {}
+    for i, (p, o, _) in enumerate(combos):
+        groups.setdefault((p, o), []).append(i)
+    groups = {po: np.array(idx, dtype=np.int64) for po, idx in groups.items()}
+    occupied = np.zeros(len(unit_ids))
+    for u, info in eqp_wip.items():
+        if u in unit_ids:
+            occupied[unit_ids[u]] = info.get('End_Time_Offset', 0)
+    unit_cap = avail_time - occupied
+    tool_cap = {po: tools.get(po, 99) * avail_time for po in groups}
+
+    qty = np.where(res.x[:n] > QTY_EPS, res.x[:n], 0.0)
+    _repair(qty, groups, cycle, combo_unit, unit_cap, tool_cap, demands, opers_list, wip)
+    n_rounded = int((qty > QTY_EPS).sum())
+    removed = _consolidate(qty, groups, cycle, combo_unit, unit_cap, tool_cap, assign_cost)
+
+    # 미충족량은 보정된 마지막 공정 생산량으로 다시 계산 (나머지 공정 Unmet은 0)
+    last_oper = opers_list[-1]
+    unmet_vals = dict.fromkeys(unmet_keys, 0.0)
+    for p, demand in demands.items():
+        idx = groups.get((p, last_oper))
+        made = qty[idx].sum() if idx is not None else 0.0
+        unmet_vals[p, last_oper] = max(0.0, demand - wip.get((p, last_oper), 0) - made)
+    timings['solve'] = perf_counter() - t2
+
+    assigned = qty > QTY_EPS
+    objective = float(P_QTY * qty.sum() + assign_cost[assigned].sum()
+                      + P_UNMET * sum(unmet_vals.values()))
+    # 시간 제한 등으로 LP가 최적까지 풀리지 않으면(status != 0) res.fun은 하한이 아니므로 갭을 보고하지 않음
+    if res.status == 0:
+        bound = float(res.fun)
+        gap = float(abs(objective - bound) / max(abs(objective), 1e-10))
+        print(f"[Debug] Heuristic: {n_rounded} rounded assignments, {removed} merged, "
+              f"objective {objective:,.0f} vs LP bound {bound:,.0f} (gap {gap:.2%})")
+    else:
+        bound = gap = None
+        print(f"[Debug] Heuristic: {n_rounded} rounded assignments, {removed} merged, "
+              f"objective {objective:,.0f} (LP not solved to optimality, no bound)")
+    _notify(run, 'incumbent', objective=objective, bound=bound, gap=gap, elapsed_sec=perf_counter() - t2)
+    run['solver'].update({
+        'status': 'FEASIBLE',
+        'gap': gap,
+        'objective': objective,
+        'bound': bound,
+        'lp_sec': t3 - t2,
+        'merged_assignments': removed,
+    })
+    qty_vals = dict(zip(combos, qty.tolist()))
+    return qty_vals, unmet_vals
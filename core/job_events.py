@@ -0,0 +1,64 @@
+"""
+작업 진행 이벤트 버스 (SSE 스트림용)
+
+- JobManager(작업 스레드)가 publish -> 구독 중인 각 SSE 연결의 asyncio 큐로 전달
+- 이벤트 종류
+  status:    PENDING / RUNNING / COMPLETED / FAILED / CANCELLED 전이
+  phase:     fetch / build / solve / results / upload 단계 시작
+  incumbent: 풀이 중 개선된 해 (목적값, 하한) - 지원 백엔드만 (CBC 로그, heuristic)
+- 최근 이벤트를 history개 보관하여 재연결 시 Last-Event-ID 이후 이벤트부터 재전송
+"""
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+
+# 구독자별 큐 크기 (느린 클라이언트는 오래된 이벤트부터 버림)
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+def _put_latest(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+class JobEventBus:
+    def __init__(self, history=1000):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = {}  # {queue: event loop}
+
+    def publish(self, job_id, event_type, **data):
+        """스레드 어디서나 호출 가능 (구독자 이벤트 루프로 전달)"""
+        with self._lock:
+            self._seq += 1
+            event = {'id': self._seq, 'job_id': job_id, 'type': event_type, 'time': datetime.now().isoformat()}
+            event.update(data)
+            self._history.append(event)
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_latest, queue, event)
+            except RuntimeError:
+                # 이벤트 루프가 이미 종료된 구독자
+                self.unsubscribe(queue)
+        return event
+
+    def subscribe(self, last_event_id=None):
+        """
+        이벤트 루프 안에서 호출
+        반환: (asyncio.Queue, last_event_id 이후의 보관 이벤트 목록)
+        """
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+            backlog = [e for e in self._history if last_event_id is not None and e['id'] > last_event_id]
+        return queue, backlog
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def progress_callback(self, job_id):
+        """optimizer/execute_optimization에 넘길 progress(kind, data) 콜백"""
+        return lambda kind, data: self.publish(job_id, kind, **data)
@@ -2,97 +2,338 @@ import uuid
 import logging
 import yaml
 import os
+import threading
+import multiprocessing as mp
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from time import perf_counter
 from apscheduler.schedulers.background import BackgroundScheduler
-from core.optimizer import solve_production_allocation
+from core.optimizer import DEFAULT_SOLVER_OPTIONS
+from core.result_cache import cached_solve
+from core.scenario import make_base_inputs, run_scenarios
+from core.process_runner import run_in_process, JobCancelled
+from core.metrics import peak_rss_mb, build_phase_timings, JobMetrics
+from core.job_store import create_job_store
+from core.job_events import JobEventBus
+from core.job_queue import JobQueue
 from database.manager import OracleManager
 import config.data_config as data_config
 
 logger = logging.getLogger(__name__)
 
+def execute_optimization(mode, solve_settings=None, warm_start=None, force_refresh=False, job_id=None,
+                         progress=None):
+    """
+    입력 조회 -> 최적화 -> 결과 적재를 수행하고 작업 결과를 dict로 반환
+    solve_settings: solve_production_allocation 옵션 (backend, solver_options, decompose, sequencing, presolve, aggregate_units,
+                    setup_capacity)
+    force_refresh: 기준 정보 스냅샷 캐시를 무시하고 다시 조회
+    job_id: 결과 적재 시 RULE_TIMEKEY와 함께 매핑 테이블에 기록할 작업 ID (적재에 실패하면 작업은 FAILED)
+    스레드/프로세스 실행 모드 공통 (반환값은 프로세스 간 전달 가능한 값만 포함)
+    metrics: 단계별 소요 시간(fetch/build/solve/results/upload), 모델 크기, 전환 시간/가용 시간 초과 장비, 최대 RSS
+    capacity_warning: 전환 시간을 포함하면 가용 시간을 넘는 장비가 있는 계획이면 True
+    progress: 진행 콜백 progress(kind, data) - 단계 시작(phase)과 풀이 중 개선 해(incumbent) 전달
+    """
+    notify = progress or (lambda kind, data: None)
+    # 지정된 모드로 매니저 초기화
+    notify('phase', {'phase': 'fetch'})
+    t0 = perf_counter()
+    mgr = OracleManager(mode=mode)
+    demands, eqp_models, proc_config, wip, eqp_wip, tools = mgr.fetch_inputs(force_refresh=force_refresh)
+    fetch_sec = perf_counter() - t0
+
+    if demands is None:
+        return {"status": "FAILED", "error": "Failed to fetch inputs",
+                "metrics": {"phases": {"fetch": fetch_sec}}}
+
+    # 동일 입력/설정이면 저장된 결과 재사용, 진행 중인 동일 풀이는 공유 (core/result_cache.py)
+    solve_stats = {}
+    df_results, b_time, df_unmet = cached_solve(
+        demands=demands,
+        eqp_models=eqp_models,
+        proc_config=proc_config,
+        avail_time=data_config.AVAILABLE_TIME,
+        wip=wip,
+        eqp_wip=eqp_wip,
+        tools=tools,
+        stats=solve_stats,
+        warm_start=warm_start,
+        progress=progress,
+        **(solve_settings or {})
+    )
+    cache_state = (solve_stats.get('cache') or {}).get('state')
+    if cache_state in ('hit', 'shared'):
+        notify('phase', {'phase': 'solve', 'cache': cache_state})
+    solver_info = solve_stats.get('solver', {})
+    # OPTIMAL: 갭 허용치 내 최적 / FEASIBLE: 제한 도달, 최선해 사용 / TIMEOUT: 제한 내 해 없음
+    outcome = {
+        "solver_status": solver_info.get('status'),
+        "mip_gap": solver_info.get('gap'),
+    }
+    # 전환 시간 포함 장비별 종료 시각이 가용 시간을 넘으면 계획에 경고 표시 (계획은 그대로 적재)
+    seq_info = solve_stats.get('sequencing') or {}
+    if 'overrun_units' in seq_info:
+        outcome["capacity_warning"] = seq_info['overrun_units'] > 0
+        if outcome["capacity_warning"]:
+            logger.warning(f"Plan ({mode}) exceeds available time with setups on {seq_info['overrun_units']} units "
+                           f"(max {seq_info['max_overrun_min']:.1f} min)")
+
+    upload_sec = None
+    upload_stats = None
+    if df_results is not None:
+        prod_only_df = df_results[df_results['Type'] == 'Production']
+        notify('phase', {'phase': 'upload'})
+        t_up = perf_counter()
+        upload_stats = mgr.upload_results(prod_only_df, job_id=job_id)
+        upload_sec = perf_counter() - t_up
+        if upload_stats and 'error' in upload_stats:
+            # 계획은 구했지만 적재되지 않았으므로 실패로 기록 (초기해로는 계속 사용)
+            outcome.update({"status": "FAILED", "error": f"Result upload failed: {upload_stats['error']}"})
+        elif upload_stats:
+            outcome["rule_timekey"] = upload_stats['rule_timekey']
+
+        outcome.setdefault("status", "COMPLETED")
+        outcome.update({
+            "result": {"bottleneck": float(b_time), "records": len(prod_only_df)},
+            "solution": {
+                (p, o, u): q for p, o, u, q in zip(
+                    prod_only_df['Product'], prod_only_df['Operation'],
+                    prod_only_df['Unit'], prod_only_df['Quantity'])
+            }
+        })
+    else:
+        outcome["status"] = "FAILED"
+        if solver_info.get('status') == 'TIMEOUT':
+            outcome["error"] = "Solver time limit reached without a feasible solution"
+        else:
+            outcome["error"] = "Optimization Infeasible"
+
+    peak_rss, solver_rss = peak_rss_mb()
+    outcome["metrics"] = {
+        "phases": build_phase_timings(fetch_sec, solve_stats.get('timings'), upload_sec),
+        "model": solve_stats.get('model', {}),
+        "n_combinations": solve_stats.get('n_combinations'),
+        "sequencing": seq_info,
+        "result_cache": solve_stats.get('cache'),
+        "fetch": mgr.fetch_stats,
+        "upload": upload_stats,
+        "peak_rss_mb": peak_rss,
+        "solver_peak_rss_mb": solver_rss,
+    }
+    logger.info(f"Job metrics ({mode}): {outcome['metrics']['phases']}")
+    return outcome
+
 class JobManager:
     def __init__(self):
         self.config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
         self.load_config()
         
         self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
-        self.jobs = {} # {job_id: {"status": ..., "result": ..., "mode": ...}}
+        # 우선순위 큐 (manual > scheduled, 대기 중 scheduled 작업 병합, 모드별 동시 실행 한도 - core/job_queue.py)
+        self.queue = JobQueue(
+            self.executor, self.max_workers,
+            max_running_per_mode=self.queue_conf.get('max_running_per_mode'),
+            reserved_manual_workers=self.queue_conf.get('reserved_manual_workers', 1),
+            max_size=self.queue_conf.get('max_queue_size')
+        )
+        self.jobs = create_job_store(self.job_store_conf) # 작업 이력 (core/job_store.py - 보관 한도/기간 적용)
+        self.events = JobEventBus() # 상태/단계/incumbent 이벤트 (GET /jobs/events SSE 스트림)
+        self.metrics = JobMetrics() # GET /metrics 누적 집계 (작업 이력 삭제와 무관하게 단조 증가)
+        self.last_solutions = {} # {mode: {(Prod, Oper, Unit): 수량}} - 다음 배치의 MIP 초기해
+        self._cancel_events = {} # {job_id: Event} - 실행 중(프로세스 모드) 작업 취소용
         
         # 스케줄러 설정
         self.scheduler = BackgroundScheduler()
         if self.sched_enabled:
-            self.scheduler.add_job(self.submit_job, 'interval', minutes=self.sched_interval, id='batch_prod')
-        self.scheduler.start()
+            self.scheduler.add_job(self.submit_scheduled, 'interval', minutes=self.sched_interval, id='batch_prod')
+        # spawn 방식 워커 프로세스가 메인 모듈(api.py)을 다시 import 할 때 스케줄러가 중복 기동되거나
+        # 실행 중인 작업이 재시작으로 중단된 것으로 기록되지 않도록 메인 프로세스에서만 수행
+        if mp.parent_process() is None:
+            self.jobs.fail_interrupted()
+            self.scheduler.start()
 
     def load_config(self):
         with open(self.config_path, 'r', encoding='utf-8') as f:
             conf = yaml.safe_load(f)
         self.max_workers = conf.get('api', {}).get('workers', 2)
         self.timeout = conf.get('optimization', {}).get('timeout_sec', 600)
+        self.backend = conf.get('optimization', {}).get('backend', 'pulp')
+        opt_conf = conf.get('optimization', {})
+        self.solver_options = {k: opt_conf.get(k) for k in DEFAULT_SOLVER_OPTIONS}
+        self.decompose = opt_conf.get('decompose', False)
+        self.solve_settings = {
+            'backend': self.backend,
+            'solver_options': self.solver_options,
+            'decompose': self.decompose,
+            'sequencing': opt_conf.get('sequencing', 'heuristic'),
+            'presolve': opt_conf.get('presolve', True),
+            'aggregate_units': opt_conf.get('aggregate_units', False),
+            'setup_capacity': opt_conf.get('setup_capacity', False),
+        }
+        self.scenario_workers = opt_conf.get('scenario_workers', 4)
         self.sched_enabled = conf.get('scheduler', {}).get('enabled', False)
         self.sched_interval = conf.get('scheduler', {}).get('interval_min', 60)
         self.system_mode = conf.get('system_mode', 'local_test')
+        self.execution_mode = conf.get('api', {}).get('execution_mode', 'thread')
+        self.job_store_conf = conf.get('api', {}).get('job_store') or {}
+        self.queue_conf = {
+            'max_queue_size': conf.get('api', {}).get('max_queue_size'),
+            'max_running_per_mode': conf.get('api', {}).get('max_running_per_mode'),
+            'reserved_manual_workers': conf.get('api', {}).get('reserved_manual_workers', 1),
+        }
 
     def generate_job_id(self):
         return str(uuid.uuid4())
 
-    def _run_task(self, job_id, mode):
+    def _add(self, job_id, job):
+        self.jobs.add(job_id, job)
+        self.metrics.observe(job_id, job)
+        self.events.publish(job_id, 'status', status=job['status'], mode=job.get('mode'), kind=job.get('kind'))
+
+    def _update(self, job_id, **fields):
+        """작업 정보 갱신 - 상태가 바뀌면 status 이벤트 발행"""
+        self.jobs.update(job_id, **fields)
+        self.metrics.observe(job_id, fields)
+        if 'status' in fields:
+            extra = {k: fields[k] for k in ('error', 'solver_status', 'mip_gap', 'capacity_warning') if k in fields}
+            self.events.publish(job_id, 'status', status=fields['status'], **extra)
+
+    def _run_task(self, job_id, mode, force_refresh=False):
+        if self.jobs.get(job_id)["status"] == "CANCELLED":
+            return
+        try:
+            self._update(job_id, status="RUNNING", start_time=datetime.now())
+
+            args = (mode, self.solve_settings, self.last_solutions.get(mode), force_refresh, job_id)
+            progress = self.events.progress_callback(job_id)
+            if self.execution_mode == 'process':
+                # 별도 프로세스에서 조회+최적화+적재 실행 (GIL 경합 없음, 취소/타임아웃 시 CBC까지 종료)
+                outcome = run_in_process(
+                    execute_optimization, args,
+                    timeout=self.timeout,
+                    cancel_event=self._cancel_events.get(job_id),
+                    progress=progress
+                )
+            else:
+                outcome = execute_optimization(*args, progress=progress)
+
+            solution = outcome.pop("solution", None)
+            if solution:
+                # 같은 모드의 다음 실행에서 초기해로 사용할 할당 결과 보관
+                self.last_solutions[mode] = solution
+            self._update(job_id, **outcome)
+
+        except JobCancelled:
+            logger.info(f"Job {job_id} cancelled")
+            self._update(job_id, status="CANCELLED")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self._update(job_id, status="FAILED", error=str(e))
+        finally:
+            self._update(job_id, end_time=datetime.now())
+            self._cancel_events.pop(job_id, None)
+
+    def _run_scenario_task(self, job_id, mode, deltas):
         try:
-            self.jobs[job_id]["status"] = "RUNNING"
-            self.jobs[job_id]["start_time"] = datetime.now()
-            
-            # 지정된 모드로 매니저 초기화
+            self._update(job_id, status="RUNNING", start_time=datetime.now())
+
+            # 입력은 한 번만 조회하고 모든 시나리오가 공유
             mgr = OracleManager(mode=mode)
             demands, eqp_models, proc_config, wip, eqp_wip, tools = mgr.fetch_inputs()
-            
+
             if demands is None:
-                self.jobs[job_id]["status"] = "FAILED"
-                self.jobs[job_id]["error"] = "Failed to fetch inputs"
+                self._update(job_id, status="FAILED", error="Failed to fetch inputs", end_time=datetime.now())
                 return
 
-            df_results, b_time, df_unmet = solve_production_allocation(
-                demands=demands,
-                eqp_models=eqp_models,
-                proc_config=proc_config,
-                avail_time=data_config.AVAILABLE_TIME,
-                wip=wip,
-                eqp_wip=eqp_wip,
-                tools=tools
+            base = make_base_inputs(demands, eqp_models, proc_config, wip, eqp_wip, tools, data_config.AVAILABLE_TIME)
+            df_cmp = run_scenarios(
+                base, deltas,
+                max_workers=self.scenario_workers,
+                solve_settings=self.solve_settings
             )
-            
-            if df_results is not None:
-                prod_only_df = df_results[df_results['Type'] == 'Production']
-                mgr.upload_results(prod_only_df)
-                
-                self.jobs[job_id].update({
-                    "status": "COMPLETED",
-                    "result": {"bottleneck": float(b_time), "records": len(prod_only_df)},
-                    "end_time": datetime.now()
-                })
-            else:
-                self.jobs[job_id]["status"] = "FAILED"
-                self.jobs[job_id]["error"] = "Optimization Infeasible"
+            # JSON 응답을 위해 NaN -> None
+            records = df_cmp.astype(object).where(df_cmp.notna(), None).to_dict('records')
+
+            self._update(job_id, status="COMPLETED", result={"scenarios": records}, end_time=datetime.now())
 
         except Exception as e:
-            logger.error(f"Job {job_id} failed: {e}")
-            self.jobs[job_id]["status"] = "FAILED"
-            self.jobs[job_id]["error"] = str(e)
+            logger.error(f"Scenario job {job_id} failed: {e}")
+            self._update(job_id, status="FAILED", error=str(e), end_time=datetime.now())
 
-    def submit_job(self, mode=None):
+    def _enqueue(self, job_id, job, func, *args, coalesce=False):
+        """작업 이력 등록 후 큐에 넣음 - 큐가 가득 차면 작업을 FAILED로 기록하고 QueueFull 전달"""
+        self._add(job_id, job)
+        try:
+            replaced = self.queue.push(job_id, job['mode'], job['priority'], func, *args, coalesce=coalesce)
+        except Exception as e:
+            self._update(job_id, status="FAILED", error=str(e), end_time=datetime.now())
+            self._cancel_events.pop(job_id, None)
+            raise
+        for old_id in replaced:
+            # 아직 시작하지 않은 이전 배치는 새 배치로 대체 (입력은 시작 시점에 조회하므로 결과 손실 없음)
+            logger.info(f"Scheduled job {old_id} coalesced into {job_id}")
+            self._update(old_id, status="CANCELLED", coalesced_into=job_id, end_time=datetime.now(),
+                         error=f"Superseded by newer scheduled job {job_id}")
+            self._cancel_events.pop(old_id, None)
+
+    def submit_scenarios(self, deltas, mode=None):
+        """시나리오 델타 목록을 하나의 배치 작업으로 등록 (core/scenario.py 참고)"""
         job_id = self.generate_job_id()
         target_mode = mode or self.system_mode
-        self.jobs[job_id] = {
+        self._enqueue(job_id, {
             "status": "PENDING",
             "submit_time": datetime.now(),
-            "mode": target_mode
-        }
-        self.executor.submit(self._run_task, job_id, target_mode)
+            "mode": target_mode,
+            "kind": "scenario",
+            "priority": "manual"
+        }, self._run_scenario_task, job_id, target_mode, deltas)
         return job_id
 
+    def submit_job(self, mode=None, force_refresh=False, priority='manual'):
+        """
+        최적화 작업 등록 - priority: manual (API/관리 화면) / scheduled (배치 스케줄러)
+        scheduled 작업은 같은 모드의 대기 중인 scheduled 작업을 대체 (병합)
+        """
+        job_id = self.generate_job_id()
+        target_mode = mode or self.system_mode
+        self._cancel_events[job_id] = threading.Event()
+        self._enqueue(job_id, {
+            "status": "PENDING",
+            "submit_time": datetime.now(),
+            "mode": target_mode,
+            "priority": priority
+        }, self._run_task, job_id, target_mode, force_refresh, coalesce=(priority == 'scheduled'))
+        return job_id
+
+    def submit_scheduled(self):
+        """배치 스케줄러 진입점"""
+        return self.submit_job(priority='scheduled')
+
+    def queue_stats(self):
+        return self.queue.stats()
+
     def get_job_status(self, job_id):
         return self.jobs.get(job_id)
 
+    def cancel_job(self, job_id):
+        """
+        작업 취소. 대기 중이면 큐에서 제거하고, 프로세스 모드로 실행 중이면 워커(및 CBC)를 종료
+        반환: 취소 요청이 받아들여졌는지 여부
+        """
+        job = self.jobs.get(job_id)
+        if not job or job["status"] not in ("PENDING", "RUNNING"):
+            return False
+        if job["status"] == "PENDING" and self.queue.remove(job_id):
+            self._update(job_id, status="CANCELLED", end_time=datetime.now())
+            self._cancel_events.pop(job_id, None)
+            return True
+        event = self._cancel_events.get(job_id)
+        if event is None or self.execution_mode != 'process':
+            # 스레드 모드에서는 실행 중인 작업을 중단할 수 없음
+            return False
+        event.set()
+        return True
+
     def update_system_config(self, mode=None, sched_enabled=None, sched_interval=None):
         with open(self.config_path, 'r', encoding='utf-8') as f:
             conf = yaml.safe_load(f)
@@ -108,5 +349,5 @@ class JobManager:
         # 스케줄러 갱신
         self.scheduler.remove_all_jobs()
         if self.sched_enabled:
-            self.scheduler.add_job(self.submit_job, 'interval', minutes=self.sched_interval, id='batch_prod')
+            self.scheduler.add_job(self.submit_scheduled, 'interval', minutes=self.sched_interval, id='batch_prod')
         return conf
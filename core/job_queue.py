@@ -0,0 +1,142 @@
+"""
+우선순위 작업 큐 (JobManager 내부)
+
+작업을 바로 ThreadPoolExecutor에 넣지 않고 이 큐에 보관했다가 실행 가능한 슬롯이 생기면 하나씩 넘김
+(executor 내부 대기열에는 작업이 쌓이지 않으므로 우선순위/취소/병합을 항상 큐에서 처리)
+- 우선순위: manual(API/관리 화면 수동 실행) > scheduled(배치 스케줄러), 같은 우선순위는 등록 순서
+- 병합(coalesce): 같은 모드의 scheduled 작업이 아직 대기 중이면 새 scheduled 작업이 대신함
+  (실행이 interval_min보다 오래 걸려도 대기 중인 배치는 모드별 최대 1개)
+- 모드별 동시 실행 한도: max_running_per_mode (scheduled 작업에만 적용 - 같은 모드의 배치가 실행 중이어도 수동 실행은 바로 시작)
+- 수동 실행 예약 슬롯: scheduled 작업은 (workers - reserved_manual_workers)개까지만 실행
+  (배치가 모든 워커를 차지해 수동 실행이 기다리는 일이 없도록 함)
+- 통계: 우선순위/모드별 대기 수, 실행 수, 최근 대기 시간 (GET /config)
+"""
+import threading
+from collections import Counter, deque
+from time import monotonic
+
+PRIORITIES = {'manual': 0, 'scheduled': 1}
+# 대기 시간 통계에 사용할 우선순위별 최근 작업 수
+WAIT_HISTORY = 200
+
+class QueueFull(Exception):
+    pass
+
+class JobQueue:
+    def __init__(self, executor, max_workers, max_running_per_mode=None, reserved_manual_workers=1,
+                 max_size=None):
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_running_per_mode = max_running_per_mode or max_workers
+        # 워커가 1개뿐이면 예약하지 않음 (scheduled 작업이 실행되지 못함)
+        self.reserved_manual_workers = min(reserved_manual_workers or 0, max_workers - 1)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._queued = {}           # {job_id: entry} - 대기 중
+        self._running = {}          # {job_id: entry} - 실행 중
+        self._mode_running = Counter()
+        self._waits = {p: deque(maxlen=WAIT_HISTORY) for p in PRIORITIES}
+        self._counters = Counter()  # submitted / started / coalesced / removed
+
+    def push(self, job_id, mode, priority, func, *args, coalesce=False):
+        """
+        작업 등록 후 실행 가능하면 바로 시작
+        coalesce=True: 같은 모드/우선순위로 대기 중인 병합 가능 작업을 큐에서 제거
+        반환: 이 작업으로 대체되어 제거된 job_id 목록
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown job priority: {priority}")
+        with self._lock:
+            replaced = []
+            if coalesce:
+                replaced = [j for j, e in self._queued.items()
+                            if e['coalesce'] and e['mode'] == mode and e['priority'] == priority]
+            # 한도 확인 후에 병합 대상을 제거 (등록이 거부되면 기존 대기 작업은 그대로 유지)
+            if self.max_size and len(self._queued) - len(replaced) >= self.max_size:
+                raise QueueFull(f"Job queue is full ({self.max_size} pending jobs)")
+            for j in replaced:
+                del self._queued[j]
+            self._counters['coalesced'] += len(replaced)
+            self._seq += 1
+            self._queued[job_id] = {
+                'job_id': job_id, 'mode': mode, 'priority': priority, 'rank': PRIORITIES[priority],
+                'seq': self._seq, 'coalesce': coalesce, 'func': func, 'args': args,
+                'queued_at': monotonic(),
+            }
+            self._counters['submitted'] += 1
+            self._dispatch()
+        return replaced
+
+    def remove(self, job_id):
+        """대기 중인 작업을 큐에서 제거 (이미 시작했으면 False)"""
+        with self._lock:
+            if self._queued.pop(job_id, None) is None:
+                return False
+            self._counters['removed'] += 1
+            return True
+
+    def is_queued(self, job_id):
+        with self._lock:
+            return job_id in self._queued
+
+    def _can_start(self, entry):
+        """manual 작업은 빈 워커만 있으면 시작 (모드별 한도/예약 슬롯은 scheduled 작업에만 적용)"""
+        if entry['priority'] == 'manual':
+            return True
+        if self._mode_running[entry['mode']] >= self.max_running_per_mode:
+            return False
+        n_batch = sum(e['priority'] != 'manual' for e in self._running.values())
+        return n_batch < self.max_workers - self.reserved_manual_workers
+
+    def _dispatch(self):
+        """(lock 보유 상태) 빈 워커 수만큼 우선순위 순으로 실행 가능한 작업 시작"""
+        for entry in sorted(self._queued.values(), key=lambda e: (e['rank'], e['seq'])):
+            if len(self._running) >= self.max_workers:
+                break
+            if not self._can_start(entry):
+                continue
+            del self._queued[entry['job_id']]
+            self._running[entry['job_id']] = entry
+            self._mode_running[entry['mode']] += 1
+            self._waits[entry['priority']].append(monotonic() - entry['queued_at'])
+            self._counters['started'] += 1
+            self.executor.submit(self._run, entry)
+
+    def _run(self, entry):
+        try:
+            entry['func'](*entry['args'])
+        finally:
+            with self._lock:
+                self._running.pop(entry['job_id'], None)
+                self._mode_running[entry['mode']] -= 1
+                self._dispatch()
+
+    def stats(self):
+        """대기/실행 현황 및 최근 대기 시간 (초)"""
+        with self._lock:
+            now = monotonic()
+            queued = list(self._queued.values())
+            wait_time = {}
+            for priority, waits in self._waits.items():
+                pending = [now - e['queued_at'] for e in queued if e['priority'] == priority]
+                wait_time[priority] = {
+                    'recent_avg_sec': sum(waits) / len(waits) if waits else None,
+                    'recent_max_sec': max(waits) if waits else None,
+                    'oldest_pending_sec': max(pending) if pending else None,
+                }
+            return {
+                'depth': len(queued),
+                'depth_by_priority': dict(Counter(e['priority'] for e in queued)),
+                'depth_by_mode': dict(Counter(e['mode'] for e in queued)),
+                'running': len(self._running),
+                'running_by_mode': {m: n for m, n in self._mode_running.items() if n > 0},
+                'wait_time': wait_time,
+                'limits': {
+                    'max_workers': self.max_workers,
+                    'max_running_per_mode': self.max_running_per_mode,
+                    'reserved_manual_workers': self.reserved_manual_workers,
+                    'max_queue_size': self.max_size,
+                },
+                'counters': dict(self._counters),
+            }
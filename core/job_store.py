@@ -0,0 +1,208 @@
+"""
+작업 이력 저장소 (JobManager용)
+
+- memory: 프로세스 메모리 링 버퍼 (재시작 시 이력 소실)
+- sqlite: SQLite 파일 (재시작 후에도 이력 유지, 이전 실행에서 끝나지 못한 작업은 FAILED 처리)
+공통: 완료된 작업은 max_jobs 개 / retention_days 일까지만 보관 (대기/실행 중 작업은 삭제하지 않음)
+목록 조회는 최신순, 상태/모드 필터와 cursor(작업 순번) 기반 페이지 단위
+"""
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from config import resolve_path
+
+# config.yaml api.job_store 기본값
+DEFAULT_JOB_STORE = {
+    'backend': 'memory',
+    'path': 'cache/jobs.db',
+    'max_jobs': 1000,
+    'retention_days': 7,
+}
+ACTIVE_STATUSES = ('PENDING', 'RUNNING')
+# 목록 조회 시 반환하는 요약 필드 (detail=False)
+SUMMARY_FIELDS = ('status', 'mode', 'kind', 'priority', 'submit_time', 'start_time', 'end_time', 'solver_status',
+                  'capacity_warning', 'rule_timekey', 'error')
+
+def summarize(job_id, job):
+    summary = {'job_id': job_id}
+    summary.update({k: job[k] for k in SUMMARY_FIELDS if k in job})
+    return summary
+
+def _apply_update(job, fields):
+    """작업 정보 갱신 - 새 상태로 바뀌면 이전 상태의 error는 제거 (새 error를 함께 넘긴 경우 제외)"""
+    if 'status' in fields and 'error' not in fields and fields['status'] != job.get('status'):
+        job.pop('error', None)
+    job.update(fields)
+
+class MemoryJobStore:
+    def __init__(self, max_jobs=1000, retention_days=7):
+        self.max_jobs = max_jobs
+        self.retention = timedelta(days=retention_days) if retention_days else None
+        self._lock = threading.Lock()
+        self._jobs = {}  # {job_id: job} (등록 순서 유지)
+        self._seq = {}   # {job_id: 순번}
+        self._next_seq = 1
+
+    def add(self, job_id, job):
+        with self._lock:
+            self._jobs[job_id] = dict(job)
+            self._seq[job_id] = self._next_seq
+            self._next_seq += 1
+            self._prune()
+
+    def _prune(self):
+        """보관 한도를 넘거나 보관 기간이 지난 완료 작업을 오래된 순으로 삭제"""
+        cutoff = datetime.now() - self.retention if self.retention else None
+        excess = sum(job.get('status') not in ACTIVE_STATUSES for job in self._jobs.values()) - self.max_jobs
+        for job_id, job in list(self._jobs.items()):
+            if job.get('status') in ACTIVE_STATUSES:
+                continue
+            expired = cutoff is not None and job.get('submit_time', cutoff) < cutoff
+            if excess > 0 or expired:
+                del self._jobs[job_id]
+                del self._seq[job_id]
+                excess -= 1
+            elif excess <= 0 and cutoff is None:
+                break
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def fail_interrupted(self):
+        """메모리 저장소는 재시작 시 이력이 없으므로 처리할 작업 없음"""
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                _apply_update(self._jobs[job_id], fields)
+
+    def list(self, status=None, mode=None, limit=50, cursor=None, detail=False):
+        """반환: (최신순 작업 목록, 다음 페이지 cursor 또는 None)"""
+        with self._lock:
+            items = []
+            for job_id in reversed(self._jobs):
+                seq = self._seq[job_id]
+                job = self._jobs[job_id]
+                if cursor is not None and seq >= cursor:
+                    continue
+                if (status and job.get('status') != status) or (mode and job.get('mode') != mode):
+                    continue
+                if len(items) == limit:
+                    return items, items[-1]['seq']
+                entry = dict(job, job_id=job_id) if detail else summarize(job_id, job)
+                entry['seq'] = seq
+                items.append(entry)
+            return items, None
+
+class SqliteJobStore:
+    def __init__(self, path, max_jobs=1000, retention_days=7):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_jobs = max_jobs
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS JOBS ("
+                "JOB_SEQ INTEGER PRIMARY KEY AUTOINCREMENT, JOB_ID TEXT UNIQUE, "
+                "STATUS TEXT, MODE TEXT, SUBMIT_TIME TIMESTAMP, DATA BLOB)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS IX_JOBS_STATUS ON JOBS (STATUS, JOB_SEQ)")
+            conn.execute("CREATE INDEX IF NOT EXISTS IX_JOBS_MODE ON JOBS (MODE, JOB_SEQ)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES)
+
+    def fail_interrupted(self):
+        """
+        이전 실행에서 대기/실행 중이던 작업은 재시작으로 중단된 것으로 기록
+        서버 기동 시 메인 프로세스에서만 호출 (작업 워커 프로세스가 같은 파일로 저장소를 만들 때 실행 중 작업을 건드리지 않도록)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT JOB_ID FROM JOBS WHERE STATUS IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES
+            ).fetchall()
+        for (job_id,) in rows:
+            self.update(job_id, status='FAILED', error='Interrupted by server restart', end_time=datetime.now())
+
+    def add(self, job_id, job):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO JOBS (JOB_ID, STATUS, MODE, SUBMIT_TIME, DATA) VALUES (?, ?, ?, ?, ?)",
+                (job_id, job.get('status'), job.get('mode'), job.get('submit_time'),
+                 pickle.dumps(dict(job), protocol=pickle.HIGHEST_PROTOCOL))
+            )
+            self._prune(conn)
+
+    def _prune(self, conn):
+        """보관 한도를 넘거나 보관 기간이 지난 완료 작업 삭제"""
+        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+        if self.retention_days:
+            cutoff = datetime.now() - timedelta(days=self.retention_days)
+            conn.execute(f"DELETE FROM JOBS WHERE STATUS NOT IN ({placeholders}) AND SUBMIT_TIME < ?",
+                         (*ACTIVE_STATUSES, cutoff))
+        conn.execute(
+            f"DELETE FROM JOBS WHERE STATUS NOT IN ({placeholders}) AND JOB_SEQ NOT IN "
+            f"(SELECT JOB_SEQ FROM JOBS WHERE STATUS NOT IN ({placeholders}) ORDER BY JOB_SEQ DESC LIMIT ?)",
+            (*ACTIVE_STATUSES, *ACTIVE_STATUSES, self.max_jobs)
+        )
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT DATA FROM JOBS WHERE JOB_ID = ?", (job_id,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def update(self, job_id, **fields):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT DATA FROM JOBS WHERE JOB_ID = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            job = pickle.loads(row[0])
+            _apply_update(job, fields)
+            conn.execute(
+                "UPDATE JOBS SET STATUS = ?, DATA = ? WHERE JOB_ID = ?",
+                (job.get('status'), pickle.dumps(job, protocol=pickle.HIGHEST_PROTOCOL), job_id)
+            )
+
+    def list(self, status=None, mode=None, limit=50, cursor=None, detail=False):
+        """반환: (최신순 작업 목록, 다음 페이지 cursor 또는 None)"""
+        where, params = [], []
+        if status:
+            where.append("STATUS = ?")
+            params.append(status)
+        if mode:
+            where.append("MODE = ?")
+            params.append(mode)
+        if cursor is not None:
+            where.append("JOB_SEQ < ?")
+            params.append(cursor)
+        sql = "SELECT JOB_SEQ, JOB_ID, DATA FROM JOBS"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY JOB_SEQ DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        items = []
+        for seq, job_id, data in rows[:limit]:
+            job = pickle.loads(data)
+            entry = dict(job, job_id=job_id) if detail else summarize(job_id, job)
+            entry['seq'] = seq
+            items.append(entry)
+        next_cursor = items[-1]['seq'] if len(rows) > limit else None
+        return items, next_cursor
+
+def create_job_store(conf=None):
+    """config.yaml api.job_store 설정으로 저장소 생성"""
+    conf = dict(DEFAULT_JOB_STORE, **(conf or {}))
+    if conf['backend'] == 'sqlite':
+        return SqliteJobStore(resolve_path(conf['path']), conf['max_jobs'], conf['retention_days'])
+    if conf['backend'] == 'memory':
+        return MemoryJobStore(conf['max_jobs'], conf['retention_days'])
+    raise ValueError(f"Unknown job store backend: {conf['backend']}")
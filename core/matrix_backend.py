@@ -0,0 +1,206 @@
+import numpy as np
+from time import perf_counter
+from scipy.optimize import milp, LinearConstraint, Bounds
+from scipy.sparse import coo_matrix
+from core.optimizer import P_UNMET, P_CONTINUATION, P_ASSIGN, P_QTY, BIG_M, _notify
+
+# scipy.optimize.milp 상태 코드
+MILP_STATUS = {
+    0: 'Optimal',
+    1: 'Limit Reached',
+    2: 'Infeasible',
+    3: 'Unbounded',
+    4: 'Other',
+}
+
+def build_matrix_model(index, demands, opers_list, avail_time, wip, eqp_wip, tools, setup=None):
+    """
+    PuLP 모델과 동일한 MILP를 희소 계수 행렬 형태로 생성
+    변수 배치: [Qty (n) | Assign (n) | Unmet (k)]
+    모든 제약은 A @ x <= b 형태의 행으로 구성
+    setup: 장비 가용 시간 행의 전환 시간 하한 ({조합: Assign 계수}, {장비: 돌려줄 시간}) - None이면 전환 미반영
+    반환: (c, integrality, A(csr), b, unmet_keys)
+    """
+    combos = index['combos']
+    n = len(combos)
+    unmet_keys = [(p, o) for p in demands for o in opers_list]
+    unmet_pos = {k: 2 * n + i for i, k in enumerate(unmet_keys)}
+    n_vars = 2 * n + len(unmet_keys)
+
+    # 조합별 정수 인덱스 배열 ((p,o) id, unit id, 사이클타임)
+    po_ids = {}
+    unit_ids = {u: i for i, u in enumerate(index['units'])}
+    combo_po = np.empty(n, dtype=np.int64)
+    combo_unit = np.empty(n, dtype=np.int64)
+    for i, (p, o, u) in enumerate(combos):
+        combo_po[i] = po_ids.setdefault((p, o), len(po_ids))
+        combo_unit[i] = unit_ids[u]
+    cycle = np.fromiter((index['cycle'][k] for k in combos), dtype=np.float64, count=n)
+    qty_cols = np.arange(n, dtype=np.int64)
+
+    # 목적 함수 계수
+    c = np.zeros(n_vars)
+    c[:n] = P_QTY
+    c[n:2 * n] = P_ASSIGN
+    c[2 * n:] = P_UNMET
+    # 작업 연속성 페널티: 현재 작업과 다른 (제품, 공정) 할당
+    for i, (p, o, u) in enumerate(combos):
+        info = eqp_wip.get(u)
+        if info is not None and (p != info['Product'] or o != info['Operation']):
+            c[n + i] += P_CONTINUATION
+
+    integrality = np.zeros(n_vars, dtype=np.uint8)
+    integrality[n:2 * n] = 1
+
+    rows, cols, vals, b = [], [], [], []
+    n_rows = 0
+
+    # A. 할당 연결 제약: Qty - M * Assign <= 0 (presolve 시 M = 조합별 수량 상한)
+    qty_ub = index.get('qty_ub', {})
+    big_m = np.fromiter((qty_ub.get(k, BIG_M) for k in combos), dtype=np.float64, count=n)
+    rows += [qty_cols, qty_cols]
+    cols += [qty_cols, n + qty_cols]
+    vals += [np.ones(n), -big_m]
+    b.append(np.zeros(n))
+    n_rows += n
+
+    # 조합 -> 해당 (p,o) 행 번호 매핑용 룩업 배열
+    def po_row_lookup(row_of_po):
+        lookup = np.full(len(po_ids), -1, dtype=np.int64)
+        for po, r in row_of_po.items():
+            if po in po_ids:
+                lookup[po_ids[po]] = r
+        return lookup[combo_po]
+
+    # B. 수요 충족 제약: -Sum(Qty[p,last]) - Unmet[p,last] <= WIP[p,last] - Demand
+    last_oper = opers_list[-1]
+    demand_rows = {}
+    for p, demand in demands.items():
+        r = n_rows
+        demand_rows[p, last_oper] = r
+        rows.append([r])
+        cols.append([unmet_pos[p, last_oper]])
+        vals.append([-1.0])
+        b.append([wip.get((p, last_oper), 0) - demand])
+        n_rows += 1
+    r_of = po_row_lookup(demand_rows)
+    mask = r_of >= 0
+    rows.append(r_of[mask]); cols.append(qty_cols[mask]); vals.append(np.full(mask.sum(), -1.0))
+
+    # C. 공정 흐름 제약: Sum(Qty[p,o_i]) - Sum(Qty[p,o_i-1]) <= WIP[p,o_i]
+    flow_rows, next_rows = {}, {}
+    for p in demands:
+        for i, curr_op in enumerate(opers_list):
+            if (p, curr_op) not in index['po_units']:
+                # 이 공정을 할 수 있는 장비가 없으면 0 <= 재공 (항상 성립)
+                continue
+            flow_rows[p, curr_op] = n_rows
+            if i > 0:
+                next_rows[p, opers_list[i - 1]] = n_rows
+            b.append([wip.get((p, curr_op), 0)])
+            n_rows += 1
+    for row_of_po, coef in ((flow_rows, 1.0), (next_rows, -1.0)):
+        r_of = po_row_lookup(row_of_po)
+        mask = r_of >= 0
+        rows.append(r_of[mask]); cols.append(qty_cols[mask]); vals.append(np.full(mask.sum(), coef))
+
+    # D. 툴 제약: Sum(Qty * 사이클타임) <= 툴 개수 * 가용 시간
+    tool_rows = {}
+    for p in demands:
+        for o in opers_list:
+            if (p, o) in index['po_units']:
+                tool_rows[p, o] = n_rows
+                b.append([tools.get((p, o), 99) * avail_time])
+                n_rows += 1
+    r_of = po_row_lookup(tool_rows)
+    mask = r_of >= 0
+    rows.append(r_of[mask]); cols.append(qty_cols[mask]); vals.append(cycle[mask])
+
+    # E. 장비 가용 시간 제약: Sum(Qty * 사이클타임) <= 가용 시간 - 현재 작업 잔여 시간 (장비 풀은 대수 x 가용 시간)
+    # setup이 있으면 Assign에 작업별 전환 시간 하한을 더하고 유휴 장비는 첫 작업분을 가용 시간에 돌려줌
+    pool_size = index.get('pool_size', {})
+    setup_lb, credit = setup or ({}, {})
+    unit_row = np.full(len(unit_ids), -1, dtype=np.int64)
+    for u in index['unit_tasks']:
+        unit_row[unit_ids[u]] = n_rows
+        occupied_min = eqp_wip[u].get('End_Time_Offset', 0) if u in eqp_wip else 0
+        b.append([avail_time * pool_size.get(u, 1) - occupied_min + credit.get(u, 0)])
+        n_rows += 1
+    rows.append(unit_row[combo_unit]); cols.append(qty_cols); vals.append(cycle)
+    if setup:
+        setup_coef = np.fromiter((setup_lb[k] for k in combos), dtype=np.float64, count=n)
+        has_setup = setup_coef > 0
+        rows.append(unit_row[combo_unit][has_setup]); cols.append(n + qty_cols[has_setup]); vals.append(setup_coef[has_setup])
+
+    A = coo_matrix(
+        (np.concatenate([np.asarray(v, dtype=np.float64) for v in vals]),
+         (np.concatenate([np.asarray(r, dtype=np.int64) for r in rows]),
+          np.concatenate([np.asarray(cc, dtype=np.int64) for cc in cols]))),
+        shape=(n_rows, n_vars)
+    ).tocsr()
+    b = np.concatenate([np.asarray(v, dtype=np.float64) for v in b])
+    return c, integrality, A, b, unmet_keys
+
+def solve_matrix_model(index, demands, opers_list, avail_time, wip, eqp_wip, tools, run):
+    """
+    희소 행렬 모델을 HiGHS(scipy.optimize.milp)로 프로세스 내에서 풀이
+    반환: ({(p,o,u): 수량}, {(p,o): 미충족량}) 또는 해가 없으면 None
+    """
+    timings = run['timings']
+    options = run['options']
+    t1 = perf_counter()
+    c, integrality, A, b, unmet_keys = build_matrix_model(index, demands, opers_list, avail_time, wip, eqp_wip, tools,
+                                                          run.get('setup'))
+    n = len(index['combos'])
+    if run['relax']:
+        integrality = np.zeros_like(integrality)
+    upper = np.full(c.shape[0], np.inf)
+    # Assign 상한: 일반 장비 1, 장비 풀은 풀 크기 (core/symmetry.py)
+    pool_size = index.get('pool_size', {})
+    upper[n:2 * n] = [pool_size.get(u, 1) for _, _, u in index['combos']]
+    t2 = perf_counter()
+    timings['constraints'] = t2 - t1
+    run['model'] = {
+        'variables': int(c.shape[0]),
+        'binaries': int(integrality.sum()),
+        'constraints': int(A.shape[0]),
+        'nonzeros': int(A.nnz),
+    }
+
+    # scipy의 HiGHS 인터페이스는 스레드 수 옵션과 MIP 초기해를 지원하지 않음 (threads, warm_start 무시)
+    if run['warm_start']:
+        print("[Debug] warm_start is not supported by the highs backend; solving from scratch")
+    milp_options = {'disp': False}
+    if options['time_limit_sec'] is not None:
+        milp_options['time_limit'] = options['time_limit_sec']
+    if options['mip_gap'] is not None:
+        milp_options['mip_rel_gap'] = options['mip_gap']
+    if options['max_nodes'] is not None:
+        milp_options['node_limit'] = options['max_nodes']
+
+    # scipy milp는 풀이 중 콜백을 지원하지 않으므로 단계 이벤트만 전달 (incumbent 없음)
+    _notify(run, 'phase', phase='solve')
+    res = milp(c, integrality=integrality, bounds=Bounds(0, upper),
+               constraints=LinearConstraint(A, -np.inf, b), options=milp_options)
+    timings['solve'] = perf_counter() - t2
+    print(f"[Debug] Solver Status: {MILP_STATUS.get(res.status, res.status)}")
+
+    if res.status == 0:
+        solver_status = 'OPTIMAL'
+    elif res.status == 1:
+        solver_status = 'FEASIBLE' if res.x is not None else 'TIMEOUT'
+    else:
+        solver_status = MILP_STATUS.get(res.status, 'Other').upper()
+    run['solver'].update({
+        'status': solver_status,
+        'gap': getattr(res, 'mip_gap', None),
+        'objective': float(res.fun) if res.x is not None else None,
+        'bound': getattr(res, 'mip_dual_bound', None),
+    })
+
+    if res.x is None:
+        return None
+    x = res.x
+    qty_vals = dict(zip(index['combos'], x[:n].tolist()))
+    unmet_vals = dict(zip(unmet_keys, x[2 * n:].tolist()))
+    return qty_vals, unmet_vals
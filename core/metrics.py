@@ -0,0 +1,164 @@
+import sys
+import threading
+from collections import Counter
+from core.job_store import ACTIVE_STATUSES
+
+# 작업 단계 (입력 조회 -> 모델 생성 -> 풀이 -> 결과 정리 -> 결과 적재)
+JOB_PHASES = ('fetch', 'build', 'solve', 'results', 'upload')
+MODEL_SIZE_KEYS = ('variables', 'binaries', 'constraints', 'nonzeros')
+
+def peak_rss_mb():
+    """
+    현재 프로세스와 (종료된) 자식 프로세스(CBC 등)의 최대 RSS (MB)
+    resource 모듈이 없는 환경(Windows)에서는 psutil(설치 시)의 현재 RSS, 그 외 None
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024), None
+        except ImportError:
+            return None, None
+    # Linux는 KB, macOS는 byte 단위
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return self_rss, child_rss
+
+def build_phase_timings(fetch_sec, solve_timings, upload_sec=None):
+    """optimizer stats의 세부 시간(index/variables/constraints/...)을 작업 단계별 시간으로 집계"""
+    phases = {'fetch': fetch_sec}
+    if solve_timings:
+        phases['build'] = sum(solve_timings.get(k, 0) for k in ('index', 'variables', 'constraints'))
+        if 'solve' in solve_timings:
+            phases['solve'] = solve_timings['solve']
+        if 'results' in solve_timings:
+            phases['results'] = solve_timings['results']
+    if upload_sec is not None:
+        phases['upload'] = upload_sec
+    return phases
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _line(name, labels, value):
+    label_txt = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f"{name}{{{label_txt}}} {float(value)}" if label_txt else f"{name} {float(value)}"
+
+class JobMetrics:
+    """
+    /metrics용 작업 누적 집계 - JobManager가 작업 등록/갱신 시 observe 호출 (스크랩 시 작업 이력을 읽지 않음)
+    작업 이력이 보관 한도/기간으로 삭제되어도 누적 값은 줄지 않음 (프로세스 재시작 시 0부터 다시 집계)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}             # {job_id: (상태, 모드)} - 대기/실행 중 작업
+        self._finished = Counter()    # {(최종 상태, 모드): 작업 수}
+        self._phase_sum = Counter()   # {(단계, 모드): 누적 초}
+        self._phase_count = Counter() # {(단계, 모드): 횟수}
+        self._last = {}               # {모드: 마지막으로 끝난 작업의 metrics / mip_gap}
+
+    def observe(self, job_id, fields):
+        """작업 등록(전체 정보) 또는 갱신 필드 반영 - 단계 시간은 metrics가 들어올 때, 완료 수는 대기/실행 -> 종료 상태 전환 시 1회 집계"""
+        with self._lock:
+            entry = self._active.get(job_id)
+            mode = fields.get('mode') or (entry[1] if entry else 'unknown')
+            metrics = fields.get('metrics')
+            if metrics:
+                for phase, sec in metrics.get('phases', {}).items():
+                    self._phase_sum[phase, mode] += sec
+                    self._phase_count[phase, mode] += 1
+                self._last[mode] = {'metrics': metrics, 'mip_gap': fields.get('mip_gap')}
+            status = fields.get('status')
+            if status in ACTIVE_STATUSES:
+                self._active[job_id] = (status, mode)
+            elif status is not None and entry is not None:
+                del self._active[job_id]
+                self._finished[status, mode] += 1
+
+    def snapshot(self):
+        """format_prometheus 입력용 복사본"""
+        with self._lock:
+            return {
+                'active': Counter(self._active.values()),
+                'finished': dict(self._finished),
+                'phase_sum': dict(self._phase_sum),
+                'phase_count': dict(self._phase_count),
+                'last': dict(self._last),
+            }
+
+def format_prometheus(job_metrics, cache_counters=None):
+    """
+    작업 누적 집계(JobMetrics.snapshot())를 Prometheus text exposition 형식으로 변환
+    cache_counters: 결과 캐시 누적 카운터 (ResultCache.counters())
+    - optimizer_jobs: 상태/모드별 대기/실행 중 작업 수
+    - optimizer_jobs_finished_total: 최종 상태/모드별 종료 작업 누적 수
+    - optimizer_job_phase_seconds_sum/count: 단계별 누적 소요 시간
+    - optimizer_last_*: 모드별 마지막 완료 작업의 단계 시간, 모델 크기, 갭, 가용 시간 초과(전환 포함), 최대 RSS
+    - optimizer_result_cache_*: 결과 캐시 적중/공유/미적중 누적 횟수, 보관 항목 수
+    """
+    lines = []
+    phase_sum, phase_count = job_metrics['phase_sum'], job_metrics['phase_count']
+    last = job_metrics['last']
+
+    lines.append("# HELP optimizer_jobs Number of pending and running optimization jobs by status and mode")
+    lines.append("# TYPE optimizer_jobs gauge")
+    for (status, mode), n in sorted(job_metrics['active'].items()):
+        lines.append(_line("optimizer_jobs", {'status': status, 'mode': mode}, n))
+
+    lines.append("# HELP optimizer_jobs_finished_total Finished optimization jobs by final status and mode")
+    lines.append("# TYPE optimizer_jobs_finished_total counter")
+    for (status, mode), n in sorted(job_metrics['finished'].items()):
+        lines.append(_line("optimizer_jobs_finished_total", {'status': status, 'mode': mode}, n))
+
+    lines.append("# HELP optimizer_job_phase_seconds Time spent per job phase")
+    lines.append("# TYPE optimizer_job_phase_seconds summary")
+    for (phase, mode) in sorted(phase_sum):
+        labels = {'phase': phase, 'mode': mode}
+        lines.append(_line("optimizer_job_phase_seconds_sum", labels, phase_sum[phase, mode]))
+        lines.append(_line("optimizer_job_phase_seconds_count", labels, phase_count[phase, mode]))
+
+    lines.append("# HELP optimizer_last_phase_seconds Phase durations of the most recent finished job")
+    lines.append("# TYPE optimizer_last_phase_seconds gauge")
+    for mode, job in sorted(last.items()):
+        for phase, sec in job['metrics'].get('phases', {}).items():
+            lines.append(_line("optimizer_last_phase_seconds", {'phase': phase, 'mode': mode}, sec))
+
+    lines.append("# HELP optimizer_last_model_size Model size of the most recent finished job")
+    lines.append("# TYPE optimizer_last_model_size gauge")
+    for mode, job in sorted(last.items()):
+        for kind in MODEL_SIZE_KEYS:
+            val = job['metrics'].get('model', {}).get(kind)
+            if val is not None:
+                lines.append(_line("optimizer_last_model_size", {'kind': kind, 'mode': mode}, val))
+
+    gauges = (
+        ('optimizer_last_mip_gap', 'Relative MIP gap of the most recent finished job', lambda j: j.get('mip_gap')),
+        ('optimizer_last_overrun_units', 'Units whose production plus setups exceed the available time in the most recent plan',
+         lambda j: j['metrics'].get('sequencing', {}).get('overrun_units')),
+        ('optimizer_last_max_overrun_minutes', 'Largest per-unit overrun (minutes, setups included) in the most recent plan',
+         lambda j: j['metrics'].get('sequencing', {}).get('max_overrun_min')),
+        ('optimizer_last_peak_rss_mb', 'Peak RSS (MB) of the process that ran the most recent job',
+         lambda j: j['metrics'].get('peak_rss_mb')),
+        ('optimizer_last_solver_peak_rss_mb', 'Peak RSS (MB) of solver subprocesses for the most recent job',
+         lambda j: j['metrics'].get('solver_peak_rss_mb')),
+    )
+    for name, help_txt, getter in gauges:
+        lines.append(f"# HELP {name} {help_txt}")
+        lines.append(f"# TYPE {name} gauge")
+        for mode, job in sorted(last.items()):
+            val = getter(job)
+            if val is not None:
+                lines.append(_line(name, {'mode': mode}, val))
+
+    if cache_counters:
+        lines.append("# HELP optimizer_result_cache_requests_total Result cache lookups by outcome (all processes)")
+        lines.append("# TYPE optimizer_result_cache_requests_total counter")
+        for outcome in ('hit', 'shared', 'miss'):
+            lines.append(_line("optimizer_result_cache_requests_total", {'result': outcome},
+                               cache_counters.get(outcome, 0)))
+        lines.append("# HELP optimizer_result_cache_entries Number of cached solve results")
+        lines.append("# TYPE optimizer_result_cache_entries gauge")
+        lines.append(_line("optimizer_result_cache_entries", {}, cache_counters.get('entries', 0)))
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,33 @@
 from pulp import *
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+import os
+import re
+import tempfile
+import threading
+from time import perf_counter
 from config import data_config
 
+# 목적 함수 페널티 가중치
+P_UNMET = 1000000        # 미충족 수요
+P_CONTINUATION = 10000   # 작업 연속성 (현재 작업과 다른 할당)
+P_ASSIGN = 1000          # 할당 개수 (전환 Proxy)
+P_QTY = 1                # 과잉 생산
+BIG_M = 100000           # 수량-할당 연결 상수
+
+# 솔버 실행 옵션 기본값 (None = 제한 없음 / 솔버 기본값)
+DEFAULT_SOLVER_OPTIONS = {
+    'time_limit_sec': None,  # 시간 제한 (초)
+    'mip_gap': None,         # 상대 갭 허용치 (0.01 = 1%)
+    'threads': None,         # 솔버 스레드 수
+    'max_nodes': None,       # Branch & Bound 노드 제한
+}
+
+# CBC 진행 로그: 새 정수해 / 노드 진행 (현재 최선해, 하한)
+CBC_INCUMBENT_RE = re.compile(r'^Cbc00(?:04|12)I Integer solution of (\S+)')
+CBC_PROGRESS_RE = re.compile(r'^Cbc0010I After \d+ nodes, \d+ on tree, (\S+) best solution, best possible (\S+)')
+
 def get_changeover_time(p_old, o_old, p_new, o_new):
     """
     제품/공정 변경에 따른 전환 시간 계산
@@ -23,70 +48,305 @@ def get_changeover_time(p_old, o_old, p_new, o_new):
         
     return 0
 
-def solve_production_allocation(demands=None, eqp_models=None, proc_config=None, avail_time=None, opers_list=None, wip=None, eqp_wip=None, tools=None):
-    # 인자가 제공되지 않으면 data_config의 기본값 사용
-    demands = demands or data_config.DEMAND
-    eqp_models = eqp_models or data_config.EQUIPMENT_MODELS
-    proc_config = proc_config or data_config.PROCESS_CONFIG
+def build_model_index(eqp_models, proc_config):
+    """
+    모델 생성용 인덱스 구축 (proc_config x 장비 조합을 한 번만 순회)
+    - units: 중복 제거된 장비 목록 (eqp_models 순서 유지)
+    - unit_model: 장비 -> 모델
+    - combos: 유효한 (Prod, Oper, Unit) 조합 (기존 valid_combinations 순서 유지)
+    - cycle: (Prod, Oper, Unit) -> 사이클타임(분)
+    - po_units: (Prod, Oper) -> [Unit]
+    - unit_tasks: Unit -> [(Prod, Oper, 사이클타임)]
+    """
+    units = []
+    unit_model = {}
+    for m, u_list in eqp_models.items():
+        for u in u_list:
+            if u not in unit_model:
+                unit_model[u] = m
+                units.append(u)
+
+    combos = []
+    cycle = {}
+    po_units = {}
+    unit_tasks = {}
+    for (p, o, m), t in proc_config.items():
+        for u in eqp_models.get(m, ()):
+            if (p, o, u) in cycle:
+                continue
+            # 장비가 여러 모델에 속한 경우 대표 모델의 사이클타임 우선
+            t_u = proc_config.get((p, o, unit_model[u]), t)
+            combos.append((p, o, u))
+            cycle[p, o, u] = t_u
+            po_units.setdefault((p, o), []).append(u)
+            unit_tasks.setdefault(u, []).append((p, o, t_u))
+
+    return {
+        'units': units,
+        'unit_model': unit_model,
+        'combos': combos,
+        'cycle': cycle,
+        'po_units': po_units,
+        'unit_tasks': unit_tasks,
+    }
+
+def solve_production_allocation(demands=None, eqp_models=None, proc_config=None, avail_time=None, opers_list=None, wip=None, eqp_wip=None, tools=None, stats=None, backend='pulp', solver_options=None, warm_start=None, decompose=False, relax=False, plan_start=None, changeover_config=None, sequencing='heuristic', progress=None, presolve=True, aggregate_units=False, setup_capacity=False):
+    """
+    backend: 'pulp' (PuLP 식 객체 + CBC) 또는 'highs' (희소 행렬 + scipy.optimize.milp)
+             'heuristic' (LP 완화 + 반올림/탐욕 보정 근사해, core/heuristic.py - What-if 용, 갭은 LP 하한 기준)
+    모든 백엔드가 동일한 모델을 풀고 (df_res, max_workload, df_unmet)을 반환
+    solver_options: 시간 제한/갭/스레드/노드 제한 (DEFAULT_SOLVER_OPTIONS 참고)
+    stats: dict를 넘기면 단계별 소요 시간과 솔버 결과(status, gap 등)를 기록
+    warm_start: 이전 배치의 할당 결과 {(Prod, Oper, Unit): 수량} - MIP 초기해로 사용
+    decompose: True면 제품-공정-모델 그래프의 독립 연결 요소별로 나누어 병렬 풀이 (core/decomposition.py)
+    relax: True면 Assign 변수를 [0, 1] 연속 변수로 완화한 LP로 풀이 (집계 계획/하한 계산용)
+    plan_start: 타임라인 시작 시각 (기본: 현재 시각)
+    changeover_config: 전환 시간 설정 (기본: data_config.CHANGEOVER_CONFIG)
+    sequencing: 장비별 작업 순서 - 'heuristic'(전환 시간 최소화, core/sequencing.py) / 'sorted'(제품 순)
+    progress: 진행 콜백 progress(kind, data) - ('phase', {'phase': build/solve/results}),
+              ('incumbent', {'objective', 'bound', 'gap', 'elapsed_sec'}) (pulp: CBC 로그, heuristic: 최종 근사해)
+    presolve: True면 변수 생성 전에 쓸 수 없는 조합을 제거하고 조합별 수량 상한을 연결 상수로 사용 (core/presolve.py)
+    aggregate_units: True면 서로 바꿔도 같은 유휴 장비를 장비 풀로 묶어 풀이 후 실제 장비로 분배 (core/symmetry.py)
+                     MILP 백엔드(pulp/highs)에만 적용 (heuristic은 LP라 대칭 영향 없음)
+    setup_capacity: True면 장비 가용 시간 제약에 할당 작업별 전환 시간 하한을 반영 (core/sequencing.py setup_lower_bounds)
+                    MILP 백엔드(pulp/highs)에만 적용 (대규모에서는 CBC가 시간 제한 내 초기해를 찾지 못할 수 있음)
+    """
+    # 인자가 제공되지 않으면(None) data_config의 기본값 사용 (빈 dict는 그대로 사용)
+    demands = data_config.DEMAND if demands is None else demands
+    eqp_models = data_config.EQUIPMENT_MODELS if eqp_models is None else eqp_models
+    proc_config = data_config.PROCESS_CONFIG if proc_config is None else proc_config
     avail_time = avail_time or data_config.AVAILABLE_TIME
     opers_list = opers_list or data_config.OPERATIONS
-    wip = wip or data_config.WIP
+    wip = data_config.WIP if wip is None else wip
     eqp_wip = eqp_wip or {}
     tools = tools or {}
-    
+
+    run = {'progress': progress}
+    _notify(run, 'phase', phase='build')
+    if decompose:
+        # 분할 풀이는 하위 문제를 별도 프로세스에서 풀므로 단계 이벤트만 전달
+        _notify(run, 'phase', phase='solve')
+        from core.decomposition import solve_decomposed
+        return solve_decomposed(
+            demands, eqp_models, proc_config, avail_time, opers_list, wip, eqp_wip, tools,
+            stats=stats, backend=backend, solver_options=solver_options, warm_start=warm_start,
+            relax=relax, plan_start=plan_start, changeover_config=changeover_config, sequencing=sequencing,
+            presolve=presolve, aggregate_units=aggregate_units, setup_capacity=setup_capacity
+        )
+
+    options = dict(DEFAULT_SOLVER_OPTIONS)
+    options.update({k: v for k, v in (solver_options or {}).items() if v is not None})
+    run.update({'timings': {}, 'options': options, 'solver': {'backend': backend}, 'warm_start': warm_start, 'relax': relax})
+    # 장비 가용 시간 제약에 반영할 전환 시간 설정 (heuristic은 Assign을 LP에서 제거하므로 적용하지 않음)
+    run['changeover'] = changeover_config or data_config.CHANGEOVER_CONFIG \
+        if setup_capacity and backend != 'heuristic' else None
+    timings = run['timings']
+    t0 = perf_counter()
+
+    # 0. 인덱스 구축 ((p,o)->units, unit->(p,o,t), unit->model)
+    index = build_model_index(eqp_models, proc_config)
+    timings['index'] = perf_counter() - t0
+    if presolve:
+        from core.presolve import presolve_index
+        t_pre = perf_counter()
+        index, run['presolve'] = presolve_index(index, demands, opers_list, avail_time, wip, eqp_wip, tools)
+        timings['presolve'] = perf_counter() - t_pre
+    base_index = index
+    if aggregate_units and backend != 'heuristic':
+        from core.symmetry import aggregate_index, aggregate_values
+        t_sym = perf_counter()
+        index, run['symmetry'] = aggregate_index(index, eqp_wip)
+        if index is not base_index and warm_start:
+            run['warm_start'] = aggregate_values(warm_start, index)
+        timings['symmetry'] = perf_counter() - t_sym
+
+    # 1~5. 모델 생성 및 최적화 실행 (백엔드별)
+    solution = _solve_backend(backend, index, demands, opers_list, avail_time, wip, eqp_wip, tools, run)
+
+    n_combos = len(index['combos'])
+    if solution is None:
+        _report_timings(run, n_combos, stats)
+        return None, 0, pd.DataFrame()
+
+    # 6. 결과 정리
+    _notify(run, 'phase', phase='results')
+    t_res = perf_counter()
+    qty_vals, unmet_vals = solution
+    if index is not base_index:
+        # 장비 풀 수량을 실제 장비로 분배
+        from core.symmetry import disaggregate
+        pooled_vals, split_info = disaggregate(qty_vals, index, avail_time)
+        qty_vals = dict.fromkeys(base_index['combos'], 0.0)
+        qty_vals.update(pooled_vals)
+        symmetry = run['symmetry']
+        symmetry.update(split_info)
+        if split_info['extra_assignments']:
+            # 풀이(완화)보다 할당이 늘었으면 줄일 수 있는 만큼 줄이고 원 모델 기준 목적값으로 다시 계산
+            qty_vals, unmet_vals = _finalize_pooled(
+                backend, base_index, qty_vals, unmet_vals, demands, opers_list, avail_time, wip, eqp_wip, tools, run)
+    seq_info = {}
+    df_res, max_workload, df_unmet = _build_results(
+        base_index, qty_vals, unmet_vals, eqp_wip, plan_start,
+        changeover_config=changeover_config, sequencing=sequencing, avail_time=avail_time, seq_info=seq_info
+    )
+    timings['results'] = perf_counter() - t_res
+    run['sequencing'] = seq_info
+    if seq_info.get('overrun_units'):
+        print(f"[Debug] Capacity check: {seq_info['overrun_units']} units exceed available time with setups "
+              f"(max {seq_info['max_overrun_min']:.1f} min)")
+    _report_timings(run, n_combos, stats)
+    return df_res, max_workload, df_unmet
+
+def _solve_backend(backend, index, demands, opers_list, avail_time, wip, eqp_wip, tools, run):
+    # 전환 시간 하한은 풀이할 인덱스 기준 (장비 풀은 풀 단위)
+    run['setup'] = None
+    if run.get('changeover') and backend != 'heuristic':
+        from core.sequencing import setup_lower_bounds
+        starts = {u: (info['Product'], info['Operation']) for u, info in eqp_wip.items()}
+        run['setup'] = setup_lower_bounds(index['unit_tasks'], starts, run['changeover'], index.get('pool_size'))
+    if backend == 'pulp':
+        return _solve_pulp(index, demands, opers_list, avail_time, wip, eqp_wip, tools, run)
+    if backend == 'highs':
+        from core.matrix_backend import solve_matrix_model
+        return solve_matrix_model(index, demands, opers_list, avail_time, wip, eqp_wip, tools, run)
+    if backend == 'heuristic':
+        from core.heuristic import solve_heuristic
+        return solve_heuristic(index, demands, opers_list, avail_time, wip, eqp_wip, tools, run)
+    raise ValueError(f"Unknown optimizer backend: {backend}")
+
+def _finalize_pooled(backend, base_index, qty_vals, unmet_vals, demands, opers_list, avail_time, wip, eqp_wip,
+                     tools, run):
+    """
+    장비 풀 분배 후 할당이 늘어난 경우의 정리 (core/symmetry.py)
+    1. 늘어난 할당을 다른 장비 여유 시간으로 옮겨 줄이고 원 모델 목적값 재계산 (finalize_plan)
+    2. 그래도 풀 모델 목적값보다 나빠졌으면 원 모델(장비별)을 분배 결과를 초기해로 다시 풀고 나은 해 사용
+       (풀 모델은 원 모델의 완화이므로 분배 손실이 있으면 최적성이 보장되지 않음)
+    3. 갭은 알려진 하한(재풀이 하한, 최적으로 풀린 풀 모델의 목적값 중 큰 값) 기준, 하한이 없으면 None
+    반환: (qty_vals, unmet_vals)
+    """
+    from core.symmetry import finalize_plan
+    solver, symmetry, options = run['solver'], run['symmetry'], run['options']
+    pooled_objective = solver.get('objective')
+    # 풀 모델은 원 모델의 완화: 최적으로 풀렸으면 그 목적값(또는 솔버 하한)이 원 모델의 하한
+    bounds = [solver['bound']] if solver.get('bound') is not None else []
+    if solver.get('status') == 'OPTIMAL' and pooled_objective is not None:
+        bounds.append(pooled_objective)
+
+    qty_vals, objective, symmetry['merged_assignments'] = finalize_plan(
+        qty_vals, base_index, avail_time, eqp_wip, tools, unmet_vals)
+    symmetry['pooled_objective'] = pooled_objective
+    print(f"[Debug] Symmetry: {symmetry['extra_assignments']} extra assignments after splitting pools, "
+          f"{symmetry['merged_assignments']} merged; objective {pooled_objective:,.0f} -> {objective:,.0f}")
+
+    if pooled_objective is not None and objective > pooled_objective + 1e-6:
+        t_re = perf_counter()
+        sub = dict(run, timings={}, solver={'backend': run['solver']['backend']}, warm_start=qty_vals)
+        resolved = _solve_backend(backend, base_index, demands, opers_list, avail_time, wip, eqp_wip, tools, sub)
+        run['timings']['symmetry_resolve'] = perf_counter() - t_re
+        sub_solver = sub['solver']
+        symmetry['resolved_objective'] = sub_solver.get('objective')
+        if sub_solver.get('bound') is not None:
+            bounds.append(sub_solver['bound'])
+        elif sub_solver.get('status') == 'OPTIMAL' and sub_solver.get('objective') is not None:
+            bounds.append(sub_solver['objective'])
+        if resolved is not None and sub_solver.get('objective') is not None and sub_solver['objective'] < objective:
+            qty_vals, unmet_vals = resolved
+            objective = sub_solver['objective']
+        print(f"[Debug] Symmetry: pooling lost optimality, re-solved per-unit model "
+              f"({symmetry['resolved_objective']}) -> objective {objective:,.0f}")
+
+    bound = max(bounds) if bounds else None
+    gap = abs(objective - bound) / max(abs(objective), 1e-10) if bound is not None else None
+    solver.update({'objective': objective, 'bound': bound, 'gap': gap})
+    if solver.get('status') == 'OPTIMAL' and (gap is None or gap > (options['mip_gap'] or 0) + 1e-9):
+        solver['status'] = 'FEASIBLE'
+    return qty_vals, unmet_vals
+
+def _solve_pulp(index, demands, opers_list, avail_time, wip, eqp_wip, tools, run):
+    """
+    PuLP 모델 생성 후 CBC로 풀이
+    반환: ({(p,o,u): 수량}, {(p,o): 미충족량}) 또는 해가 없으면 None
+    """
+    timings = run['timings']
+    t1 = perf_counter()
+    units = index['units']
+    valid_combinations = index['combos']
+    po_units = index['po_units']
+    unit_tasks = index['unit_tasks']
+
     # 1. 문제 정의
     prob = LpProblem("Production_Line_Balancing", LpMinimize)
 
     # 결정 변수 정의
-    units = [unit for model in eqp_models for unit in eqp_models[model]]
-    
-    # 가능한 (Prod, Oper, Unit) 조합 추출
-    valid_combinations = []
-    for (p, o, m), t in proc_config.items():
-        if m in eqp_models:
-            for u in eqp_models[m]:
-                valid_combinations.append((p, o, u))
-
     qty_vars = LpVariable.dicts("Qty", valid_combinations, lowBound=0, cat='Continuous')
-    assign_vars = LpVariable.dicts("Assign", valid_combinations, cat='Binary')
+    if run['relax']:
+        assign_vars = LpVariable.dicts("Assign", valid_combinations, lowBound=0, upBound=1, cat='Continuous')
+    else:
+        assign_vars = LpVariable.dicts("Assign", valid_combinations, cat='Binary')
     unmet_vars = LpVariable.dicts("Unmet", [(p, o) for p in demands for o in opers_list], lowBound=0, cat='Continuous')
-    
+
+    # 장비 풀(core/symmetry.py)의 Assign은 해당 작업에 쓰는 장비 수 (0 ~ 풀 크기)
+    pool_size = index.get('pool_size', {})
+    for k in valid_combinations:
+        if k[2] in pool_size:
+            assign_vars[k].upBound = pool_size[k[2]]
+
+    # 이전 해를 초기값으로 설정 (CBC MIP Start)
+    # 이번 모델에 없는 조합은 무시하고, 이전 해에 없는 조합은 0으로 시작
+    warm_start = run['warm_start']
+    qty_ub = index.get('qty_ub', {})
+    if warm_start:
+        from core.symmetry import assign_count
+        n_started = 0
+        for k in valid_combinations:
+            q = warm_start.get(k, 0)
+            qty_vars[k].setInitialValue(q)
+            assign_vars[k].setInitialValue(assign_count(q, qty_ub.get(k, BIG_M), pool_size.get(k[2], 1)))
+            n_started += q > 1e-5
+        run['solver']['warm_start'] = n_started
+    t2 = perf_counter()
+    timings['variables'] = t2 - t1
+
     # 3. 목적 함수 설계
     # 1순위: 미충족 수요 최소화 (Penalty 1,000,000)
     # 2순위: 현재 작업 중인 장비의 작업 연속성 유지 (Penalty 10,000)
     # 3순위: 제품/공정 전환 최소화 (할당 개수 1개당 Penalty 1,000)
     # 4순위: 불필요한 과잉 생산 최소화 (수량 1개당 Penalty 1)
-    p_unmet = 1000000
-    p_continuation = 10000  # 작업 연속성 페널티 (새로 추가)
-    p_assign = 1000
-    p_qty = 1
-    
+    p_unmet = P_UNMET
+    p_continuation = P_CONTINUATION
+    p_assign = P_ASSIGN
+    p_qty = P_QTY
+
     # 작업 연속성 페널티 계산
     # 현재 작업 중인 장비가 다른 (제품, 공정)을 할당받으면 페널티 부과
-    continuation_penalty = 0
-    for u in units:
-        if u in eqp_wip:
-            current_prod = eqp_wip[u]['Product']
-            current_oper = eqp_wip[u]['Operation']
-            
-            # 이 장비에 할당 가능한 모든 조합 중, 현재 작업과 다른 것에 페널티
-            for (p, o, unit) in valid_combinations:
-                if unit == u and (p != current_prod or o != current_oper):
-                    continuation_penalty += p_continuation * assign_vars[p, o, unit]
-    
-    prob += (p_unmet * lpSum([unmet_vars[p, o] for p, o in unmet_vars]) + 
-             continuation_penalty +
-             p_assign * lpSum([assign_vars[p, o, u] for (p, o, u) in valid_combinations]) +
-             p_qty * lpSum([qty_vars[p, o, u] for (p, o, u) in valid_combinations]))
+    continuation_terms = []
+    for u, info in eqp_wip.items():
+        current_prod = info['Product']
+        current_oper = info['Operation']
+
+        # 이 장비에 할당 가능한 모든 조합 중, 현재 작업과 다른 것에 페널티
+        for (p, o, _) in unit_tasks.get(u, ()):
+            if p != current_prod or o != current_oper:
+                continuation_terms.append((assign_vars[p, o, u], p_continuation))
+
+    # 목적 함수는 변수별 계수를 누적해 한 번에 생성 (lpSum 중첩에 따른 식 복사 방지)
+    obj_coefs = {unmet_vars[k]: p_unmet for k in unmet_vars}
+    for k in valid_combinations:
+        obj_coefs[assign_vars[k]] = p_assign
+        obj_coefs[qty_vars[k]] = p_qty
+    for var, coef in continuation_terms:
+        obj_coefs[var] += coef
+    prob += LpAffineExpression(obj_coefs)
 
     # 4. 제약 조건 설정
-    for (p, o, u) in valid_combinations:
-        prob += qty_vars[p, o, u] <= 100000 * assign_vars[p, o, u]
-    
+    # A. 할당 연결 제약 (presolve 시 조합별 수량 상한, 아니면 BIG_M)
+    for k in valid_combinations:
+        prob += qty_vars[k] <= qty_ub.get(k, BIG_M) * assign_vars[k]
+
     # B. 수요 충족 제약 (마지막 공정 생산량 + 마지막 공정 재공량 + 미충족량 >= 수요)
     last_oper = opers_list[-1]
     for p, demand in demands.items():
-        relevant_units = [u for (prod, oper, u) in qty_vars if prod == p and oper == last_oper]
+        relevant_units = po_units.get((p, last_oper), [])
         wip_val = wip.get((p, last_oper), 0)
         prob += lpSum([qty_vars[p, last_oper, u] for u in relevant_units]) + wip_val + unmet_vars[p, last_oper] >= demand
 
@@ -94,123 +354,342 @@ def solve_production_allocation(demands=None, eqp_models=None, proc_config=None,
     # 각 공정의 생산량은 (해당 공정 시작 전 대기 재공 + 전 공정 생산량)을 초과할 수 없음
     for p in demands:
         for i, curr_op in enumerate(opers_list):
-            curr_units_p = [u for (prod, oper, u) in qty_vars if prod == p and oper == curr_op]
+            curr_units_p = po_units.get((p, curr_op), [])
             wip_val = wip.get((p, curr_op), 0) # 현재 공정을 진행하기 위해 대기 중인 재공
-            
+            if not curr_units_p:
+                # 이 공정을 할 수 있는 장비가 없으면 생산량 0 <= 재공 (항상 성립)
+                continue
+
             if i == 0:
                 # 첫 공정: 투입 가능한 재공(원소재 등)만큼만 생산 가능
                 prob += lpSum([qty_vars[p, curr_op, u] for u in curr_units_p]) <= wip_val
             else:
                 # 이후 공정: (해당 공정 대기 재공 + 전 공정에서 넘어온 생산량)만큼 생산 가능
                 prev_op = opers_list[i-1]
-                prev_units_p = [u for (prod, oper, u) in qty_vars if prod == p and oper == prev_op]
-                
-                prob += (lpSum([qty_vars[p, curr_op, u] for u in curr_units_p]) <= 
+                prev_units_p = po_units.get((p, prev_op), [])
+
+                prob += (lpSum([qty_vars[p, curr_op, u] for u in curr_units_p]) <=
                          wip_val + lpSum([qty_vars[p, prev_op, u] for u in prev_units_p]))
 
     # D. 툴 제약 (Tool-Hour Capacity)
     # 특정 (제품, 공정) 작업의 총 소요 시간(장비들이 나눠서 하는 시간의 합)은 가용한 툴-시간(Tool-Hours)을 초과할 수 없음
     # 이는 툴 교체 후 반환하여 다른 장비가 순차적으로 사용하는 '반환 및 재사용' 논리를 반영함
-    for (p, o) in [(prod, oper) for prod in demands for oper in opers_list]:
-        tool_qty = tools.get((p, o), 99) # 기본값 99 (제한 없음)
-        
-        # 해당 (p, o)를 수행할 수 있는 모든 (장비, 소요시간) 조합 찾기
-        prod_tasks = []
-        for (prod, oper, model), t in proc_config.items():
-            if prod == p and oper == o:
-                # 이 (p, o)를 처리할 수 있는 모든 유닛들의 수량 변수 확인
-                for u in units:
-                    if model in eqp_models and u in eqp_models[model]:
-                        prod_tasks.append((u, t))
-        
-        if prod_tasks:
+    cycle = index['cycle']
+    for p in demands:
+        for o in opers_list:
+            prod_units = po_units.get((p, o))
+            if not prod_units:
+                continue
+            tool_qty = tools.get((p, o), 99) # 기본값 99 (제한 없음)
             # 총 소요 시간 (분) = Sum(수량 * 사이클타임)
-            total_tool_time_needed = lpSum([qty_vars[p, o, u] * t for (u, t) in prod_tasks])
+            total_tool_time_needed = LpAffineExpression([(qty_vars[p, o, u], cycle[p, o, u]) for u in prod_units])
             # 가용 툴-시간 (분) = 툴 개수 * 장비 가용 시간(1440분)
             prob += total_tool_time_needed <= tool_qty * avail_time
 
-    # E. 장비 가용 시간 제약 (Capacity + EQP WIP)
+    # E. 장비 가용 시간 제약 (Capacity + EQP WIP + 전환 시간 하한)
+    setup = run.get('setup')
     for u in units:
+        assigned_tasks = unit_tasks.get(u)
+        if not assigned_tasks:
+            continue
         # 해당 장비의 현재 작업 종료 시각(End_Time_Offset - 분 단위)을 고려하여 가용 시간 차감
-        occupied_min = 0
-        if u in eqp_wip:
-            occupied_min = eqp_wip[u].get('End_Time_Offset', 0)
-        
-        effective_avail_time = avail_time - occupied_min
-        
-        assigned_tasks = []
-        for (p, o, m), t in proc_config.items():
-            if m in eqp_models and u in eqp_models[m]:
-                assigned_tasks.append((p, o, t))
-        
-        if assigned_tasks:
-            total_unit_time = lpSum([qty_vars[p, o, u] * t for (p, o, t) in assigned_tasks])
-            # (이번에 할당된 작업 시간) <= (실제 사용 가능한 남은 분)
-            prob += total_unit_time <= effective_avail_time
+        occupied_min = eqp_wip[u].get('End_Time_Offset', 0) if u in eqp_wip else 0
+        effective_avail_time = avail_time * pool_size.get(u, 1) - occupied_min
+
+        terms = [(qty_vars[p, o, u], t) for (p, o, t) in assigned_tasks]
+        if setup:
+            setup_lb, credit = setup
+            terms += [(assign_vars[p, o, u], setup_lb[p, o, u]) for (p, o, _) in assigned_tasks if setup_lb[p, o, u]]
+            effective_avail_time += credit.get(u, 0)
+        total_unit_time = LpAffineExpression(terms)
+        # (이번에 할당된 작업 시간 + 전환 시간) <= (실제 사용 가능한 남은 분)
+        prob += total_unit_time <= effective_avail_time
+    t3 = perf_counter()
+    timings['constraints'] = t3 - t2
+    run['model'] = {
+        'variables': len(qty_vars) + len(assign_vars) + len(unmet_vars),
+        'binaries': 0 if run['relax'] else len(assign_vars),
+        'constraints': len(prob.constraints),
+        'nonzeros': sum(len(c) for c in prob.constraints.values()),
+    }
 
-    # 5. 최적화 실행
-    status = prob.solve(PULP_CBC_CMD(msg=0))
+    # 5. 최적화 실행 (시간 제한/갭/스레드/노드 제한 적용, 갭 확인을 위해 로그 파일 기록)
+    options = run['options']
+    fd, log_path = tempfile.mkstemp(suffix='.log', prefix='cbc_')
+    os.close(fd)
+    _notify(run, 'phase', phase='solve')
+    # 진행 콜백이 있으면 풀이 중 CBC 로그를 읽어 개선된 해를 incumbent 이벤트로 전달
+    stop_watch = threading.Event()
+    watcher = None
+    if run.get('progress'):
+        watcher = threading.Thread(target=_watch_cbc_log, args=(log_path, run, stop_watch), daemon=True)
+        watcher.start()
+    try:
+        solver = PULP_CBC_CMD(
+            msg=0,
+            timeLimit=options['time_limit_sec'],
+            gapRel=options['mip_gap'],
+            threads=options['threads'],
+            maxNodes=options['max_nodes'],
+            logPath=log_path,
+            warmStart=bool(warm_start)
+        )
+        status = prob.solve(solver)
+        log_info = _parse_cbc_log(log_path)
+    finally:
+        if watcher is not None:
+            stop_watch.set()
+            watcher.join()
+        os.remove(log_path)
+    timings['solve'] = perf_counter() - t3
     print(f"[Debug] Solver Status: {LpStatus[status]}")
 
-    # 6. 결과 정리
-    if LpStatus[status] in ['Optimal', 'Not Solved']:
-        results = []
-        now = datetime.now()
-        
-        # 장비별 마지막 상태 초기화 (EQP WIP 반영)
-        unit_last_state = {}
-        for u in units:
-            if u in eqp_wip:
-                info = eqp_wip[u]
-                unit_last_state[u] = {
-                    'prod': info['Product'], 
-                    'oper': info['Operation'], 
-                    'time': now + timedelta(minutes=info['End_Time_Offset'])
-                }
-            else:
-                unit_last_state[u] = {'prod': None, 'oper': None, 'time': now}
-        
-        for (p, o, u) in sorted(valid_combinations, key=lambda x: (x[2], x[0])):
-            q = value(qty_vars[p, o, u])
-            if q > 1e-5:
-                model_name = next(m for m, u_list in eqp_models.items() if u in u_list)
-                unit_time = proc_config[(p, o, model_name)]
-                
-                last_info = unit_last_state[u]
-                co_min = get_changeover_time(last_info['prod'], last_info['oper'], p, o)
-                
-                if co_min > 0:
-                    co_start = last_info['time']
-                    co_end = co_start + timedelta(minutes=co_min)
-                    results.append({
-                        'Unit': u, 'Product': 'CHANGEOVER', 'Operation': 'SETUP',
-                        'Quantity': 0, 'Time_Spent_Min': co_min,
-                        'Start_Time': co_start, 'End_Time': co_end, 'Type': 'Setup'
-                    })
-                    last_info['time'] = co_end
-                
-                prod_start = last_info['time']
-                spent_time_min = q * unit_time
-                prod_end = prod_start + timedelta(minutes=spent_time_min)
-                
-                results.append({
-                    'Unit': u, 'Product': p, 'Operation': o,
-                    'Quantity': q, 'Time_Spent_Min': spent_time_min,
-                    'Start_Time': prod_start, 'End_Time': prod_end, 'Type': 'Production'
-                })
-                unit_last_state[u] = {'prod': p, 'oper': o, 'time': prod_end}
-        
-        unmet_results = []
-        for (p, o), var in unmet_vars.items():
-            val = value(var)
-            if val > 1e-5:
-                unmet_results.append({'Product': p, 'Operation': o, 'Unmet_Qty': val})
-        
-        df_res = pd.DataFrame(results)
-        max_workload = 0
-        if not df_res.empty:
-            max_workload = df_res.groupby('Unit')['Time_Spent_Min'].sum().max()
-        
-        return df_res, max_workload, pd.DataFrame(unmet_results)
+    has_solution = prob.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible)
+    if prob.sol_status == LpSolutionOptimal:
+        solver_status = 'OPTIMAL'
+    elif has_solution:
+        solver_status = 'FEASIBLE'
+    elif log_info['stopped']:
+        solver_status = 'TIMEOUT'
     else:
-        return None, 0, pd.DataFrame()
+        solver_status = LpStatus[status].upper()
+    objective = value(prob.objective) if has_solution else None
+    bound = log_info['bound']
+    # CBC 로그의 Gap은 소수 둘째 자리로 반올림되므로 목적값/하한으로 직접 계산
+    if objective is not None and bound is not None:
+        gap = abs(objective - bound) / max(abs(objective), 1e-10)
+    else:
+        gap = log_info['gap']
+    if gap is None and solver_status == 'OPTIMAL':
+        gap = 0.0
+    run['solver'].update({
+        'status': solver_status,
+        'gap': gap,
+        'objective': objective,
+        'bound': bound,
+    })
+
+    if not has_solution:
+        return None
+    qty_vals = {k: var.varValue or 0.0 for k, var in qty_vars.items()}
+    unmet_vals = {k: var.varValue or 0.0 for k, var in unmet_vars.items()}
+    return qty_vals, unmet_vals
+
+def _changeover_minutes(prev_p, prev_o, p, o, conf=None):
+    """
+    get_changeover_time의 벡터화 버전 (이전 제품이 없으면(None) 0)
+    prev_p / prev_o / p / o: 같은 길이의 object 배열
+    """
+    conf = conf or data_config.CHANGEOVER_CONFIG
+    co = np.where(prev_p != p, conf['PRODUCT_SWITCH'],
+                  np.where(prev_o != o, conf['OPER_SWITCH'], 0)).astype(float)
+    exceptions = conf.get('EXCEPTIONS') or {}
+    if exceptions:
+        exc_vals = np.array([exceptions.get(k, np.nan) for k in zip(prev_p, p, o)], dtype=float)
+        co = np.where(np.isnan(exc_vals), co, exc_vals)
+    co[pd.isna(prev_p)] = 0
+    return co
+
+def _timeline_changeovers(prod, eqp_wip, conf):
+    """장비별로 연속된 작업 목록(prod)의 각 작업 직전 전환 시간 (첫 작업은 EQP WIP의 현재 작업 기준)"""
+    unit_arr = prod['Unit'].to_numpy(dtype=object)
+    prod_arr = prod['Product'].to_numpy(dtype=object)
+    oper_arr = prod['Operation'].to_numpy(dtype=object)
+    first = np.ones(len(prod), dtype=bool)
+    first[1:] = unit_arr[1:] != unit_arr[:-1]
+    prev_p = np.concatenate([[None], prod_arr[:-1]])
+    prev_o = np.concatenate([[None], oper_arr[:-1]])
+    prev_p[first] = [eqp_wip[u]['Product'] if u in eqp_wip else None for u in unit_arr[first]]
+    prev_o[first] = [eqp_wip[u]['Operation'] if u in eqp_wip else None for u in unit_arr[first]]
+    return _changeover_minutes(prev_p, prev_o, prod_arr, oper_arr, conf)
+
+def _sequence_timeline(prod, eqp_wip, conf, max_workers=None):
+    """장비별 작업 순서를 전환 시간 최소화 순서로 재배열 (core/sequencing.py)"""
+    from core.sequencing import sequence_units
+    groups = prod.groupby('Unit', sort=False).indices
+    unit_tasks = {
+        u: list(zip(prod['Product'].to_numpy()[idx], prod['Operation'].to_numpy()[idx]))
+        for u, idx in groups.items()
+    }
+    starts = {u: (info['Product'], info['Operation']) for u, info in eqp_wip.items()}
+    orders = sequence_units(unit_tasks, starts, conf, max_workers)
+    positions = np.concatenate([
+        groups[u][orders[u]] if u in orders else groups[u]
+        for u in prod['Unit'].drop_duplicates()
+    ])
+    return prod.iloc[positions].reset_index(drop=True)
+
+def _build_results(index, qty_vals, unmet_vals, eqp_wip, plan_start=None,
+                   changeover_config=None, sequencing='sorted', avail_time=None, seq_info=None):
+    """
+    풀이 결과(수량)로부터 장비별 타임라인(전환 포함)과 미충족 수요 DataFrame 생성
+    장비별 작업 순서를 정하고, 전환/생산 시간의 장비별 누적합으로 시작/종료 시각 계산
+    - sequencing='sorted': (장비, 제품) 순서 / 'heuristic': 장비별 전환 시간 최소화 순서
+    - seq_info: dict를 넘기면 전환 시간 합계와 가용 시간 초과 장비(전환 포함) 기록
+    """
+    now = plan_start or datetime.now()
+    conf = changeover_config or data_config.CHANGEOVER_CONFIG
+    combos = index['combos']
+    qty = np.fromiter((qty_vals[k] for k in combos), dtype=float, count=len(combos))
+    produced = qty > 1e-5
+
+    unmet_results = [{'Product': p, 'Operation': o, 'Unmet_Qty': val}
+                     for (p, o), val in unmet_vals.items() if val > 1e-5]
+    df_unmet = pd.DataFrame(unmet_results)
+    if not produced.any():
+        return pd.DataFrame(), 0, df_unmet
+
+    cycle = index['cycle']
+    rows = [k for k, f in zip(combos, produced) if f]
+    prod = pd.DataFrame(rows, columns=['Product', 'Operation', 'Unit'])
+    prod['Quantity'] = qty[produced]
+    prod['Time_Spent_Min'] = prod['Quantity'] * np.fromiter((cycle[k] for k in rows), dtype=float, count=len(rows))
+    # 기본 순서: (장비, 제품) 기준 안정 정렬
+    prod = prod.sort_values(['Unit', 'Product'], kind='stable').reset_index(drop=True)
+    co_min = _timeline_changeovers(prod, eqp_wip, conf)
+
+    if sequencing == 'heuristic':
+        sorted_setup = float(co_min.sum())
+        prod = _sequence_timeline(prod, eqp_wip, conf)
+        co_min = _timeline_changeovers(prod, eqp_wip, conf)
+        if seq_info is not None:
+            seq_info['setup_min_sorted'] = sorted_setup
+    elif sequencing != 'sorted':
+        raise ValueError(f"Unknown sequencing method: {sequencing}")
+
+    wip_end = {u: info['End_Time_Offset'] for u, info in eqp_wip.items()}
+    # 장비별 시작 오프셋 + (전환 + 생산) 누적합 = 각 생산 작업의 종료 시각(분)
+    start_offset = prod['Unit'].map(wip_end).fillna(0).to_numpy(dtype=float)
+    prod_end = start_offset + (prod['Time_Spent_Min'] + co_min).groupby(prod['Unit'], sort=False).cumsum().to_numpy()
+    prod_start = prod_end - prod['Time_Spent_Min'].to_numpy()
+
+    # 분 -> 마이크로초 정수 변환 후 기준 시각에 더함 (timedelta와 같은 해상도)
+    # 컬럼 dtype은 datetime 객체로 만들던 기존 결과와 동일하게 (pandas 버전별 추론 단위)
+    base = np.datetime64(now, 'us')
+    time_dtype = pd.Series([now]).dtype
+
+    def to_time(minutes):
+        return pd.Series(base + np.rint(minutes * 60e6).astype('timedelta64[us]')).astype(time_dtype).to_numpy()
+
+    prod['Start_Time'] = to_time(prod_start)
+    prod['End_Time'] = to_time(prod_end)
+    prod['Type'] = 'Production'
+    prod['_order'] = np.arange(len(prod)) * 2 + 1
+
+    has_co = co_min > 0
+    setup = pd.DataFrame({
+        'Unit': prod['Unit'][has_co].to_numpy(),
+        'Product': 'CHANGEOVER', 'Operation': 'SETUP',
+        'Quantity': 0.0,
+        'Time_Spent_Min': co_min[has_co],
+        'Start_Time': to_time(prod_start[has_co] - co_min[has_co]),
+        'End_Time': prod['Start_Time'][has_co].to_numpy(),
+        'Type': 'Setup',
+        '_order': prod['_order'][has_co].to_numpy() - 1,
+    })
+
+    if seq_info is not None:
+        seq_info.update({'method': sequencing, 'setup_min': float(co_min.sum())})
+        if avail_time is not None:
+            # 전환 시간까지 포함한 장비별 종료 시각이 가용 시간을 넘는지 확인
+            unit_end = pd.Series(prod_end).groupby(prod['Unit'].to_numpy(), sort=False).max()
+            overrun = unit_end[unit_end > avail_time + 1e-6] - avail_time
+            seq_info['overrun_units'] = int(len(overrun))
+            seq_info['max_overrun_min'] = float(overrun.max()) if len(overrun) else 0.0
+
+    columns = ['Unit', 'Product', 'Operation', 'Quantity', 'Time_Spent_Min', 'Start_Time', 'End_Time', 'Type']
+    df_res = pd.concat([setup, prod], ignore_index=True).sort_values('_order')[columns].reset_index(drop=True)
+    max_workload = df_res.groupby('Unit')['Time_Spent_Min'].sum().max()
+    return df_res, max_workload, df_unmet
+
+def _parse_cbc_log(log_path):
+    """CBC 로그에서 종료 사유, 하한(Lower bound), 갭(Gap) 추출"""
+    info = {'stopped': False, 'bound': None, 'gap': None}
+    with open(log_path, 'r', errors='ignore') as f:
+        log_text = f.read()
+    if re.search(r'^Result - Stopped', log_text, re.M):
+        info['stopped'] = True
+    m = re.search(r'^Lower bound:\s+(\S+)', log_text, re.M)
+    if m:
+        info['bound'] = float(m.group(1))
+    m = re.search(r'^Gap:\s+(\S+)', log_text, re.M)
+    if m:
+        info['gap'] = float(m.group(1))
+    return info
+
+def _notify(run, kind, **data):
+    """진행 콜백 호출 (콜백 오류는 풀이에 영향을 주지 않음)"""
+    callback = run.get('progress')
+    if callback is None:
+        return
+    try:
+        callback(kind, data)
+    except Exception as e:
+        print(f"[Debug] Progress callback failed: {e}")
+
+def _watch_cbc_log(log_path, run, stop, interval=0.5):
+    """
+    풀이 중 CBC 로그를 주기적으로 읽어 최선해/하한이 개선될 때마다 incumbent 이벤트 전달 (stop까지)
+    CBC 출력은 블록 단위로 기록되므로 이벤트가 몇 초씩 묶여서 전달될 수 있음
+    """
+    t0 = perf_counter()
+    pos, partial = 0, ''
+    best_obj = best_bound = None
+    while True:
+        finished = stop.wait(interval)
+        try:
+            with open(log_path, 'r', errors='ignore') as f:
+                f.seek(pos)
+                chunk = f.read()
+                pos = f.tell()
+        except OSError:
+            chunk = ''
+        lines = (partial + chunk).split('\n')
+        partial = '' if finished else lines.pop()
+        for line in lines:
+            m = CBC_INCUMBENT_RE.match(line)
+            obj, bound = (float(m.group(1)), None) if m else (None, None)
+            m = CBC_PROGRESS_RE.match(line)
+            if m:
+                obj, bound = float(m.group(1)), float(m.group(2))
+            # 해가 없을 때 CBC는 최선해를 1e+50으로 표시
+            if obj is None or obj >= 1e49:
+                continue
+            improved = best_obj is None or obj < best_obj - 1e-9
+            bound_moved = bound is not None and (best_bound is None or bound > best_bound + 1e-9)
+            if not (improved or bound_moved):
+                continue
+            best_obj = obj if best_obj is None else min(best_obj, obj)
+            if bound is not None:
+                best_bound = bound if best_bound is None else max(best_bound, bound)
+            gap = abs(best_obj - best_bound) / max(abs(best_obj), 1e-10) if best_bound is not None else None
+            _notify(run, 'incumbent', objective=best_obj, bound=best_bound, gap=gap,
+                    elapsed_sec=perf_counter() - t0)
+        if finished:
+            return
+
+def _report_timings(run, n_combos, stats):
+    """단계별 소요 시간/솔버 결과 출력 및 (요청 시) stats 딕셔너리에 기록"""
+    timings = run['timings']
+    summary = ", ".join(f"{k}={v:.3f}s" for k, v in timings.items())
+    print(f"[Debug] Timing ({n_combos} combos): {summary}")
+    model = run.get('model')
+    if model:
+        print(f"[Debug] Model Size: {model['variables']} vars ({model['binaries']} binary), "
+              f"{model['constraints']} constraints, {model['nonzeros']} nonzeros")
+    solver = run['solver']
+    if solver.get('status'):
+        gap = solver.get('gap')
+        gap_txt = f"{gap:.4%}" if gap is not None else "n/a"
+        print(f"[Debug] Solver Result: {solver['status']} (gap={gap_txt})")
+    if stats is not None:
+        stats['timings'] = dict(timings)
+        stats['n_combinations'] = n_combos
+        stats['solver'] = dict(solver)
+        stats['model'] = dict(model or {})
+        if run.get('sequencing'):
+            stats['sequencing'] = dict(run['sequencing'])
+        if run.get('presolve'):
+            stats['presolve'] = dict(run['presolve'])
+        if run.get('symmetry'):
+            stats['symmetry'] = dict(run['symmetry'])
@@ -0,0 +1,103 @@
+"""
+MILP 사전 축소 (Presolve) 및 변수 상한 조이기
+
+변수 생성 전에 build_model_index 결과에서 쓸 수 없는 (제품, 공정, 장비) 조합을 제거하고
+조합별 수량 상한을 계산하여 연결 제약 Qty <= 상한 * Assign 의 상수(BIG_M 대신)로 사용
+- 장비 여유 시간: 가용 시간 - 현재 작업 잔여 시간 (0 이하인 장비의 조합 제거)
+- 툴-시간: 툴 개수 * 가용 시간 (툴 0개인 (제품, 공정) 조합 제거)
+- 전방 흐름 상한: 공정 순서대로 min(해당 공정 재공 + 전 공정 생산 상한, 장비/툴 용량)
+- 후방 필요량: 마지막 공정 (수요 - 재공)부터 역순으로 (다음 공정 처리 가능량 - 다음 공정 재공)
+  모든 수량/할당에 양의 비용이 있으므로 필요량을 넘는 생산은 최적해에 나타나지 않음
+  (수요가 없거나 재공으로 이미 충족된 제품의 조합은 모두 제거)
+조합을 제거하면 다른 상한이 다시 줄어들 수 있으므로 변화가 없을 때까지 반복
+"""
+from core.optimizer import BIG_M
+
+# 이 값 이하의 상한은 0으로 간주하여 조합 제거
+UB_EPS = 1e-6
+MAX_PASSES = 10
+
+def _rebuild_index(index, combos, qty_ub):
+    """남은 조합으로 po_units / unit_tasks 재구성 (units/unit_model/cycle은 그대로 유지)"""
+    cycle = index['cycle']
+    po_units, unit_tasks = {}, {}
+    for p, o, u in combos:
+        po_units.setdefault((p, o), []).append(u)
+        unit_tasks.setdefault(u, []).append((p, o, cycle[p, o, u]))
+    return dict(index, combos=combos, po_units=po_units, unit_tasks=unit_tasks, qty_ub=qty_ub)
+
+def _model_rows(index, demands):
+    """모델 행 수 (연결 + 장비 시간 + (제품, 공정)별 흐름/툴) - 축소 전후 비교용"""
+    n_po = sum(p in demands for p, _ in index['po_units'])
+    return len(index['combos']) + len(index['unit_tasks']) + 2 * n_po
+
+def presolve_index(index, demands, opers_list, avail_time, wip, eqp_wip, tools):
+    """
+    반환: (축소된 index, 축소 통계 dict)
+    축소된 index['qty_ub']: {(p,o,u): 수량 상한}
+    """
+    cycle = index['cycle']
+    unit_cap = {}
+    for u in index['units']:
+        occupied = eqp_wip[u].get('End_Time_Offset', 0) if u in eqp_wip else 0
+        unit_cap[u] = avail_time - occupied
+    tool_cap = {po: tools.get(po, 99) * avail_time for po in index['po_units']}
+
+    full_units = {u for u in index['unit_tasks'] if unit_cap[u] <= UB_EPS}
+    zero_tools = {po for po, cap in tool_cap.items() if cap <= UB_EPS}
+    combos = [k for k in index['combos'] if k[2] not in full_units and k[:2] not in zero_tools]
+
+    for _ in range(MAX_PASSES):
+        # 1. 조합별 용량 상한 (장비 여유 시간, 툴-시간) 및 (제품, 공정)별 처리 가능량
+        cap_ub = {}
+        po_cap, po_cycle = {}, {}
+        for k in combos:
+            t = cycle[k]
+            po = k[:2]
+            cap_ub[k] = min(unit_cap[k[2]], tool_cap[po]) / t if t > 0 else float(BIG_M)
+            po_cap[po] = po_cap.get(po, 0.0) + cap_ub[k]
+            po_cycle[po] = min(po_cycle.get(po, t), t)
+        for po, t_min in po_cycle.items():
+            # 툴-시간은 (제품, 공정)의 모든 장비가 공유하므로 가장 짧은 사이클타임 기준으로도 제한
+            if t_min > 0:
+                po_cap[po] = min(po_cap[po], tool_cap[po] / t_min)
+
+        # 2. 공정 흐름을 따라 전방 생산 상한 / 후방 필요량
+        po_ub = {}
+        for p in demands:
+            flow_ub = []
+            reach = 0.0
+            for o in opers_list:
+                reach = min(wip.get((p, o), 0) + reach, po_cap.get((p, o), 0.0))
+                flow_ub.append(reach)
+            need = max(demands[p] - wip.get((p, opers_list[-1]), 0), 0)
+            for o, ub in zip(reversed(opers_list), reversed(flow_ub)):
+                po_ub[p, o] = min(ub, need)
+                # 앞 공정은 이 공정이 실제로 처리할 수 있는 양에서 이 공정 재공을 뺀 만큼만 공급하면 됨
+                need = max(min(need, po_cap.get((p, o), 0.0)) - wip.get((p, o), 0), 0)
+
+        # 3. 조합별 상한 = min(BIG_M, 용량 상한, (제품, 공정) 생산 상한) - 0이면 제거
+        qty_ub = {}
+        for k in combos:
+            ub = min(float(BIG_M), cap_ub[k], po_ub.get(k[:2], 0.0))
+            if ub > UB_EPS:
+                qty_ub[k] = ub
+        if len(qty_ub) == len(combos):
+            break
+        combos = [k for k in combos if k in qty_ub]
+
+    reduced = _rebuild_index(index, combos, qty_ub)
+    n_removed = len(index['combos']) - len(combos)
+    stats = {
+        'combos_removed': n_removed,
+        'variables_removed': 2 * n_removed,
+        'constraints_removed': _model_rows(index, demands) - _model_rows(reduced, demands),
+        'full_units': len(full_units),
+        'zero_tool_pairs': len(zero_tools),
+        'bound_tightened': sum(ub < BIG_M for ub in qty_ub.values()),
+    }
+    print(f"[Debug] Presolve: removed {n_removed}/{len(index['combos'])} combos "
+          f"({stats['variables_removed']} vars, {stats['constraints_removed']} constraints; "
+          f"{len(full_units)} full units, {len(zero_tools)} zero-tool pairs), "
+          f"{stats['bound_tightened']} big-M bounds tightened")
+    return reduced, stats
@@ -0,0 +1,95 @@
+import os
+import signal
+import threading
+import multiprocessing as mp
+from time import monotonic
+
+class JobCancelled(Exception):
+    pass
+
+class JobTimeout(Exception):
+    pass
+
+def _child_entry(conn, func, args, with_progress=False):
+    """
+    워커 프로세스 진입점
+    새 세션(프로세스 그룹)을 만들어 CBC 등 자식 프로세스까지 한 번에 종료할 수 있게 함
+    with_progress: func에 progress(kind, data) 콜백을 넘기고 진행 이벤트를 파이프로 부모에 전달
+    """
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    send_lock = threading.Lock()
+
+    def send(msg):
+        # 풀이 스레드와 로그 감시 스레드가 동시에 보낼 수 있으므로 잠금
+        with send_lock:
+            conn.send(msg)
+
+    try:
+        kwargs = {'progress': lambda kind, data: send(('progress', (kind, data)))} if with_progress else {}
+        send(('result', func(*args, **kwargs)))
+    except Exception as e:
+        send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+def _kill_process_tree(proc):
+    """워커 프로세스와 그 자식(CBC 솔버 등)을 모두 강제 종료"""
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        # Windows: 프로세스 그룹이 없으므로 psutil(설치 시)로 자식 프로세스 정리
+        try:
+            import psutil
+            for child in psutil.Process(proc.pid).children(recursive=True):
+                child.kill()
+        except Exception:
+            pass
+    if proc.is_alive():
+        proc.kill()
+    proc.join(5)
+
+def run_in_process(func, args=(), timeout=None, cancel_event=None, poll_interval=0.2, progress=None):
+    """
+    func(*args)를 별도 프로세스에서 실행하고 반환값을 전달받음
+    - progress가 있으면 func(*args, progress=...)로 호출하고, 워커의 진행 이벤트를 이 프로세스에서 progress(kind, data)로 전달
+    - timeout(초) 초과 시 프로세스 트리를 종료하고 JobTimeout 발생
+    - cancel_event가 set 되면 프로세스 트리를 종료하고 JobCancelled 발생
+    - func 내부 예외는 RuntimeError로 전달
+    func/args/반환값은 pickle 가능해야 함 (spawn 방식 사용)
+    """
+    ctx = mp.get_context('spawn')
+    recv_conn, send_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child_entry, args=(send_conn, func, args, progress is not None))
+    proc.start()
+    send_conn.close()
+
+    deadline = monotonic() + timeout if timeout else None
+    try:
+        while True:
+            if recv_conn.poll(poll_interval):
+                try:
+                    kind, payload = recv_conn.recv()
+                except EOFError:
+                    raise RuntimeError(f"Worker process exited unexpectedly (exitcode={proc.exitcode})")
+                if kind != 'progress':
+                    proc.join()
+                    if kind == 'error':
+                        raise RuntimeError(payload)
+                    return payload
+                progress(*payload)
+            elif not proc.is_alive() and not recv_conn.poll():
+                raise RuntimeError(f"Worker process exited unexpectedly (exitcode={proc.exitcode})")
+            if cancel_event is not None and cancel_event.is_set():
+                _kill_process_tree(proc)
+                raise JobCancelled()
+            if deadline is not None and monotonic() > deadline:
+                _kill_process_tree(proc)
+                raise JobTimeout(f"Job exceeded wall-clock timeout ({timeout}s)")
+    finally:
+        recv_conn.close()
+        if proc.is_alive():
+            _kill_process_tree(proc)
@@ -0,0 +1,302 @@
+"""
+최적화 결과 메모이제이션 (입력 지문 기반)
+
+- 지문: 모든 입력(수요/장비 모델/공정 설정/WIP/EQP WIP/툴/전환 설정/가용 시간/공정 순서)과
+  풀이 설정(backend, solver_options, decompose, relax, sequencing)을 정규화한 JSON의 SHA-256
+  (dict 순서 무관, 정수/실수 동일 취급, warm_start와 plan_start는 제외)
+- 저장소: <dir>/results.db (SQLite) - API 워커/작업 프로세스/대시보드가 같은 파일을 공유
+  LAST_USED 기준 LRU로 항목 수(max_entries)와 전체 크기(max_mb)를 제한
+- 동시 요청: 같은 지문의 풀이가 진행 중이면 새로 풀지 않고 그 결과를 기다림
+  (같은 프로세스는 Event, 다른 프로세스는 INFLIGHT 테이블 점유 행으로 확인)
+- 적중 시 결과의 Start_Time/End_Time을 이번 plan_start 기준으로 이동
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import yaml
+from config import data_config, resolve_path
+from core.optimizer import solve_production_allocation, DEFAULT_SOLVER_OPTIONS
+
+# config.yaml optimization.result_cache 기본값
+DEFAULT_RESULT_CACHE = {
+    'enabled': True,
+    'dir': 'cache',
+    'max_entries': 64,   # 보관할 결과 수
+    'max_mb': 512,       # 보관할 결과 전체 크기 (MB)
+    'wait_sec': 600,     # 진행 중인 동일 풀이를 기다리는 최대 시간 (초과 시 직접 풀이)
+}
+# 다른 프로세스의 진행 중 풀이 완료 여부 확인 주기 (초)
+POLL_SEC = 0.2
+COUNTER_NAMES = ('hit', 'miss', 'shared')
+
+_SOLVE_DEFAULTS = {
+    name: p.default for name, p in inspect.signature(solve_production_allocation).parameters.items()
+}
+
+def _canonical(obj):
+    """지문 계산용 정규화 (dict는 키 정렬 목록, 숫자는 float, 그 외 스칼라는 문자열)"""
+    if isinstance(obj, dict):
+        items = [(json.dumps(_canonical(k), separators=(',', ':')), _canonical(v)) for k, v in obj.items()]
+        items.sort(key=lambda kv: kv[0])
+        return [[k, v] for k, v in items]
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_canonical(v) for v in obj), key=json.dumps)
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if obj is None or isinstance(obj, bool):
+        return obj
+    if isinstance(obj, (int, float)):
+        return float(obj)
+    return str(obj)
+
+def fingerprint(inputs):
+    """정규화한 입력 dict의 SHA-256 (hex)"""
+    payload = json.dumps(_canonical(inputs), separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def solve_key(**kwargs):
+    """
+    solve_production_allocation 인자에 대한 캐시 키
+    None 인자는 solve_production_allocation과 같은 기본값(data_config 등)으로 채운 뒤 계산
+    """
+    arg = lambda name: kwargs.get(name, _SOLVE_DEFAULTS[name])
+    options = dict(DEFAULT_SOLVER_OPTIONS)
+    options.update({k: v for k, v in (arg('solver_options') or {}).items() if v is not None})
+    return fingerprint({
+        'demands': data_config.DEMAND if arg('demands') is None else arg('demands'),
+        'eqp_models': data_config.EQUIPMENT_MODELS if arg('eqp_models') is None else arg('eqp_models'),
+        'proc_config': data_config.PROCESS_CONFIG if arg('proc_config') is None else arg('proc_config'),
+        'avail_time': arg('avail_time') or data_config.AVAILABLE_TIME,
+        'opers_list': arg('opers_list') or data_config.OPERATIONS,
+        'wip': data_config.WIP if arg('wip') is None else arg('wip'),
+        'eqp_wip': arg('eqp_wip') or {},
+        'tools': arg('tools') or {},
+        'changeover_config': arg('changeover_config') or data_config.CHANGEOVER_CONFIG,
+        'settings': {
+            'backend': arg('backend'),
+            'solver_options': options,
+            'decompose': bool(arg('decompose')),
+            'relax': bool(arg('relax')),
+            'sequencing': arg('sequencing'),
+            'presolve': bool(arg('presolve')),
+            'aggregate_units': bool(arg('aggregate_units')),
+            'setup_capacity': bool(arg('setup_capacity')),
+        },
+    })
+
+class ResultCache:
+    def __init__(self, cache_dir, max_entries=64, max_mb=512, wait_sec=600):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'results.db')
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.wait_sec = wait_sec
+        self._lock = threading.Lock()
+        self._inflight = {}  # {key: Event} - 이 프로세스에서 진행 중인 풀이
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS RESULT ("
+                "KEY TEXT PRIMARY KEY, CREATED_AT REAL, LAST_USED REAL, SIZE INTEGER, PAYLOAD BLOB)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS INFLIGHT (KEY TEXT PRIMARY KEY, OWNER TEXT, STARTED_AT REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS COUNTER (NAME TEXT PRIMARY KEY, VALUE INTEGER)")
+            conn.executemany("INSERT OR IGNORE INTO COUNTER (NAME, VALUE) VALUES (?, 0)",
+                             [(n,) for n in COUNTER_NAMES])
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        """반환: 저장된 payload 또는 없으면 None (조회 시 LRU 순서 갱신)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT PAYLOAD FROM RESULT WHERE KEY = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE RESULT SET LAST_USED = ? WHERE KEY = ?", (time.time(), key))
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            # 손상된 항목은 없는 것으로 처리 (다음 풀이 결과로 덮어씀)
+            return None
+
+    def put(self, key, payload):
+        blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO RESULT (KEY, CREATED_AT, LAST_USED, SIZE, PAYLOAD) VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(blob), blob)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """항목 수 / 전체 크기 한도를 넘으면 가장 오래 사용하지 않은 항목부터 삭제"""
+        rows = conn.execute("SELECT KEY, SIZE FROM RESULT ORDER BY LAST_USED DESC").fetchall()
+        total, stale = 0, []
+        for i, (key, size) in enumerate(rows):
+            total += size
+            # 가장 최근 항목은 크기 한도를 넘더라도 유지
+            if i > 0 and (i >= self.max_entries or total > self.max_bytes):
+                stale.append((key,))
+        if stale:
+            conn.executemany("DELETE FROM RESULT WHERE KEY = ?", stale)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM RESULT")
+
+    def _count(self, name):
+        with self._connect() as conn:
+            conn.execute("UPDATE COUNTER SET VALUE = VALUE + 1 WHERE NAME = ?", (name,))
+
+    def counters(self):
+        """모든 프로세스 누적 적중/미적중/공유 횟수와 현재 항목 수, 크기"""
+        with self._connect() as conn:
+            result = dict(conn.execute("SELECT NAME, VALUE FROM COUNTER").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(SIZE), 0) FROM RESULT").fetchone()
+        result.update({'entries': entries, 'size_mb': size / (1024 * 1024)})
+        return result
+
+    def _claim(self, key):
+        """다른 프로세스와의 중복 풀이 방지용 점유 (wait_sec보다 오래된 점유는 중단된 것으로 보고 인계)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM INFLIGHT WHERE KEY = ? AND STARTED_AT < ?", (key, now - self.wait_sec))
+            cur = conn.execute("INSERT OR IGNORE INTO INFLIGHT (KEY, OWNER, STARTED_AT) VALUES (?, ?, ?)",
+                               (key, str(os.getpid()), now))
+            return cur.rowcount == 1
+
+    def _release(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM INFLIGHT WHERE KEY = ? AND OWNER = ?", (key, str(os.getpid())))
+
+    def _wait_other_process(self, key):
+        """다른 프로세스가 점유한 풀이를 기다림 - 반환: 결과 또는 점유를 넘겨받으면 None"""
+        deadline = time.time() + self.wait_sec
+        while time.time() < deadline:
+            hit = self.get(key)
+            if hit is not None:
+                return hit
+            if self._claim(key):
+                return None
+            time.sleep(POLL_SEC)
+        return None
+
+    def get_or_compute(self, key, compute):
+        """
+        compute(): (저장 여부, payload)
+        반환: (payload, 'hit' | 'shared' | 'miss')
+        """
+        hit = self.get(key)
+        if hit is not None:
+            self._count('hit')
+            return hit, 'hit'
+
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            # 같은 프로세스의 동일 풀이 완료 대기 (실패하면 직접 풀이)
+            event.wait(self.wait_sec)
+            hit = self.get(key)
+            if hit is not None:
+                self._count('shared')
+                return hit, 'shared'
+            self._count('miss')
+            return compute()[1], 'miss'
+
+        claimed = False
+        try:
+            claimed = self._claim(key)
+            if not claimed:
+                hit = self._wait_other_process(key)
+                if hit is not None:
+                    self._count('shared')
+                    return hit, 'shared'
+                claimed = True
+            self._count('miss')
+            cacheable, payload = compute()
+            if cacheable:
+                self.put(key, payload)
+            return payload, 'miss'
+        finally:
+            if claimed:
+                self._release(key)
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+_instance = None
+_instance_lock = threading.Lock()
+
+def get_result_cache():
+    """config.yaml optimization.result_cache 설정의 프로세스 공용 캐시 (비활성화 시 None)"""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
+            with open(config_path, 'r', encoding='utf-8') as f:
+                conf = dict(DEFAULT_RESULT_CACHE)
+                conf.update((yaml.safe_load(f) or {}).get('optimization', {}).get('result_cache') or {})
+            if not conf['enabled']:
+                return None
+            _instance = ResultCache(resolve_path(conf['dir']), conf['max_entries'], conf['max_mb'], conf['wait_sec'])
+        return _instance
+
+def _rebase(df, delta):
+    """결과 타임라인을 delta만큼 이동한 복사본"""
+    if df is None or df.empty or not delta:
+        return df
+    df = df.copy()
+    for col in ('Start_Time', 'End_Time'):
+        if col in df.columns:
+            df[col] = df[col] + delta
+    return df
+
+def cached_solve(cache=None, stats=None, **kwargs):
+    """
+    solve_production_allocation과 같은 인자/반환값, 동일 입력이면 저장된 결과 재사용
+    cache: ResultCache (None이면 get_result_cache(), 비활성화 상태면 바로 풀이)
+    stats['cache']: {'state': 'hit' | 'shared' | 'miss', 'key': 지문 앞 12자리, 'sec': 캐시 경로 전체 소요 시간}
+    해가 없는 결과(df_res가 None)는 저장하지 않음
+    """
+    cache = cache or get_result_cache()
+    if cache is None:
+        return solve_production_allocation(stats=stats, **kwargs)
+
+    t0 = time.perf_counter()
+    key = solve_key(**kwargs)
+    plan_start = kwargs.pop('plan_start', None) or datetime.now()
+
+    def compute():
+        solve_stats = {}
+        df_res, max_workload, df_unmet = solve_production_allocation(
+            stats=solve_stats, plan_start=plan_start, **kwargs
+        )
+        payload = {'df_res': df_res, 'max_workload': max_workload, 'df_unmet': df_unmet,
+                   'stats': solve_stats, 'plan_start': plan_start}
+        return df_res is not None, payload
+
+    payload, state = cache.get_or_compute(key, compute)
+    df_res = payload['df_res']
+    if state != 'miss':
+        df_res = _rebase(df_res, plan_start - payload['plan_start'])
+        print(f"[Debug] Result cache {state}: {key[:12]}")
+    if stats is not None:
+        stats.update(payload['stats'])
+        if state != 'miss':
+            # 적중 시 모델 생성/풀이 시간은 0 (조회 시간만 기록)
+            stats['timings'] = {}
+        stats['cache'] = {'state': state, 'key': key[:12], 'sec': time.perf_counter() - t0}
+    return df_res, payload['max_workload'], payload['df_unmet']
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+from time import perf_counter
+import pandas as pd
+from core.optimizer import solve_production_allocation
+
+def _lookahead_shortfall(day, daily_demands, lookahead_days, eqp_models, proc_config, avail_time,
+                         opers_list, wip, eqp_wip, tools, solve_kwargs, inventory=None, backlog=None):
+    """
+    당일 계획 이후 상태(wip, eqp_wip, 완제품 재고 inventory, 미납 backlog)에서 시작해
+    다음 1 ~ lookahead_days 일의 누적 수요를 각각 하나의 거친 버킷(가용 시간 x 일수)으로 묶은 LP 완화 문제로 풀고
+    어느 기간이든 자체 능력과 재고로 충족하지 못하는 제품별 최대 수요(선행 생산 필요량)를 반환
+    (기간별로 풀어 납기를 반영 - 뒤쪽 날의 여유 능력이 앞쪽 날 부족분을 가리지 않도록)
+    """
+    future = daily_demands[day + 1: day + 1 + lookahead_days]
+    inventory = inventory or {}
+    kwargs = {k: v for k, v in solve_kwargs.items() if k not in ('warm_start', 'decompose')}
+    cum_demand = {p: q for p, q in (backlog or {}).items() if q > 0}
+    shortfall = {}
+    for n_days, d in enumerate(future, 1):
+        for p, q in d.items():
+            cum_demand[p] = cum_demand.get(p, 0) + q
+        net = {p: q - inventory.get(p, 0) for p, q in cum_demand.items() if q - inventory.get(p, 0) > 1e-6}
+        if not net:
+            continue
+        _, _, df_unmet = solve_production_allocation(
+            demands=net, eqp_models=eqp_models, proc_config=proc_config,
+            avail_time=avail_time * n_days, opers_list=opers_list, wip=wip, eqp_wip=eqp_wip,
+            tools=tools, relax=True, **kwargs
+        )
+        if df_unmet is None or df_unmet.empty:
+            continue
+        last = df_unmet[df_unmet['Operation'] == opers_list[-1]]
+        for p, q in zip(last['Product'], last['Unmet_Qty']):
+            shortfall[p] = max(shortfall.get(p, 0), q)
+    return shortfall
+
+def _ship(need, finished, fg):
+    """완제품 재고 + 당일 완성품으로 필요량 출하 - 반환: (출하량, 다음 날 재고, 미납)"""
+    shipped, next_fg, backlog = {}, {}, {}
+    for p in set(need) | set(finished) | set(fg):
+        available = fg.get(p, 0) + finished.get(p, 0)
+        shipped[p] = min(need.get(p, 0), available)
+        next_fg[p] = available - shipped[p]
+        backlog[p] = need.get(p, 0) - shipped[p]
+    return shipped, next_fg, backlog
+
+def _carry_state(df_res, day_start, opers_list, wip, eqp_wip, base_tools, avail_time):
+    """
+    하루 계획 결과로 다음 날 시작 상태 계산
+    - WIP: 공정별 (재공 + 전 공정 생산 - 해당 공정 생산)
+    - EQP_WIP: 장비별 마지막 생산 작업, 하루를 넘긴 시간은 다음 날 End_Time_Offset
+    - TOOLS: 원래 툴 수(base_tools)에서 하루를 넘겨 계속 사용되는 툴-시간만큼만 다음 날 가용 툴 수 차감
+      (전날 차감분은 누적하지 않음 - 넘긴 작업은 다음 날 안에 끝나므로 그 다음 날에는 원래 수량으로 복귀)
+    반환: (next_wip, next_eqp_wip, next_tools, 제품별 마지막 공정 생산량)
+    """
+    prod = df_res[df_res['Type'] == 'Production'] if not df_res.empty else df_res
+    made = prod.groupby(['Product', 'Operation'])['Quantity'].sum().to_dict() if not prod.empty else {}
+
+    next_wip = dict(wip)
+    products = {p for p, _ in wip} | {p for p, _ in made}
+    for p in products:
+        for i, o in enumerate(opers_list):
+            inflow = made.get((p, opers_list[i - 1]), 0) if i > 0 else 0
+            next_wip[p, o] = max(0.0, wip.get((p, o), 0) + inflow - made.get((p, o), 0))
+    finished = {p: made.get((p, opers_list[-1]), 0) for p in products}
+
+    # 작업이 없던 장비는 이전 작업 정보를 유지하고 남은 시간만 하루만큼 경과 처리
+    next_eqp_wip = {
+        u: dict(info, End_Time_Offset=max(0, info['End_Time_Offset'] - avail_time))
+        for u, info in eqp_wip.items()
+    }
+    next_tools = dict(base_tools)
+    if not prod.empty:
+        last_rows = prod.sort_values('End_Time').groupby('Unit').tail(1)
+        for row in last_rows.itertuples(index=False):
+            overflow = (row.End_Time - day_start).total_seconds() / 60.0 - avail_time
+            next_eqp_wip[row.Unit] = {
+                'Product': row.Product,
+                'Operation': row.Operation,
+                'End_Time_Offset': max(0, overflow),
+            }
+            key = (row.Product, row.Operation)
+            if overflow > 0 and key in next_tools:
+                next_tools[key] = max(0, next_tools[key] - overflow / avail_time)
+    return next_wip, next_eqp_wip, next_tools, finished
+
+def solve_rolling_horizon(daily_demands, eqp_models, proc_config, avail_time, opers_list, wip, eqp_wip, tools,
+                          lookahead_days=2, releases=None, plan_start=None, stats=None, **solve_kwargs):
+    """
+    다일 계획 (Rolling Horizon)
+    - 매일: 당일 필요량으로 상세 MILP를 풀고, 그 결과 상태(WIP/재고)에서 이후 1 ~ lookahead_days 일의 누적 수요를
+      집계 LP(완화)로 풀어 부족분이 있으면 선행 생산 필요량을 더해 당일을 다시 풀이
+      (당일 생산으로 소비되는 WIP와 이미 쌓인 재고를 빼고 계산하므로 선행 생산을 중복 반영하지 않음)
+    - 당일 결과로 WIP / EQP_WIP / 툴 사용 / 완제품 재고 / 미납(backlog)을 다음 날로 이월
+    - 일별 모델 크기는 전체 기간 길이와 무관 (상세 1일 + 집계 최대 lookahead_days 버킷)
+
+    daily_demands: 일별 수요 리스트 [{제품: 수량}, ...]
+    releases: 일별 투입 재공 리스트 [{(제품, 공정): 수량}, ...] (해당 일 시작 시 WIP에 추가)
+    solve_kwargs: solve_production_allocation 옵션 (backend, solver_options, decompose ...)
+    반환: (전체 기간 df_res, 최대 일 부하, df_unmet) - 결과에 Day 컬럼 추가
+    """
+    plan_start = plan_start or datetime.now()
+    base_tools = dict(tools or {})  # 원래 툴 수 (일별 툴 수는 여기서 전날 넘긴 사용량만 차감)
+    wip, eqp_wip, tools = dict(wip), dict(eqp_wip or {}), dict(base_tools)
+    fg, backlog = {}, {}
+    res_frames, unmet_frames, day_stats = [], [], []
+    max_workload = 0
+    t0 = perf_counter()
+
+    for day, demand in enumerate(daily_demands):
+        for k, q in ((releases or [])[day] if releases and day < len(releases) else {}).items():
+            wip[k] = wip.get(k, 0) + q
+
+        # 당일 필요량 = 당일 수요 + 미납 - 완제품 재고
+        need = {p: demand.get(p, 0) + backlog.get(p, 0) for p in set(demand) | set(backlog)}
+        target = {p: max(0, q - fg.get(p, 0)) for p, q in need.items()}
+        day_start = plan_start + timedelta(days=day)
+
+        def solve_day(day_target):
+            sub_stats = {}
+            result = solve_production_allocation(
+                demands=day_target, eqp_models=eqp_models, proc_config=proc_config, avail_time=avail_time,
+                opers_list=opers_list, wip=wip, eqp_wip=eqp_wip, tools=tools,
+                stats=sub_stats, plan_start=day_start, **solve_kwargs
+            )
+            if result[0] is None:
+                return None
+            state = _carry_state(result[0], day_start, opers_list, wip, eqp_wip, base_tools, avail_time)
+            # 출하: 완제품 재고 + 당일 완성품으로 필요량 충족, 남으면 재고 / 모자라면 미납 이월
+            return result, sub_stats, state, _ship(need, state[3], fg)
+
+        solved = solve_day(target)
+        if solved is None:
+            print(f"[Debug] Rolling horizon: day {day + 1} has no feasible plan")
+            if stats is not None:
+                stats.update({'days': day_stats, 'failed_day': day + 1})
+            return None, 0, pd.DataFrame()
+
+        # 당일 계획 후 상태(남은 WIP, 장비 작업, 재고/미납)로 이후 기간 부족분 계산 -> 있으면 당일 목표에 더해 다시 풀이
+        _, _, (next_wip, next_eqp_wip, _, _), (_, next_fg, next_backlog) = solved
+        pull_in = _lookahead_shortfall(day, daily_demands, lookahead_days, eqp_models, proc_config,
+                                       avail_time, opers_list, next_wip, next_eqp_wip, base_tools, solve_kwargs,
+                                       inventory=next_fg, backlog=next_backlog)
+        pull_in = {p: q for p, q in pull_in.items() if q > 1e-6}
+        if pull_in:
+            target = {p: target.get(p, 0) + pull_in.get(p, 0) for p in set(target) | set(pull_in)}
+            resolved = solve_day(target)
+            if resolved is not None:
+                solved = resolved
+            else:
+                print(f"[Debug] Rolling horizon: day {day + 1} pull-in solve failed, keeping the plan without pull-in")
+                pull_in = {}
+        (df_res, b_time, df_unmet), sub_stats, (wip, eqp_wip, tools, _), (shipped, fg, backlog) = solved
+
+        if not df_res.empty:
+            res_frames.append(df_res.assign(Day=day + 1))
+        if not df_unmet.empty:
+            unmet_frames.append(df_unmet.assign(Day=day + 1))
+        max_workload = max(max_workload, b_time)
+        day_stats.append({
+            'day': day + 1,
+            'target': sum(target.values()),
+            'pull_in': sum(pull_in.values()),
+            'shipped': sum(shipped.values()),
+            'backlog': sum(backlog.values()),
+            'inventory': sum(fg.values()),
+            'solver_status': sub_stats.get('solver', {}).get('status'),
+            'model': sub_stats.get('model', {}),
+            'timings': sub_stats.get('timings', {}),
+        })
+        print(f"[Debug] Rolling horizon day {day + 1}: target={day_stats[-1]['target']:.0f} "
+              f"shipped={day_stats[-1]['shipped']:.0f} backlog={day_stats[-1]['backlog']:.0f}")
+
+    if stats is not None:
+        stats.update({'days': day_stats, 'wall_time': perf_counter() - t0})
+    df_all = pd.concat(res_frames, ignore_index=True) if res_frames else pd.DataFrame()
+    df_unmet_all = pd.concat(unmet_frames, ignore_index=True) if unmet_frames else pd.DataFrame()
+    return df_all, max_workload, df_unmet_all
@@ -0,0 +1,120 @@
+import copy
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import pandas as pd
+from core.optimizer import solve_production_allocation
+
+def make_base_inputs(demands, eqp_models, proc_config, wip, eqp_wip, tools, avail_time):
+    """fetch_inputs 결과를 시나리오 기준 입력(dict)으로 묶음"""
+    return {
+        'DEMAND': demands,
+        'EQUIPMENT_MODELS': eqp_models,
+        'PROCESS_CONFIG': proc_config,
+        'WIP': wip,
+        'EQP_WIP': eqp_wip,
+        'TOOLS': tools,
+        'AVAILABLE_TIME': avail_time,
+    }
+
+def _parse_key(key):
+    """JSON 키('Product_A|OP10' 또는 ['Product_A', 'OP10'])를 튜플 키로 변환"""
+    if isinstance(key, (list, tuple)):
+        return tuple(key)
+    if isinstance(key, str) and '|' in key:
+        return tuple(key.split('|'))
+    return key
+
+def apply_scenario(base, delta):
+    """
+    기준 입력에 시나리오 델타를 적용한 새 입력 반환 (기준 입력은 변경하지 않음)
+    - DEMAND / WIP / TOOLS: 키별 값 덮어쓰기
+    - EQUIPMENT_MODELS: 모델별 장비 리스트 덮어쓰기
+    - AVAILABLE_TIME: 가용 시간 덮어쓰기
+    - DEMAND_SCALE: 전체 수요 배율 (예: 1.1 = +10%)
+    - DOWN_UNITS: 제외할 장비 리스트 (고장/PM)
+    - TOOLS_DELTA: 툴 수량 증감 (예: {'Product_A|OP10': 1})
+    """
+    inputs = copy.deepcopy(base)
+
+    if 'DEMAND_SCALE' in delta:
+        scale = float(delta['DEMAND_SCALE'])
+        inputs['DEMAND'] = {p: q * scale for p, q in inputs['DEMAND'].items()}
+    for table in ('DEMAND', 'WIP', 'TOOLS'):
+        for k, v in delta.get(table, {}).items():
+            inputs[table][_parse_key(k)] = v
+    for m, u_list in delta.get('EQUIPMENT_MODELS', {}).items():
+        inputs['EQUIPMENT_MODELS'][m] = list(u_list)
+    for k, v in delta.get('TOOLS_DELTA', {}).items():
+        key = _parse_key(k)
+        inputs['TOOLS'][key] = max(0, inputs['TOOLS'].get(key, 0) + v)
+    if 'AVAILABLE_TIME' in delta:
+        inputs['AVAILABLE_TIME'] = delta['AVAILABLE_TIME']
+
+    down_units = set(delta.get('DOWN_UNITS', []))
+    if down_units:
+        inputs['EQUIPMENT_MODELS'] = {
+            m: [u for u in u_list if u not in down_units]
+            for m, u_list in inputs['EQUIPMENT_MODELS'].items()
+        }
+        inputs['EQP_WIP'] = {u: v for u, v in inputs['EQP_WIP'].items() if u not in down_units}
+    return inputs
+
+def solve_scenario(name, inputs, solve_settings=None):
+    """
+    단일 시나리오 풀이 후 비교용 요약 반환 (프로세스 풀 워커에서 실행)
+    """
+    t0 = perf_counter()
+    stats = {}
+    df_res, b_time, df_unmet = solve_production_allocation(
+        demands=inputs['DEMAND'],
+        eqp_models=inputs['EQUIPMENT_MODELS'],
+        proc_config=inputs['PROCESS_CONFIG'],
+        avail_time=inputs['AVAILABLE_TIME'],
+        wip=inputs['WIP'],
+        eqp_wip=inputs['EQP_WIP'],
+        tools=inputs['TOOLS'],
+        stats=stats,
+        **(solve_settings or {})
+    )
+    solver_info = stats.get('solver', {})
+    summary = {
+        'scenario': name,
+        'status': 'COMPLETED' if df_res is not None else 'FAILED',
+        'solver_status': solver_info.get('status'),
+        'mip_gap': solver_info.get('gap'),
+        'overrun_units': stats.get('sequencing', {}).get('overrun_units'),
+        'unmet_qty': 0.0,
+        'bottleneck': float(b_time),
+        'assignments': 0,
+        'elapsed_sec': 0.0,
+    }
+    if df_res is not None:
+        if not df_unmet.empty:
+            summary['unmet_qty'] = float(df_unmet['Unmet_Qty'].sum())
+        if not df_res.empty:
+            summary['assignments'] = int((df_res['Type'] == 'Production').sum())
+    summary['elapsed_sec'] = perf_counter() - t0
+    return summary
+
+def run_scenarios(base, deltas, max_workers=None, solve_settings=None):
+    """
+    기준 입력 1개 + 시나리오 델타 목록을 프로세스 풀에서 병렬로 풀이
+    첫 행은 델타를 적용하지 않은 기준(base) 시나리오
+    반환: 시나리오별 미충족 수요 / 병목 부하 / 할당 건수 비교 DataFrame
+    """
+    scenarios = [('base', base)]
+    for i, delta in enumerate(deltas):
+        name = delta.get('name') or f"scenario_{i + 1}"
+        scenarios.append((name, apply_scenario(base, delta)))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(solve_scenario, name, inputs, solve_settings)
+                   for name, inputs in scenarios]
+        rows = [f.result() for f in futures]
+
+    df = pd.DataFrame(rows)
+    base_unmet = df.loc[0, 'unmet_qty']
+    base_bottleneck = df.loc[0, 'bottleneck']
+    df['unmet_vs_base'] = df['unmet_qty'] - base_unmet
+    df['bottleneck_vs_base'] = df['bottleneck'] - base_bottleneck
+    return df
@@ -0,0 +1,149 @@
+"""
+장비별 작업 순서 결정 (전환 시간 최소화)
+
+MILP는 할당량만 결정하고 전환은 할당 개수(P_ASSIGN)로만 근사하므로,
+풀이 후 장비별로 작업 순서를 정하는 작은 TSP(시작점 고정, 비대칭 경로)를 별도로 풂
+- 전환 시간 행렬: CHANGEOVER_CONFIG (PRODUCT_SWITCH / OPER_SWITCH / EXCEPTIONS)
+- 최근접 이웃 순서와 기존 정렬 순서 중 비용이 낮은 쪽에서 시작해 2-opt 구간 뒤집기로 개선
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+# 이 대수 이상의 장비를 순서 결정할 때만 프로세스 풀 사용 (작은 문제는 직렬이 더 빠름)
+PARALLEL_MIN_UNITS = 200
+
+def changeover_minutes(prev, nxt, config):
+    """(이전 제품, 이전 공정) -> (다음 제품, 다음 공정) 전환 시간 (이전 작업이 없으면 0)"""
+    p_old, o_old = prev
+    p_new, o_new = nxt
+    if p_old is None:
+        return 0
+    exceptions = config.get('EXCEPTIONS') or {}
+    if (p_old, p_new, o_new) in exceptions:
+        return exceptions[(p_old, p_new, o_new)]
+    if p_old != p_new:
+        return config['PRODUCT_SWITCH']
+    if o_old != o_new:
+        return config['OPER_SWITCH']
+    return 0
+
+def build_changeover_matrix(tasks, config, start=None):
+    """
+    tasks: [(제품, 공정)] - 한 장비에 할당된 작업
+    start: 장비의 현재 작업 (제품, 공정) 또는 None
+    반환: (matrix[i][j] = 작업 i -> j 전환 시간, start_cost[j] = 현재 작업 -> j 전환 시간)
+    """
+    matrix = [[changeover_minutes(a, b, config) for b in tasks] for a in tasks]
+    start_cost = [changeover_minutes(start or (None, None), b, config) for b in tasks]
+    return matrix, start_cost
+
+def path_cost(order, matrix, start_cost):
+    if not order:
+        return 0
+    cost = start_cost[order[0]]
+    for a, b in zip(order, order[1:]):
+        cost += matrix[a][b]
+    return cost
+
+def sequence_tasks(tasks, config, start=None, max_passes=20):
+    """
+    한 장비의 작업 순서 결정 (최근접 이웃과 입력 순서 중 나은 쪽 + 2-opt)
+    반환: tasks 인덱스 순서 리스트
+    """
+    n = len(tasks)
+    if n <= 1:
+        return list(range(n))
+    matrix, start_cost = build_changeover_matrix(tasks, config, start)
+
+    # 1. 최근접 이웃 (동률이면 입력 순서 우선 - 기존 (장비, 제품) 정렬 순서 유지)
+    remaining = set(range(n))
+    current = min(remaining, key=lambda j: (start_cost[j], j))
+    order = [current]
+    remaining.remove(current)
+    while remaining:
+        current = min(remaining, key=lambda j: (matrix[current][j], j))
+        order.append(current)
+        remaining.remove(current)
+
+    # 2. 기존 (장비, 제품) 정렬 순서가 더 좋거나 같으면 그 순서에서 시작 (결과가 기존 순서보다 나빠지지 않도록)
+    best = path_cost(order, matrix, start_cost)
+    identity = list(range(n))
+    identity_cost = path_cost(identity, matrix, start_cost)
+    if identity_cost <= best:
+        order, best = identity, identity_cost
+
+    # 3. 2-opt: 구간 뒤집기로 개선 (비대칭 행렬이므로 경로 비용을 다시 계산)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                cand = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                cost = path_cost(cand, matrix, start_cost)
+                if cost < best:
+                    order, best = cand, cost
+                    improved = True
+        if not improved:
+            break
+    return order
+
+def _sequence_chunk(items, config):
+    return {u: sequence_tasks(tasks, config, start) for u, tasks, start in items}
+
+def sequence_units(unit_tasks, start_states, config, max_workers=None):
+    """
+    모든 장비의 작업 순서 결정 (장비 간 독립이므로 대규모일 때 프로세스 풀로 병렬 처리)
+    unit_tasks: {장비: [(제품, 공정)]}, start_states: {장비: (제품, 공정)}
+    반환: {장비: 인덱스 순서}
+    """
+    items = [(u, tasks, start_states.get(u)) for u, tasks in unit_tasks.items() if len(tasks) > 1]
+    if len(items) < PARALLEL_MIN_UNITS or max_workers == 1:
+        return _sequence_chunk(items, config)
+
+    n_chunks = max_workers or 4
+    chunks = [items[i::n_chunks] for i in range(n_chunks)]
+    orders = {}
+    with ProcessPoolExecutor(max_workers=n_chunks) as pool:
+        for part in pool.map(_sequence_chunk, chunks, [config] * n_chunks):
+            orders.update(part)
+    return orders
+
+def setup_lower_bounds(unit_tasks, start_states, config, pool_size=None):
+    """
+    MILP 장비 가용 시간 제약용 전환 시간 하한 (core/optimizer.py setup_capacity)
+    작업 k로의 전환 시간은 같은 장비의 다른 작업(또는 현재 작업)에서 k로 오는 전환 중 최소값 이상
+    - 현재 작업이 있는 장비: 모든 할당 작업이 이 하한만큼 전환 (현재 작업을 잇는 작업은 0)
+    - 유휴 장비: 첫 작업은 전환이 없으므로 하한의 최대값(풀은 장비 대수 x 최대값)을 가용 시간에 돌려줌
+    unit_tasks: {장비: [(제품, 공정, 사이클타임)]}, start_states: {장비: (제품, 공정)}
+    반환: ({(제품, 공정, 장비): 전환 시간 하한}, {장비: 돌려줄 시간})
+    """
+    exceptions = config.get('EXCEPTIONS') or {}
+    exc_in = {}
+    for (p_old, p_new, o_new), minutes in exceptions.items():
+        exc_in.setdefault((p_new, o_new), {})[p_old] = minutes
+    pool_size = pool_size or {}
+    bounds, credit = {}, {}
+    for u, tasks in unit_tasks.items():
+        start = start_states.get(u)
+        preds = [(p, o) for p, o, _ in tasks]
+        if start is not None and start not in preds:
+            preds.append(start)
+        ops_of = {}
+        for p, o in preds:
+            ops_of.setdefault(p, set()).add(o)
+        unit_lb = []
+        for p, o, _ in tasks:
+            if (p, o) == start:
+                lb = 0
+            else:
+                exc = exc_in.get((p, o), {})
+                others = [q for q in ops_of if q != p]
+                cands = [exc[q] for q in others if q in exc]
+                if len(cands) < len(others):
+                    cands.append(config['PRODUCT_SWITCH'])
+                if ops_of[p] - {o}:
+                    cands.append(exc.get(p, config['OPER_SWITCH']))
+                lb = max(min(cands), 0) if cands else 0
+            bounds[p, o, u] = lb
+            unit_lb.append(lb)
+        if start is None and unit_lb:
+            credit[u] = max(unit_lb) * pool_size.get(u, 1)
+    return bounds, credit
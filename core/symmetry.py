@@ -0,0 +1,278 @@
+"""
+대칭 제거: 서로 바꿔도 같은 장비를 하나의 장비 풀(pool)로 묶어 풀이
+
+같은 모델의 유휴 장비(EQP_WIP에 없음 = 연속성 페널티 없음, 여유 시간 = 가용 시간 전체)는
+할당 가능한 (제품, 공정, 사이클타임)이 모두 같으므로 어느 장비에 배정해도 목적값이 같고
+CBC는 이런 대칭 해를 Branch & Bound에서 반복 탐색하게 됨
+- 풀이: 작업 목록이 같은 유휴 장비 n대를 풀 장비 하나로 대체
+  Assign = 해당 작업에 쓰는 장비 수 (0 ~ n 정수), 가용 시간 = n * 가용 시간
+- 복원: 풀의 작업별 수량을 풀이가 정한 장비 수 이내로 실제 장비에 나누어 배정
+풀이는 작업별 장비 수와 풀 전체 시간만 제한하므로 (완화) 그런 배치가 없으면 할당이 늘어날 수 있음
+"""
+import math
+from core.optimizer import BIG_M
+
+# 이 값 이하의 수량/시간은 0으로 간주
+QTY_EPS = 1e-6
+# 풀별 배치 탐색 노드 한도 (초과 시 Best-Fit 배치)
+CHAIN_NODE_LIMIT = 20000
+
+def aggregate_index(index, eqp_wip, min_pool_size=2):
+    """
+    반환: (풀로 축소된 index, 통계 dict) - 묶을 장비가 없으면 (index, 통계)
+    축소된 index['pools']: {풀 이름: [실제 장비]}, index['pool_size']: {풀 이름: 장비 수}
+    """
+    groups = {}
+    for u in index['units']:
+        tasks = index['unit_tasks'].get(u)
+        if tasks and u not in eqp_wip:
+            groups.setdefault((index['unit_model'][u], tuple(sorted(tasks))), []).append(u)
+    pools = {}
+    member_of = {}
+    for (model, _), members in groups.items():
+        if len(members) < min_pool_size:
+            continue
+        name = f"{model}[{members[0]}+{len(members) - 1}]"
+        pools[name] = members
+        member_of.update({u: name for u in members})
+
+    stats = {
+        'pools': len(pools),
+        'pooled_units': len(member_of),
+        'combos_removed': 0,
+    }
+    if not pools:
+        return index, stats
+
+    units, unit_model = [], {}
+    for u in index['units']:
+        g = member_of.get(u, u)
+        if g == u or pools[g][0] == u:
+            units.append(g)
+            unit_model[g] = index['unit_model'][u]
+    cycle = dict(index['cycle'])
+    qty_ub = index.get('qty_ub')
+    pool_ub = {} if qty_ub is not None else None
+    combos, po_units, unit_tasks = [], {}, {}
+    for p, o, u in index['combos']:
+        g = member_of.get(u, u)
+        if g != u and pools[g][0] != u:
+            continue
+        t = index['cycle'][p, o, u]
+        combos.append((p, o, g))
+        cycle[p, o, g] = t
+        po_units.setdefault((p, o), []).append(g)
+        unit_tasks.setdefault(g, []).append((p, o, t))
+        if qty_ub is not None:
+            # 풀 안의 장비는 서로 같으므로 장비 1대 기준 상한을 그대로 사용
+            pool_ub[p, o, g] = qty_ub[p, o, u]
+    stats['combos_removed'] = len(index['combos']) - len(combos)
+    print(f"[Debug] Symmetry: {len(member_of)} idle units -> {len(pools)} pools "
+          f"({len(index['combos'])} -> {len(combos)} combos)")
+
+    pooled = dict(index, units=units, unit_model=unit_model, combos=combos, cycle=cycle,
+                  po_units=po_units, unit_tasks=unit_tasks,
+                  pools=pools, pool_size={g: len(m) for g, m in pools.items()})
+    if pool_ub is not None:
+        pooled['qty_ub'] = pool_ub
+    return pooled, stats
+
+def aggregate_values(values, index):
+    """실제 장비 기준 {(p,o,u): 수량}(warm start 등)을 풀 기준으로 합산"""
+    member_of = {u: g for g, members in index['pools'].items() for u in members}
+    pooled = {}
+    for (p, o, u), q in values.items():
+        key = (p, o, member_of.get(u, u))
+        pooled[key] = pooled.get(key, 0) + q
+    return pooled
+
+def assign_count(q, ub, pool_size):
+    """풀 수량 q에 필요한 장비 수 (초기해용, 장비 1대 상한 ub 기준)"""
+    if q <= QTY_EPS:
+        return 0
+    return min(pool_size, max(1, math.ceil(q / ub - QTY_EPS)))
+
+def _chain_layout(items, n_units, cap, node_limit=CHAIN_NODE_LIMIT):
+    """
+    풀 장비들을 길이 n_units * cap인 하나의 시간 축으로 보고 작업을 차례로 이어 붙인 배치 탐색
+    작업 j가 걸치는 장비 수(= 장비 경계를 넘는 횟수 + 1)가 budget[j] 이하가 되도록
+    작업 순서와 (여유 시간이 있으면) 다음 장비 경계로 건너뛰기를 깊이 우선 탐색
+    items: [(작업 시간, budget)]
+    반환: [작업별 시작 위치] 또는 탐색 한도 내에 찾지 못하면 None
+    """
+    n = len(items)
+    slack = n_units * cap - sum(m for m, _ in items)
+    order = sorted(range(n), key=lambda j: (items[j][1] - items[j][0] / cap, -items[j][0]))
+    starts = [0.0] * n
+    failed = set()
+    nodes = 0
+
+    def span(s, minutes):
+        first = math.floor(s / cap + QTY_EPS)
+        last = math.floor((s + minutes) / cap - QTY_EPS)
+        return last - first + 1, last
+
+    def dfs(mask, pos, used):
+        nonlocal nodes
+        if mask == (1 << n) - 1:
+            return True
+        key = (mask, round(pos, 4))
+        if key in failed or nodes >= node_limit:
+            return False
+        nodes += 1
+        boundary = math.ceil(pos / cap - QTY_EPS) * cap
+        tried = set()
+        for j in order:
+            if mask >> j & 1 or items[j] in tried:
+                continue
+            tried.add(items[j])
+            minutes, budget = items[j]
+            for s in (pos, boundary) if boundary - pos > QTY_EPS else (pos,):
+                # 경계로 건너뛴 시간은 유휴 시간 (전체 여유 시간 이내)
+                if used + (s - pos) > slack + QTY_EPS:
+                    continue
+                pieces, last = span(s, minutes)
+                if pieces > budget or last >= n_units:
+                    continue
+                starts[j] = s
+                if dfs(mask | 1 << j, s + minutes, used + (s - pos)):
+                    return True
+        failed.add(key)
+        return False
+
+    return starts if dfs(0, 0.0, 0.0) else None
+
+def _greedy_layout(items, free, cap):
+    """
+    탐색 실패 시 대체 배치: 가용 시간 이상인 몫은 빈 장비를 통째로 사용하고
+    나머지 몫은 통째로 들어가는 장비 중 여유 시간이 가장 작은 장비에 배정 (Best-Fit),
+    들어갈 장비가 없으면 여유 시간이 큰 장비부터 나누어 채움
+    반환: 작업별 [(장비, 시간)]
+    """
+    parts = [[] for _ in items]
+    rests = []
+    for j, (minutes, _) in enumerate(items):
+        while minutes >= cap - QTY_EPS:
+            u = max(free, key=free.get)
+            if free[u] < cap - QTY_EPS:
+                break
+            parts[j].append((u, cap))
+            free[u] -= cap
+            minutes -= cap
+        if minutes > QTY_EPS:
+            rests.append((-minutes, j))
+    for minutes, j in sorted(rests):
+        minutes = -minutes
+        fits = [u for u in free if free[u] >= minutes - QTY_EPS]
+        if fits:
+            u = min(fits, key=free.get)
+            parts[j].append((u, minutes))
+            free[u] -= minutes
+            continue
+        for u in sorted(free, key=lambda x: -free[x]):
+            if minutes <= QTY_EPS or free[u] <= QTY_EPS:
+                break
+            part = min(minutes, free[u])
+            parts[j].append((u, part))
+            free[u] -= part
+            minutes -= part
+        if minutes > QTY_EPS:
+            # 수치 오차로 남은 시간은 여유 시간이 가장 큰 장비에 추가
+            parts[j].append((max(free, key=free.get), minutes))
+    return parts
+
+def disaggregate(qty_vals, index, avail_time):
+    """
+    풀 기준 수량을 실제 장비로 분배 (장비별 가용 시간 이내)
+    풀이가 정한 작업별 장비 수(budget) 이내로 나누는 배치를 먼저 탐색하고 (_chain_layout),
+    찾지 못하면 Best-Fit 배치 사용 (_greedy_layout, 할당이 늘어날 수 있음)
+    반환: ({(p,o,u): 수량}, 통계 {'assignments': 풀 장비 할당 수, 'extra_assignments': 풀이 대비 증가분})
+    """
+    pools = index['pools']
+    cycle = index['cycle']
+    qty_ub = index.get('qty_ub', {})
+    out = {}
+    pool_items = {g: [] for g in pools}
+    for (p, o, u), q in qty_vals.items():
+        if u in pools:
+            if q > QTY_EPS:
+                pool_items[u].append((p, o, q))
+        else:
+            out[p, o, u] = q
+
+    n_assign = n_budget = 0
+    for g, tasks in pool_items.items():
+        members = pools[g]
+        # 시간을 쓰지 않는 작업은 첫 장비에 배정
+        for p, o, q in tasks:
+            if cycle[p, o, g] <= 0:
+                out[p, o, members[0]] = out.get((p, o, members[0]), 0) + q
+                n_assign += 1
+                n_budget += 1
+        tasks = [(p, o, q) for p, o, q in tasks if cycle[p, o, g] > 0]
+        items = []
+        for p, o, q in tasks:
+            t = cycle[p, o, g]
+            # 풀이의 장비 수 (최적해에서 Assign = q / 장비 1대 상한의 올림)
+            budget = assign_count(q, min(qty_ub.get((p, o, g), BIG_M), avail_time / t), len(members))
+            items.append((q * t, budget))
+        n_budget += sum(b for _, b in items)
+
+        starts = _chain_layout(items, len(members), avail_time)
+        if starts is not None:
+            parts = []
+            for s, (minutes, _) in zip(starts, items):
+                pieces = []
+                b = math.floor(s / avail_time + QTY_EPS)
+                while minutes > QTY_EPS:
+                    seg = min(minutes, (b + 1) * avail_time - s)
+                    pieces.append((members[b], seg))
+                    minutes -= seg
+                    s += seg
+                    b += 1
+                parts.append(pieces)
+        else:
+            parts = _greedy_layout(items, {u: float(avail_time) for u in members}, avail_time)
+
+        for (p, o, _), pieces in zip(tasks, parts):
+            t = cycle[p, o, g]
+            for u, minutes in pieces:
+                out[p, o, u] = out.get((p, o, u), 0) + minutes / t
+                n_assign += 1
+    return out, {'assignments': n_assign, 'extra_assignments': max(n_assign - n_budget, 0)}
+
+def finalize_plan(qty_vals, base_index, avail_time, eqp_wip, tools, unmet_vals):
+    """
+    분배 후 실제 장비 기준 할당 정리 및 원 모델 목적값 재계산
+    분배로 늘어난 할당은 같은 작업을 하는 다른 장비의 여유 시간으로 옮겨 줄임 (core/heuristic.py의 탐욕 보정)
+    반환: ({(p,o,u): 수량}, 원 모델 목적값, 줄인 할당 수)
+    """
+    import numpy as np
+    from core.optimizer import P_UNMET, P_CONTINUATION, P_ASSIGN, P_QTY
+    from core.heuristic import _consolidate
+
+    combos = base_index['combos']
+    n = len(combos)
+    unit_ids = {u: i for i, u in enumerate(base_index['units'])}
+    combo_unit = np.fromiter((unit_ids[u] for _, _, u in combos), dtype=np.int64, count=n)
+    cycle = np.fromiter((base_index['cycle'][k] for k in combos), dtype=np.float64, count=n)
+    assign_cost = np.full(n, float(P_ASSIGN))
+    groups = {}
+    for i, (p, o, u) in enumerate(combos):
+        groups.setdefault((p, o), []).append(i)
+        info = eqp_wip.get(u)
+        if info is not None and (p != info['Product'] or o != info['Operation']):
+            assign_cost[i] += P_CONTINUATION
+    groups = {po: np.array(idx, dtype=np.int64) for po, idx in groups.items()}
+    unit_cap = np.full(len(unit_ids), float(avail_time))
+    for u, info in eqp_wip.items():
+        if u in unit_ids:
+            unit_cap[unit_ids[u]] -= info.get('End_Time_Offset', 0)
+    tool_cap = {po: tools.get(po, 99) * avail_time for po in groups}
+
+    qty = np.fromiter((qty_vals[k] for k in combos), dtype=np.float64, count=n)
+    qty[qty <= QTY_EPS] = 0.0
+    removed = _consolidate(qty, groups, cycle, combo_unit, unit_cap, tool_cap, assign_cost)
+    assigned = qty > QTY_EPS
+    objective = float(P_QTY * qty.sum() + assign_cost[assigned].sum() + P_UNMET * sum(unmet_vals.values()))
+    return dict(zip(combos, qty.tolist())), objective, removed
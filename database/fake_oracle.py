@@ -0,0 +1,219 @@
+"""
+로컬 테스트용 가짜 Oracle 드라이버 (sqlite3 기반)
+
+OracleManager가 사용하는 oracledb API 일부(create_pool / acquire / cursor / execute / executemany)만 흉내냄
+config.yaml의 DB 프로필에 `driver: fake`를 지정하면 oracledb 대신 사용되며, dsn은 SQLite 파일 경로
+파일이 없으면 config/data_config.py의 샘플 데이터로 입력 테이블을 생성
+"""
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from config import data_config
+
+# 실제 DB 왕복 지연을 흉내내기 위한 쿼리당 지연 (초) - 동시 조회 효과 확인용
+QUERY_LATENCY_SEC = float(os.environ.get('FAKE_ORACLE_LATENCY_SEC', 0))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS TB_PRODUCTION_PLAN (PRODUCT_ID TEXT, DEMAND_QTY REAL);
+CREATE TABLE IF NOT EXISTS TB_EQUIPMENT_MASTER (MODEL_ID TEXT, UNIT_ID TEXT);
+CREATE TABLE IF NOT EXISTS TB_PROCESS_STANDARD (PRODUCT_ID TEXT, OPER_ID TEXT, MODEL_ID TEXT, CYCLE_TIME REAL);
+CREATE TABLE IF NOT EXISTS TB_WIP_STATUS (PRODUCT_ID TEXT, OPER_ID TEXT, WIP_QTY REAL);
+CREATE TABLE IF NOT EXISTS TB_EQP_WIP (EQP_ID TEXT, PROD_ID TEXT, OPER_ID TEXT, END_TIME TIMESTAMP);
+CREATE TABLE IF NOT EXISTS TB_TOOL_MASTER (PRODUCT_ID TEXT, OPER_ID TEXT, TOOL_QTY REAL);
+CREATE TABLE IF NOT EXISTS PRODUCTION_RESULTS (
+    RULE_TIMEKEY TEXT, EQP_ID TEXT, START_TIME TIMESTAMP, END_TIME TIMESTAMP, PROD_ID TEXT, OPER_ID TEXT
+);
+CREATE TABLE IF NOT EXISTS PRODUCTION_RESULT_JOBS (RULE_TIMEKEY TEXT PRIMARY KEY, JOB_ID TEXT, UPLOAD_TIME TIMESTAMP);
+"""
+
+# oracledb 타입 상수 대용 (setinputsizes 인자로만 사용)
+DB_TYPE_TIMESTAMP = 'TIMESTAMP'
+
+_init_lock = threading.Lock()
+
+def seed_sample_data(path):
+    """data_config 샘플 데이터로 입력 테이블 생성 (사이클타임은 초, 장비 재공은 종료 시각으로 저장)"""
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany("INSERT INTO TB_PRODUCTION_PLAN VALUES (?, ?)", list(data_config.DEMAND.items()))
+        conn.executemany("INSERT INTO TB_EQUIPMENT_MASTER VALUES (?, ?)",
+                         [(m, u) for m, u_list in data_config.EQUIPMENT_MODELS.items() for u in u_list])
+        conn.executemany("INSERT INTO TB_PROCESS_STANDARD VALUES (?, ?, ?, ?)",
+                         [(p, o, m, t * 60) for (p, o, m), t in data_config.PROCESS_CONFIG.items()])
+        conn.executemany("INSERT INTO TB_WIP_STATUS VALUES (?, ?, ?)",
+                         [(p, o, q) for (p, o), q in data_config.WIP.items()])
+        conn.executemany("INSERT INTO TB_EQP_WIP VALUES (?, ?, ?, ?)",
+                         [(u, info['Product'], info['Operation'],
+                           (now + timedelta(minutes=info['End_Time_Offset'])).isoformat(' '))
+                          for u, info in data_config.EQP_WIP.items()])
+        conn.executemany("INSERT INTO TB_TOOL_MASTER VALUES (?, ?, ?)",
+                         [(p, o, q) for (p, o), q in data_config.TOOLS.items()])
+        conn.commit()
+    finally:
+        conn.close()
+
+def _to_sqlite(sql):
+    """
+    Oracle 위치 바인드(:1, :2 ...)를 SQLite 번호 바인드(?1, ?2 ...)로 변환
+    ORA_ROWSCN(변경 마커)은 SQLite의 rowid로 대체 (행 추가/삭제 시 변경)
+    """
+    sql = sql.replace('ORA_ROWSCN', 'rowid')
+    return re.sub(r':(\d+)', r'?\1', sql)
+
+def _bind_value(v):
+    if isinstance(v, datetime):
+        return v.isoformat(' ')
+    if hasattr(v, 'item'):  # numpy 스칼라
+        return v.item()
+    return v
+
+class BatchError:
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+
+class Cursor:
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+        self._batch_errors = []
+        self.arraysize = 100
+        self.prefetchrows = 2
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def execute(self, sql, params=()):
+        if QUERY_LATENCY_SEC:
+            threading.Event().wait(QUERY_LATENCY_SEC)
+        self._cur.execute(_to_sqlite(sql), [_bind_value(v) for v in params])
+        return self
+
+    def executemany(self, sql, seq_of_params, batcherrors=False, **kwargs):
+        """batcherrors=True면 oracledb처럼 실패한 행만 건너뛰고 getbatcherrors()로 반환"""
+        self._batch_errors = []
+        sql = _to_sqlite(sql)
+        if not batcherrors:
+            self._cur.executemany(sql, ([_bind_value(v) for v in row] for row in seq_of_params))
+            return
+        for offset, row in enumerate(seq_of_params):
+            try:
+                self._cur.execute(sql, [_bind_value(v) for v in row])
+            except sqlite3.Error as e:
+                self._batch_errors.append(BatchError(offset, str(e)))
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def getbatcherrors(self):
+        return list(self._batch_errors)
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size or self.arraysize)
+
+    def close(self):
+        self._cur.close()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Connection:
+    def __init__(self, path, pool=None):
+        self._conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._pool = pool
+
+    def cursor(self):
+        return Cursor(self._conn)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        # 풀에서 받은 연결은 닫지 않고 반납
+        if self._pool is not None:
+            self._conn.rollback()
+            self._pool._release(self)
+        else:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SessionPool:
+    def __init__(self, path, min=1, max=2, increment=1):
+        self.path = path
+        self.max = max
+        self._idle = []
+        self._busy = 0
+        self._cond = threading.Condition()
+        self.opened = 0  # 실제로 생성된 연결 수 (풀 재사용 확인용)
+        for _ in range(min):
+            self._idle.append(self._open())
+
+    def _open(self):
+        self.opened += 1
+        return Connection(self.path, pool=self)
+
+    def acquire(self):
+        with self._cond:
+            while not self._idle and self._busy >= self.max:
+                self._cond.wait()
+            conn = self._idle.pop() if self._idle else self._open()
+            self._busy += 1
+            return conn
+
+    def _release(self, conn):
+        with self._cond:
+            self._busy -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self, force=False):
+        with self._cond:
+            for conn in self._idle:
+                conn._conn.close()
+            self._idle = []
+
+def _ensure_db(dsn):
+    with _init_lock:
+        if not os.path.exists(dsn):
+            os.makedirs(os.path.dirname(os.path.abspath(dsn)), exist_ok=True)
+            seed_sample_data(dsn)
+        else:
+            # 이전 버전에서 만든 파일에 새로 추가된 테이블 생성
+            with sqlite3.connect(dsn) as conn:
+                conn.executescript(SCHEMA)
+
+def create_pool(user=None, password=None, dsn=None, min=1, max=2, increment=1, **kwargs):
+    _ensure_db(dsn)
+    return SessionPool(dsn, min=min, max=max, increment=increment)
+
+def connect(user=None, password=None, dsn=None, **kwargs):
+    _ensure_db(dsn)
+    return Connection(dsn)
@@ -1,9 +1,109 @@
+import atexit
 import oracledb
+import numpy as np
 import pandas as pd
+import threading
 import yaml
 import os
-from datetime import datetime
-from config import data_config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import time
+from time import perf_counter
+from config import data_config, resolve_path
+from database.snapshot_cache import SnapshotCache, DEFAULT_MARKER_QUERY
+
+# 입력 조회 쿼리 (fetch_inputs에서 동시에 실행)
+INPUT_QUERIES = {
+    'demand': "SELECT PRODUCT_ID, DEMAND_QTY FROM TB_PRODUCTION_PLAN",
+    'equipment': "SELECT MODEL_ID, UNIT_ID FROM TB_EQUIPMENT_MASTER",
+    'process': "SELECT PRODUCT_ID, OPER_ID, MODEL_ID, CYCLE_TIME FROM TB_PROCESS_STANDARD",
+    'wip': "SELECT PRODUCT_ID, OPER_ID, WIP_QTY FROM TB_WIP_STATUS",
+    'eqp_wip': "SELECT EQP_ID, PROD_ID, OPER_ID, END_TIME FROM TB_EQP_WIP",
+    'tools': "SELECT PRODUCT_ID, OPER_ID, TOOL_QTY FROM TB_TOOL_MASTER",
+}
+
+# 입력별 원본 테이블 (변경 마커 쿼리용)
+INPUT_TABLES = {
+    'demand': 'TB_PRODUCTION_PLAN',
+    'equipment': 'TB_EQUIPMENT_MASTER',
+    'process': 'TB_PROCESS_STANDARD',
+    'wip': 'TB_WIP_STATUS',
+    'eqp_wip': 'TB_EQP_WIP',
+    'tools': 'TB_TOOL_MASTER',
+}
+
+# 하루 중 거의 변하지 않는 기준 정보 테이블 (스냅샷 캐시 대상 기본값)
+MASTER_INPUTS = ('equipment', 'process', 'tools')
+
+# 세션 풀 기본 크기 (config.yaml database.pool / 프로필별 pool로 변경)
+DEFAULT_POOL_CONFIG = {'min': 1, 'max': 8, 'increment': 1}
+
+# 조회 시 한 번의 왕복으로 가져올 행 수 (config.yaml database.fetch_arraysize / prefetchrows로 변경)
+DEFAULT_FETCH_ARRAYSIZE = 10000
+
+# 결과 적재 시 executemany 1회당 행 수 (config.yaml database.upload.batch_size로 변경)
+DEFAULT_UPLOAD_BATCH_SIZE = 5000
+
+# 결과 적재 키(RULE_TIMEKEY) 형식 - 14자리 (YYYYMMDDHHMMSS)
+RULE_TIMEKEY_FORMAT = "%Y%m%d%H%M%S"
+# 적재 키와 작업 ID 매핑 테이블 기본값 (config.yaml database.upload.job_table)
+DEFAULT_UPLOAD_JOB_TABLE = 'PRODUCTION_RESULT_JOBS'
+_timekey_lock = threading.Lock()
+_last_timekey = None
+
+def next_rule_timekey(after=None):
+    """
+    결과 적재 키 발급 - 현재 시각(초)이 이 프로세스의 마지막 발급 키나 after(DB의 최대 키) 이하이면 그 다음 초를 사용
+    (같은 초에 여러 번 적재해도 키가 겹치지 않고 항상 증가)
+    """
+    global _last_timekey
+    with _timekey_lock:
+        t = datetime.now().replace(microsecond=0)
+        for prev in (_last_timekey, after):
+            if prev:
+                t = max(t, datetime.strptime(str(prev)[:14], RULE_TIMEKEY_FORMAT) + timedelta(seconds=1))
+        _last_timekey = t.strftime(RULE_TIMEKEY_FORMAT)
+        return _last_timekey
+
+# 프로세스 단위 세션 풀 {mode: pool} - 배치마다 새로 접속하지 않고 재사용
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _get_driver(name):
+    """DB 드라이버 모듈 (oracledb 또는 로컬 테스트용 fake)"""
+    if name == 'fake':
+        from database import fake_oracle
+        return fake_oracle
+    return oracledb
+
+def get_pool(mode, db_conf, pool_conf):
+    """모드별 세션 풀 반환 (최초 호출 시 생성)"""
+    with _pools_lock:
+        pool = _pools.get(mode)
+        if pool is None:
+            driver = _get_driver(db_conf.get('driver'))
+            pool = driver.create_pool(
+                user=db_conf.get('user'),
+                password=db_conf.get('password'),
+                dsn=db_conf.get('dsn'),
+                min=pool_conf['min'],
+                max=pool_conf['max'],
+                increment=pool_conf['increment']
+            )
+            _pools[mode] = pool
+            print(f"[Info] Created session pool for {mode} (min={pool_conf['min']}, max={pool_conf['max']})")
+        return pool
+
+@atexit.register
+def close_pools():
+    """프로세스 종료 시 모든 세션 풀 정리"""
+    with _pools_lock:
+        for pool in _pools.values():
+            try:
+                pool.close(force=True)
+            except Exception:
+                pass
+        _pools.clear()
 
 class OracleManager:
     def __init__(self, mode=None):
@@ -18,20 +118,98 @@ class OracleManager:
         # 모드별 DB 프로필 로드 (local_test는 DB 접속 정보 불필요)
         if self.mode != 'local_test':
             db_conf = self.full_config.get('database', {}).get(self.mode, {})
+            if db_conf.get('driver') == 'fake':
+                # 가짜 드라이버의 dsn은 SQLite 파일 경로 (저장소 루트 기준)
+                db_conf = dict(db_conf, dsn=resolve_path(db_conf.get('dsn')))
             self.user = db_conf.get('user')
             self.password = db_conf.get('password')
             self.dsn = db_conf.get('dsn')
         else:
+            db_conf = {}
             self.user = self.password = self.dsn = None
+        self.db_conf = db_conf
+
+        # 세션 풀 크기: 공통 설정(database.pool) < 프로필별 설정(database.<mode>.pool)
+        self.pool_conf = dict(DEFAULT_POOL_CONFIG)
+        self.pool_conf.update(self.full_config.get('database', {}).get('pool') or {})
+        self.pool_conf.update(db_conf.get('pool') or {})
+
+        db_common = self.full_config.get('database', {})
+        self.fetch_arraysize = db_conf.get('fetch_arraysize', db_common.get('fetch_arraysize', DEFAULT_FETCH_ARRAYSIZE))
+        self.prefetchrows = db_conf.get('prefetchrows', db_common.get('prefetchrows', self.fetch_arraysize))
+        self.fetch_stats = {}
+
+        # 기준 정보 스냅샷 캐시 (database.snapshot_cache)
+        cache_conf = db_common.get('snapshot_cache') or {}
+        self.cache_enabled = bool(cache_conf.get('enabled', False)) and self.mode != 'local_test'
+        self.cache_ttl_sec = cache_conf.get('ttl_min', 720) * 60
+        self.cache_inputs = tuple(cache_conf.get('tables', MASTER_INPUTS))
+        self.marker_queries = cache_conf.get('marker_queries') or {}
+        self.cache_dir = resolve_path(cache_conf.get('dir', 'cache'))
+        self._cache = None
 
     def _get_connection(self):
+        """세션 풀에서 연결 획득 (with 블록 종료 시 풀에 반납)"""
         if self.mode == 'local_test':
             return None
-        return oracledb.connect(user=self.user, password=self.password, dsn=self.dsn)
+        return get_pool(self.mode, self.db_conf, self.pool_conf).acquire()
 
-    def fetch_inputs(self):
+    def _read_query(self, sql):
+        """
+        풀 연결 하나로 쿼리 1건 실행 (fetch_inputs의 동시 조회 단위)
+        반환: {컬럼명: 값 리스트} - DataFrame/행 단위 객체를 만들지 않고 컬럼 단위로 전달
+        """
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                # 큰 배열 크기로 왕복 횟수 최소화 (prefetchrows는 execute 전에 설정해야 적용됨)
+                cursor.arraysize = self.fetch_arraysize
+                cursor.prefetchrows = self.prefetchrows
+                cursor.execute(sql)
+                names = [d[0] for d in cursor.description]
+                rows = cursor.fetchall()
+        if not rows:
+            return {name: [] for name in names}
+        return dict(zip(names, (list(col) for col in zip(*rows))))
+
+    def _read_marker(self, name):
+        """테이블 변경 마커 조회 (실패 시 None - TTL만으로 캐시 유효성 판단)"""
+        sql = self.marker_queries.get(name) or DEFAULT_MARKER_QUERY.format(table=INPUT_TABLES[name])
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql)
+                    return SnapshotCache.marker_key(cursor.fetchone())
+        except Exception as e:
+            print(f"[Debug] Change marker query failed for {name}: {e}")
+            return None
+
+    def _read_cached(self, name, force_refresh=False):
+        """
+        기준 정보 테이블을 스냅샷 캐시 우선으로 조회
+        반환: (컬럼 데이터, 캐시 상태) - hit / miss / expired / changed / refresh
+        """
+        if self._cache is None:
+            self._cache = SnapshotCache(self.cache_dir, self.mode)
+        cached = None if force_refresh else self._cache.get(name)
+        marker = self._read_marker(name)
+
+        if cached is None:
+            state = 'refresh' if force_refresh else 'miss'
+        elif time.time() - cached[1] > self.cache_ttl_sec:
+            state = 'expired'
+        elif marker is not None and marker != cached[0]:
+            state = 'changed'
+        else:
+            return cached[2], 'hit'
+
+        columns = self._read_query(INPUT_QUERIES[name])
+        self._cache.put(name, marker, columns)
+        return columns, state
+
+    def fetch_inputs(self, force_refresh=False):
         """
         시스템 모드에 따라 샘플 데이터(local_test) 또는 실데이터(prod/dev) 반환
+        force_refresh: 스냅샷 캐시를 무시하고 기준 정보 테이블을 다시 조회
         """
         if self.mode == 'local_test':
             print(f"[Info] Running in LOCAL_TEST mode. Returning sample data.")
@@ -46,70 +224,165 @@ class OracleManager:
 
         try:
             print(f"[Info] Fetching inputs from Oracle ({self.mode} DB)...")
-            with self._get_connection() as conn:
-                # 1. 수요 데이터
-                demand_query = "SELECT PRODUCT_ID, DEMAND_QTY FROM TB_PRODUCTION_PLAN"
-                demand_df = pd.read_sql(demand_query, conn)
-                demands = dict(zip(demand_df['PRODUCT_ID'], demand_df['DEMAND_QTY']))
-
-                # 2. 장비 데이터
-                eqp_query = "SELECT MODEL_ID, UNIT_ID FROM TB_EQUIPMENT_MASTER"
-                eqp_df = pd.read_sql(eqp_query, conn)
-                equipment_models = eqp_df.groupby('MODEL_ID')['UNIT_ID'].apply(list).to_dict()
-
-                # 3. 공정 설정 (초 -> 분 변환)
-                proc_query = "SELECT PRODUCT_ID, OPER_ID, MODEL_ID, CYCLE_TIME FROM TB_PROCESS_STANDARD"
-                proc_df = pd.read_sql(proc_query, conn)
-                process_config = {(row['PRODUCT_ID'], row['OPER_ID'], row['MODEL_ID']): row['CYCLE_TIME'] / 60.0 for _, row in proc_df.iterrows()}
-
-                # 4. 재공량 (Input WIP)
-                wip_query = "SELECT PRODUCT_ID, OPER_ID, WIP_QTY FROM TB_WIP_STATUS"
-                wip_df = pd.read_sql(wip_query, conn)
-                wip = {(row['PRODUCT_ID'], row['OPER_ID']): row['WIP_QTY'] for _, row in wip_df.iterrows()}
-
-                # 5. 장비별 현재 작업 재공 (Equipment WIP) - 초 -> 분 변환
-                eqw_query = "SELECT EQP_ID, PROD_ID, OPER_ID, END_TIME FROM TB_EQP_WIP"
-                eqw_df = pd.read_sql(eqw_query, conn)
-                eqp_wip = {}
-                now = datetime.now()
-                for _, row in eqw_df.iterrows():
-                    offset_min = (row['END_TIME'] - now).total_seconds() / 60.0
-                    eqp_wip[row['EQP_ID']] = {
-                        'Product': row['PROD_ID'],
-                        'Operation': row['OPER_ID'],
-                        'End_Time_Offset': max(0, offset_min)
-                    }
-
-                # 6. 연간/공정별 툴 수량 (Tool Constraints)
-                tool_query = "SELECT PRODUCT_ID, OPER_ID, TOOL_QTY FROM TB_TOOL_MASTER"
-                tool_df = pd.read_sql(tool_query, conn)
-                tools = {(row['PRODUCT_ID'], row['OPER_ID']): row['TOOL_QTY'] for _, row in tool_df.iterrows()}
-
-                return demands, equipment_models, process_config, wip, eqp_wip, tools
+            # 6개 입력 테이블을 각각 풀 연결로 동시에 조회 (왕복 지연 중첩)
+            # 스냅샷 캐시 사용 시 기준 정보 테이블은 변경 마커만 조회하고 변경된 경우에만 전체 조회
+            t0 = perf_counter()
+            cache_states = {}
+            with ThreadPoolExecutor(max_workers=min(len(INPUT_QUERIES), self.pool_conf['max'])) as pool:
+                futures = {}
+                for name, sql in INPUT_QUERIES.items():
+                    if self.cache_enabled and name in self.cache_inputs:
+                        futures[name] = pool.submit(self._read_cached, name, force_refresh)
+                    else:
+                        futures[name] = pool.submit(self._read_query, sql)
+                cols = {}
+                for name, f in futures.items():
+                    if self.cache_enabled and name in self.cache_inputs:
+                        cols[name], cache_states[name] = f.result()
+                    else:
+                        cols[name] = f.result()
+            fetch_sec = perf_counter() - t0
 
-        except Exception as e:
-            print(f"Failed to fetch inputs from Oracle ({self.mode}): {e}")
-            return None, None, None, None, None, None
+            # 1. 수요 데이터
+            demand = cols['demand']
+            demands = dict(zip(demand['PRODUCT_ID'], demand['DEMAND_QTY']))
+
+            # 2. 장비 데이터 (모델 ID 순, 모델 내 장비는 조회 순서 유지)
+            eqp = cols['equipment']
+            equipment_models = {}
+            for m, u in zip(eqp['MODEL_ID'], eqp['UNIT_ID']):
+                equipment_models.setdefault(m, []).append(u)
+            equipment_models = dict(sorted(equipment_models.items()))
+
+            # 3. 공정 설정 (초 -> 분 변환)
+            proc = cols['process']
+            cycle_min = (np.asarray(proc['CYCLE_TIME'], dtype=float) / 60.0).tolist()
+            process_config = dict(zip(zip(proc['PRODUCT_ID'], proc['OPER_ID'], proc['MODEL_ID']), cycle_min))
+
+            # 4. 재공량 (Input WIP)
+            wip_cols = cols['wip']
+            wip = dict(zip(zip(wip_cols['PRODUCT_ID'], wip_cols['OPER_ID']), wip_cols['WIP_QTY']))
+
+            # 5. 장비별 현재 작업 재공 (Equipment WIP) - 종료 시각 -> 현재 기준 남은 분 (음수는 0)
+            # 분 단위로 올림: 같은 DB 데이터를 연달아 조회해도 같은 값이 되어 결과 캐시 키가 일치
+            # (조회 시각의 초 단위 차이로 키가 매번 달라지지 않도록 함, 장비는 최대 1분 더 점유된 것으로 봄)
+            eqw = cols['eqp_wip']
+            now = np.datetime64(datetime.now(), 'us')
+            end_times = np.asarray(eqw['END_TIME'], dtype='datetime64[us]')
+            offsets = np.fmax(np.ceil((end_times - now) / np.timedelta64(1, 'm')), 0).tolist()
+            eqp_wip = {
+                u: {'Product': p, 'Operation': o, 'End_Time_Offset': off}
+                for u, p, o, off in zip(eqw['EQP_ID'], eqw['PROD_ID'], eqw['OPER_ID'], offsets)
+            }
+
+            # 6. 연간/공정별 툴 수량 (Tool Constraints)
+            tool = cols['tools']
+            tools = dict(zip(zip(tool['PRODUCT_ID'], tool['OPER_ID']), tool['TOOL_QTY']))
+
+            elapsed = perf_counter() - t0
+            n_rows = sum(len(next(iter(c.values()), [])) for c in cols.values())
+            self.fetch_stats = {
+                'rows': {name: len(next(iter(c.values()), [])) for name, c in cols.items()},
+                'query_sec': fetch_sec,
+                'total_sec': elapsed,
+                'rows_per_sec': n_rows / elapsed if elapsed > 0 else None,
+                'cache': cache_states,
+            }
+            print(f"[Info] Fetched {n_rows} rows in {elapsed:.2f}s "
+                  f"(query {fetch_sec:.2f}s, {n_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+            if cache_states:
+                print(f"[Info] Snapshot cache: {cache_states}")
+
+            return demands, equipment_models, process_config, wip, eqp_wip, tools
 
         except Exception as e:
             print(f"Failed to fetch inputs from Oracle ({self.mode}): {e}")
-            return None, None, None, None
+            return None, None, None, None, None, None
 
-    def upload_results(self, df):
+    def upload_results(self, df, job_id=None):
+        """
+        계획 결과 적재 (배치 단위 array DML)
+        - 적재마다 새 RULE_TIMEKEY(14자리) 발급 - 이 프로세스의 이전 키와 테이블의 최대 키보다 큰 값 (next_rule_timekey)
+        - job_id가 있으면 upload.job_table(기본 PRODUCTION_RESULT_JOBS)에 RULE_TIMEKEY - JOB_ID 매핑 기록
+        - 바인드는 DataFrame 컬럼에서 바로 구성하고 upload.batch_size 행씩 executemany(batcherrors=True)
+        - upload.replace_horizon: 적재하는 장비의 같은 계획 구간(START_TIME~END_TIME)에 걸친 이전 계획을 교체
+          (다른 장비의 계획은 유지)
+        - 삭제와 적재는 하나의 트랜잭션 (배치 오류가 있으면 전체 롤백, 이전 계획 유지)
+        반환: 적재 통계 dict (실패 시 {'error': 메시지}), 건너뛴 경우 None
+        """
         if self.mode == 'local_test' or df is None or df.empty:
             print(f"[Info] skipping upload (Mode: {self.mode})")
-            return
+            return None
+
+        upload_conf = self.full_config.get('database', {}).get('upload') or {}
+        batch_size = upload_conf.get('batch_size', DEFAULT_UPLOAD_BATCH_SIZE)
+        replace_horizon = upload_conf.get('replace_horizon', False)
+        job_table = upload_conf.get('job_table', DEFAULT_UPLOAD_JOB_TABLE)
+
+        n = len(df)
+        cols = list(zip(
+            df['Unit'].tolist(),
+            df['Start_Time'].tolist(),
+            df['End_Time'].tolist(),
+            df['Product'].tolist(),
+            df['Operation'].tolist()
+        ))
+        plan_start, plan_end = df['Start_Time'].min(), df['End_Time'].max()
+        driver = _get_driver(self.db_conf.get('driver'))
+        ts_type = getattr(driver, 'DB_TYPE_TIMESTAMP', None)
+        # 문자열 컬럼은 최대 길이로 고정해 배치마다 버퍼 재할당이 일어나지 않도록 함
+        str_size = lambda col: max(1, int(df[col].astype(str).str.len().max()))
 
-        rule_timekey = datetime.now().strftime("%Y%m%d%H%M%S")
+        t0 = perf_counter()
         try:
             with self._get_connection() as conn:
                 with conn.cursor() as cursor:
+                    cursor.execute("SELECT MAX(RULE_TIMEKEY) FROM PRODUCTION_RESULTS")
+                    rule_timekey = next_rule_timekey(after=cursor.fetchone()[0])
+                    data = [(rule_timekey, *row) for row in cols]
+                    deleted = 0
+                    if replace_horizon:
+                        cursor.executemany(
+                            "DELETE FROM PRODUCTION_RESULTS WHERE EQP_ID = :1 AND START_TIME < :2 AND END_TIME > :3",
+                            [(u, plan_end, plan_start) for u in df['Unit'].unique().tolist()]
+                        )
+                        deleted += max(cursor.rowcount or 0, 0)
+
                     sql = "INSERT INTO PRODUCTION_RESULTS (RULE_TIMEKEY, EQP_ID, START_TIME, END_TIME, PROD_ID, OPER_ID) VALUES (:1, :2, :3, :4, :5, :6)"
-                    data = []
-                    for _, row in df.iterrows():
-                        data.append((rule_timekey, row['Unit'], row['Start_Time'], row['End_Time'], row['Product'], row['Operation']))
-                    cursor.executemany(sql, data)
+                    cursor.setinputsizes(len(rule_timekey), str_size('Unit'), ts_type, ts_type,
+                                         str_size('Product'), str_size('Operation'))
+                    errors = []
+                    for i in range(0, n, batch_size):
+                        cursor.executemany(sql, data[i:i + batch_size], batcherrors=True)
+                        errors.extend((i + e.offset, e.message) for e in cursor.getbatcherrors())
+
+                    if errors:
+                        conn.rollback()
+                        for offset, message in errors[:5]:
+                            print(f"[Debug] Upload row {offset} rejected: {message}")
+                        error = f"{len(errors)} rows rejected, rolled back"
+                        print(f"Failed to upload to Oracle ({self.mode}): {error}")
+                        return {'error': error, 'rows': n}
+                    if job_id and job_table:
+                        cursor.execute(
+                            f"INSERT INTO {job_table} (RULE_TIMEKEY, JOB_ID, UPLOAD_TIME) VALUES (:1, :2, :3)",
+                            [rule_timekey, job_id, datetime.now()]
+                        )
                     conn.commit()
-            print(f"Successfully uploaded {len(df)} rows to Oracle ({self.mode}).")
         except Exception as e:
             print(f"Failed to upload to Oracle ({self.mode}): {e}")
+            return {'error': str(e), 'rows': n}
+
+        elapsed = perf_counter() - t0
+        stats = {
+            'rows': n,
+            'deleted': deleted,
+            'batches': (n + batch_size - 1) // batch_size,
+            'sec': elapsed,
+            'rows_per_sec': n / elapsed if elapsed > 0 else None,
+            'rule_timekey': rule_timekey,
+            'job_id': job_id,
+        }
+        print(f"Successfully uploaded {n} rows to Oracle ({self.mode}) in {elapsed:.2f}s "
+              f"({n / max(elapsed, 1e-9):,.0f} rows/s, replaced {deleted} rows).")
+        return stats
@@ -0,0 +1,64 @@
+"""
+기준 정보 테이블(장비/공정 표준/툴) 로컬 스냅샷 캐시
+
+- 모드별 SQLite 파일(<cache_dir>/snapshot_<mode>.db)에 테이블별 컬럼 데이터와 변경 마커를 저장
+- 변경 마커: 테이블별 가벼운 집계 쿼리 결과 (기본: 행 수 + MAX(ORA_ROWSCN))
+  마커가 같고 TTL 이내이면 전체 조회 없이 캐시 사용
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+# 기본 변경 마커 쿼리 ({table}은 실제 테이블명으로 치환)
+DEFAULT_MARKER_QUERY = "SELECT COUNT(*), MAX(ORA_ROWSCN) FROM {table}"
+
+class SnapshotCache:
+    def __init__(self, cache_dir, mode):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"snapshot_{mode}.db")
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS SNAPSHOT ("
+                "TABLE_NAME TEXT PRIMARY KEY, MARKER TEXT, FETCHED_AT REAL, PAYLOAD BLOB)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def marker_key(marker_row):
+        """마커 쿼리 결과(행)를 비교 가능한 문자열로 변환 (조회 실패 시 None)"""
+        if marker_row is None:
+            return None
+        return json.dumps(list(marker_row), default=str)
+
+    def get(self, table):
+        """반환: (marker, fetched_at, columns) 또는 캐시가 없으면 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MARKER, FETCHED_AT, PAYLOAD FROM SNAPSHOT WHERE TABLE_NAME = ?", (table,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            columns = pickle.loads(row[2])
+        except Exception:
+            # 손상된 스냅샷은 없는 것으로 처리 (다음 조회 시 덮어씀)
+            return None
+        return row[0], row[1], columns
+
+    def put(self, table, marker, columns):
+        payload = pickle.dumps(columns, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO SNAPSHOT (TABLE_NAME, MARKER, FETCHED_AT, PAYLOAD) VALUES (?, ?, ?, ?)",
+                (table, marker, time.time(), payload)
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM SNAPSHOT")
@@ -0,0 +1,32 @@
+from core.optimizer import solve_production_allocation
+
+def _two_component_instance():
+    # 제품 A는 Model_X, 제품 B는 Model_Y에서만 생산 -> 장비를 공유하지 않는 연결 요소 2개
+    proc_config = {}
+    for p, m in (('A', 'Model_X'), ('B', 'Model_Y')):
+        proc_config[p, 'OP10', m] = 0.5
+        proc_config[p, 'OP20', m] = 1.0
+    return dict(
+        demands={'A': 80, 'B': 80},
+        eqp_models={'Model_X': ['X1'], 'Model_Y': ['Y1']},
+        proc_config=proc_config, avail_time=100, opers_list=['OP10', 'OP20'],
+        wip={('A', 'OP10'): 200, ('B', 'OP10'): 200}, eqp_wip={}, tools={},
+        changeover_config={'PRODUCT_SWITCH': 30, 'OPER_SWITCH': 30, 'EXCEPTIONS': {}},
+    )
+
+def test_components_share_one_plan_start():
+    stats = {}
+    df_res, _, _ = solve_production_allocation(**_two_component_instance(), decompose=True, stats=stats)
+    assert stats['components'] == 2
+    # 유휴 장비는 모두 같은 기준 시각에서 시작
+    assert df_res.groupby('Unit')['Start_Time'].min().nunique() == 1
+
+def test_decomposed_stats_keep_sequencing_capacity_check():
+    # 기본(setup_capacity=False)은 MILP가 각 장비의 가용 100분을 생산으로 채우므로 OP10 -> OP20 전환 30분만큼 초과
+    stats = {}
+    solve_production_allocation(**_two_component_instance(), decompose=True, stats=stats)
+    single = {}
+    solve_production_allocation(**_two_component_instance(), stats=single)
+    assert stats['sequencing']['overrun_units'] == single['sequencing']['overrun_units'] == 2
+    assert stats['sequencing']['max_overrun_min'] == single['sequencing']['max_overrun_min']
+    assert stats['sequencing']['setup_min'] == single['sequencing']['setup_min']
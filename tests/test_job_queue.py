@@ -0,0 +1,39 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.job_queue import JobQueue
+
+def _wait_until(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+def test_manual_job_starts_beside_running_batch_of_same_mode():
+    release = threading.Event()
+    started = []
+    def job(name):
+        started.append(name)
+        release.wait(5)
+
+    queue = JobQueue(ThreadPoolExecutor(2), 2, max_running_per_mode=1, reserved_manual_workers=1)
+    queue.push('batch', 'production', 'scheduled', job, 'batch', coalesce=True)
+    assert _wait_until(lambda: 'batch' in started)
+    # 같은 모드 배치가 실행 중이어도 예약 워커에서 바로 시작
+    queue.push('manual', 'production', 'manual', job, 'manual')
+    assert _wait_until(lambda: 'manual' in started)
+    assert not queue.is_queued('manual')
+    # 다음 배치는 모드 한도로 대기
+    queue.push('batch2', 'production', 'scheduled', job, 'batch2', coalesce=True)
+    assert queue.is_queued('batch2')
+    release.set()
+    assert _wait_until(lambda: 'batch2' in started)
+
+def test_newer_scheduled_job_replaces_queued_one():
+    release = threading.Event()
+    queue = JobQueue(ThreadPoolExecutor(1), 1, max_size=5)
+    queue.push('running', 'production', 'scheduled', release.wait, 5, coalesce=True)
+    queue.push('old', 'production', 'scheduled', release.wait, 5, coalesce=True)
+    assert queue.push('new', 'production', 'scheduled', release.wait, 5, coalesce=True) == ['old']
+    assert not queue.is_queued('old') and queue.is_queued('new')
+    release.set()
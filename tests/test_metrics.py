@@ -0,0 +1,30 @@
+from core.metrics import JobMetrics, format_prometheus
+
+def _finish(job_metrics, job_id, mode, **outcome):
+    job_metrics.observe(job_id, {'status': 'PENDING', 'mode': mode})
+    job_metrics.observe(job_id, {'status': 'RUNNING'})
+    job_metrics.observe(job_id, {'status': 'COMPLETED', **outcome})
+    job_metrics.observe(job_id, {'end_time': None})
+
+def test_last_plan_overrun_is_exported():
+    job_metrics = JobMetrics()
+    _finish(job_metrics, 'j1', 'production', capacity_warning=True,
+            metrics={'phases': {'solve': 1.0}, 'sequencing': {'overrun_units': 3, 'max_overrun_min': 45.0}})
+    text = format_prometheus(job_metrics.snapshot())
+    assert 'optimizer_last_overrun_units{mode="production"} 3.0' in text
+    assert 'optimizer_last_max_overrun_minutes{mode="production"} 45.0' in text
+
+def test_job_counters_are_cumulative():
+    # 작업 이력 보관 한도와 무관하게 종료 작업 수와 단계 시간 합계는 줄지 않음
+    job_metrics = JobMetrics()
+    _finish(job_metrics, 'j1', 'production', metrics={'phases': {'solve': 1.0}})
+    _finish(job_metrics, 'j2', 'production', metrics={'phases': {'solve': 2.0}})
+    job_metrics.observe('j3', {'status': 'PENDING', 'mode': 'production'})
+    # 이미 종료된 작업의 추가 갱신은 다시 집계하지 않음
+    job_metrics.observe('j2', {'status': 'COMPLETED'})
+    text = format_prometheus(job_metrics.snapshot())
+    assert 'optimizer_jobs_finished_total{status="COMPLETED",mode="production"} 2.0' in text
+    assert 'optimizer_jobs{status="PENDING",mode="production"} 1.0' in text
+    assert 'optimizer_job_phase_seconds_sum{phase="solve",mode="production"} 3.0' in text
+    assert 'optimizer_job_phase_seconds_count{phase="solve",mode="production"} 2.0' in text
+    assert 'optimizer_last_phase_seconds{phase="solve",mode="production"} 2.0' in text
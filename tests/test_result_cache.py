@@ -0,0 +1,34 @@
+import time
+import database.manager as manager
+from core.result_cache import ResultCache, cached_solve, solve_key
+from database.manager import OracleManager
+
+def _fake_manager(tmp_path, monkeypatch):
+    """임시 가짜 DB(local_fake)를 쓰는 매니저 - 장비 재공 종료 시각은 생성 시각 기준"""
+    monkeypatch.setattr(manager, '_pools', {})
+    mgr = OracleManager(mode='local_fake')
+    mgr.db_conf = dict(mgr.db_conf, dsn=str(tmp_path / 'fake_oracle.db'))
+    mgr.cache_dir = str(tmp_path / 'snapshot')
+    return mgr
+
+def test_refetch_from_local_fake_hits_result_cache(tmp_path, monkeypatch):
+    mgr = _fake_manager(tmp_path, monkeypatch)
+    cache = ResultCache(str(tmp_path / 'results'))
+    states = []
+    for _ in range(2):
+        demands, eqp_models, proc_config, wip, eqp_wip, tools = mgr.fetch_inputs()
+        assert any(info['End_Time_Offset'] > 0 for info in eqp_wip.values())
+        stats = {}
+        df_res, _, _ = cached_solve(cache=cache, stats=stats, demands=demands, eqp_models=eqp_models,
+                                    proc_config=proc_config, wip=wip, eqp_wip=eqp_wip, tools=tools)
+        assert df_res is not None
+        states.append(stats['cache']['state'])
+        time.sleep(0.05)
+    assert states == ['miss', 'hit']
+
+def test_eqp_wip_offsets_are_whole_minutes(tmp_path, monkeypatch):
+    mgr = _fake_manager(tmp_path, monkeypatch)
+    first = mgr.fetch_inputs()
+    second = mgr.fetch_inputs()
+    assert all(float(info['End_Time_Offset']).is_integer() for info in first[4].values())
+    assert solve_key(eqp_wip=first[4]) == solve_key(eqp_wip=second[4])
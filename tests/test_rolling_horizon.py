@@ -0,0 +1,21 @@
+from core.rolling_horizon import solve_rolling_horizon
+
+def test_pull_in_counts_inventory_and_post_production_wip():
+    # 병목 U1(OP20)은 하루 100개, 3일차에만 수요 250: 1일차 50 + 2일차 100 선행 생산이 필요
+    # 1일차에 당겨 만든 재고 50은 2일차 계산에서 빼야 하므로 2일차 선행 생산은 150이 아니라 100
+    stats = {}
+    df_res, _, df_unmet = solve_rolling_horizon(
+        daily_demands=[{'A': 0}, {'A': 0}, {'A': 250}],
+        eqp_models={'Model_N': ['V1'], 'Model_M': ['U1']},
+        proc_config={('A', 'OP10', 'Model_N'): 0.01, ('A', 'OP20', 'Model_M'): 1.0},
+        avail_time=100, opers_list=['OP10', 'OP20'], wip={('A', 'OP10'): 1000}, eqp_wip={}, tools={},
+        lookahead_days=2, changeover_config={'PRODUCT_SWITCH': 0, 'OPER_SWITCH': 0, 'EXCEPTIONS': {}},
+        stats=stats)
+    days = stats['days']
+    assert [d['pull_in'] for d in days[:2]] == [50, 100]
+    assert [d['target'] for d in days] == [50, 100, 100]
+    made = df_res[(df_res['Type'] == 'Production') & (df_res['Operation'] == 'OP20')]
+    assert made['Quantity'].sum() == 250
+    assert days[-1]['backlog'] == 0 and days[-1]['inventory'] == 0
+    # 목표가 능력을 넘지 않으므로 가상의 미충족이 생기지 않음
+    assert df_unmet.empty
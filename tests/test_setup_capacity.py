@@ -0,0 +1,48 @@
+import pytest
+from core.optimizer import solve_production_allocation
+from core.sequencing import setup_lower_bounds
+
+def _instance(eqp_wip=None):
+    # 장비 1대(가용 100분)가 OP10(0.5분)/OP20(1분)을 모두 처리, 전환 30분
+    return dict(
+        demands={'A': 80}, eqp_models={'Model_X': ['X1']},
+        proc_config={('A', 'OP10', 'Model_X'): 0.5, ('A', 'OP20', 'Model_X'): 1.0},
+        avail_time=100, opers_list=['OP10', 'OP20'], wip={('A', 'OP10'): 200},
+        eqp_wip=eqp_wip or {}, tools={},
+        changeover_config={'PRODUCT_SWITCH': 30, 'OPER_SWITCH': 30, 'EXCEPTIONS': {}},
+    )
+
+def test_setup_lower_bounds_follow_cheapest_incoming_switch():
+    conf = {'PRODUCT_SWITCH': 30, 'OPER_SWITCH': 20, 'EXCEPTIONS': {('B', 'A', 'OP10'): 10}}
+    tasks = {'U1': [('A', 'OP10', 1.0), ('A', 'OP20', 1.0), ('B', 'OP10', 1.0)],
+             'U2': [('A', 'OP10', 1.0), ('C', 'OP10', 1.0)]}
+    bounds, credit = setup_lower_bounds(tasks, {'U2': ('C', 'OP10')}, conf)
+    # U1: A/OP10 <- B 예외 10분, A/OP20 <- A/OP10 공정 전환 20분, B/OP10 <- 제품 전환 30분
+    assert bounds['A', 'OP10', 'U1'] == 10
+    assert bounds['A', 'OP20', 'U1'] == 20
+    assert bounds['B', 'OP10', 'U1'] == 30
+    # 유휴 장비는 첫 작업 전환이 없으므로 최대 하한만큼 돌려줌
+    assert credit == {'U1': 30}
+    # U2는 C/OP10 작업 중: 연속 작업은 0, A/OP10은 제품 전환
+    assert bounds['C', 'OP10', 'U2'] == 0
+    assert bounds['A', 'OP10', 'U2'] == 30
+
+@pytest.mark.parametrize('backend', ['pulp', 'highs'])
+def test_plan_fits_available_time_with_setups(backend):
+    stats = {}
+    df_res, _, _ = solve_production_allocation(**_instance(), backend=backend, stats=stats, setup_capacity=True)
+    assert stats['sequencing']['overrun_units'] == 0
+    # 생산 + 전환 30분 = 가용 100분
+    assert df_res['Time_Spent_Min'].sum() == pytest.approx(100)
+    unchecked = {}
+    solve_production_allocation(**_instance(), backend=backend, stats=unchecked)
+    assert unchecked['sequencing']['overrun_units'] == 1
+
+@pytest.mark.parametrize('backend', ['pulp', 'highs'])
+def test_continuing_current_task_needs_no_first_setup(backend):
+    # 현재 OP20 작업 중인 장비: OP20을 이어서 하면 전환 없음, OP10 추가 시 전환 1회
+    eqp_wip = {'X1': {'Product': 'A', 'Operation': 'OP20', 'End_Time_Offset': 0}}
+    stats = {}
+    df_res, _, _ = solve_production_allocation(**_instance(eqp_wip), backend=backend, stats=stats, setup_capacity=True)
+    assert stats['sequencing']['overrun_units'] == 0
+    assert df_res['Time_Spent_Min'].sum() <= 100 + 1e-6
@@ -0,0 +1,32 @@
+import pytest
+from core.optimizer import solve_production_allocation
+
+def _solve(backend, aggregate_units):
+    # 유휴 장비 2대(U1, U2, 가용 100분)에 60분짜리 작업 3개: 풀 모델은 작업당 장비 1대로 풀리지만
+    # 실제 장비에는 한 작업을 나누어야 하므로 분배 후 할당이 1개 늘어남 (P_ASSIGN만큼 손실)
+    proc_config = {(p, 'OP10', 'Model_N'): 0.1 for p in 'ABC'}
+    proc_config.update({(p, 'OP20', 'Model_M'): 1.0 for p in 'ABC'})
+    stats = {}
+    solve_production_allocation(
+        demands={'A': 60, 'B': 60, 'C': 60},
+        eqp_models={'Model_N': ['V1'], 'Model_M': ['U1', 'U2']},
+        proc_config=proc_config, avail_time=100, opers_list=['OP10', 'OP20'],
+        wip={(p, 'OP10'): 500 for p in 'ABC'}, eqp_wip={}, tools={},
+        changeover_config={'PRODUCT_SWITCH': 0, 'OPER_SWITCH': 0, 'EXCEPTIONS': {}},
+        backend=backend, aggregate_units=aggregate_units, stats=stats)
+    return stats
+
+@pytest.mark.parametrize('backend', ['pulp', 'highs'])
+def test_lossy_pooling_is_resolved_per_unit(backend):
+    pooled = _solve(backend, True)
+    unpooled = _solve(backend, False)
+    symmetry, solver = pooled['symmetry'], pooled['solver']
+    assert symmetry['extra_assignments'] == 1
+    assert 'resolved_objective' in symmetry
+    # 분배 손실을 재풀이로 복구: 풀 없이 푼 최적값과 같음
+    assert solver['objective'] == pytest.approx(unpooled['solver']['objective'])
+    assert solver['objective'] > symmetry['pooled_objective']
+    # 갭은 원 모델 기준 하한으로 다시 계산 (풀 모델의 0.0을 그대로 쓰지 않음)
+    assert solver['bound'] >= symmetry['pooled_objective']
+    assert solver['gap'] == pytest.approx(abs(solver['objective'] - solver['bound']) / solver['objective'])
+    assert solver['status'] == 'OPTIMAL'
@@ -0,0 +1,43 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pandas as pd
+import core.job_manager as job_manager
+import database.manager as manager
+from database.manager import OracleManager
+
+def _fake_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(manager, '_pools', {})
+    mgr = OracleManager(mode='local_fake')
+    mgr.db_conf = dict(mgr.db_conf, dsn=str(tmp_path / 'fake_oracle.db'))
+    return mgr
+
+def _plan():
+    start = datetime(2026, 1, 1, 8)
+    return pd.DataFrame({'Unit': ['U1', 'U2'], 'Product': ['A', 'B'], 'Operation': ['OP10', 'OP10'],
+                         'Start_Time': [start, start], 'End_Time': [start + timedelta(hours=1)] * 2})
+
+def test_uploads_in_the_same_second_get_distinct_keys(tmp_path, monkeypatch):
+    mgr = _fake_manager(tmp_path, monkeypatch)
+    keys = [mgr.upload_results(_plan(), job_id=f'job-{i}')['rule_timekey'] for i in range(3)]
+    assert all(len(k) == 14 for k in keys)
+    assert keys == sorted(set(keys))
+    with sqlite3.connect(mgr.db_conf['dsn']) as conn:
+        jobs = dict(conn.execute("SELECT RULE_TIMEKEY, JOB_ID FROM PRODUCTION_RESULT_JOBS").fetchall())
+        n_rows = conn.execute("SELECT COUNT(*) FROM PRODUCTION_RESULTS").fetchone()[0]
+    assert jobs == {k: f'job-{i}' for i, k in enumerate(keys)}
+    assert n_rows == 6
+
+def test_failed_upload_rolls_back_and_fails_the_job(tmp_path, monkeypatch):
+    mgr = _fake_manager(tmp_path, monkeypatch)
+    mgr.full_config['database']['upload'] = {'job_table': 'MISSING_TABLE'}
+    stats = mgr.upload_results(_plan(), job_id='job-1')
+    assert 'error' in stats
+    with sqlite3.connect(mgr.db_conf['dsn']) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM PRODUCTION_RESULTS").fetchone()[0] == 0
+
+    monkeypatch.setattr(job_manager.OracleManager, 'upload_results',
+                        lambda self, df, job_id=None: {'error': 'ORA-00942', 'rows': len(df)})
+    outcome = job_manager.execute_optimization('local_test', job_id='job-1')
+    assert outcome['status'] == 'FAILED'
+    assert 'ORA-00942' in outcome['error']
+    assert outcome['solution']